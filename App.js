@@ -24,7 +24,7 @@ import DeviceControl from './components/DeviceControl';
 import GraphBox from './components/GraphBox';
 import ElderlyScreen from './screens/ElderlyScreen';
 import { StatusBar } from 'expo-status-bar';
-import { getAutoMode, setAutoMode as setGlobalAutoMode, subscribeToAutoModeUpdates, initApiService, fetchHistory } from './services/api';
+import { getAutoMode, setAutoMode as setGlobalAutoMode, subscribeToAutoModeUpdates, initApiService, fetchHistory, subscribeToSensorStream } from './services/api';
 
 const Stack = createStackNavigator();
 const Tab = createBottomTabNavigator();
@@ -150,22 +150,16 @@ function HomeScreen({ navigation, userLocation }) {
   const currentChartData = chartData[selectedMetric] || fallbackMetricData[selectedMetric];
   console.log(`[HomeScreen] ${selectedMetric} 현재 차트 데이터:`, currentChartData);
   
-  // 현재 센서 데이터 로드 함수
-  const loadCurrentSensorData = async () => {
-    try {
-      const { fetchStatus } = await import('./services/api');
-      const data = await fetchStatus();
-      setCurrentSensorData({
-        temperature: data.temperature || fallbackMetricData.temperature[fallbackMetricData.temperature.length - 1],
-        humidity: data.humidity || fallbackMetricData.humidity[fallbackMetricData.humidity.length - 1],
-        power: data.power || fallbackMetricData.power[fallbackMetricData.power.length - 1],
-        soil: data.soil || fallbackMetricData.soil[fallbackMetricData.soil.length - 1],
-        co2: data.co2 || fallbackMetricData.co2[fallbackMetricData.co2.length - 1],
-        light: data.light || fallbackMetricData.light[fallbackMetricData.light.length - 1],
-      });
-    } catch (error) {
-      console.error('현재 센서 데이터 로드 오류:', error);
-    }
+  // 현재 센서 데이터 반영 함수
+  const applyCurrentSensorData = (data) => {
+    setCurrentSensorData({
+      temperature: data.temperature || fallbackMetricData.temperature[fallbackMetricData.temperature.length - 1],
+      humidity: data.humidity || fallbackMetricData.humidity[fallbackMetricData.humidity.length - 1],
+      power: data.power || fallbackMetricData.power[fallbackMetricData.power.length - 1],
+      soil: data.soil || fallbackMetricData.soil[fallbackMetricData.soil.length - 1],
+      co2: data.co2 || fallbackMetricData.co2[fallbackMetricData.co2.length - 1],
+      light: data.light || fallbackMetricData.light[fallbackMetricData.light.length - 1],
+    });
   };
 
   // 디바이스 제어용 현재 값들
@@ -184,11 +178,8 @@ function HomeScreen({ navigation, userLocation }) {
       }
     })();
 
-    // 초기 센서 데이터 로드
-    loadCurrentSensorData();
-
-    // 1초마다 센서 데이터 업데이트 (거의 실시간)
-    const sensorInterval = setInterval(loadCurrentSensorData, 1000);
+    // 서버 푸시로 센서 데이터 실시간 수신 (연결이 끊기면 폴링으로 대체)
+    const unsubscribeSensorStream = subscribeToSensorStream(applyCurrentSensorData);
 
     // 자동모드 상태 실시간 구독
     const unsubscribeAutoMode = subscribeToAutoModeUpdates((enabled) => {
@@ -197,7 +188,7 @@ function HomeScreen({ navigation, userLocation }) {
 
     return () => {
       unsubscribeAutoMode();
-      clearInterval(sensorInterval);
+      unsubscribeSensorStream();
     };
   }, []);
 
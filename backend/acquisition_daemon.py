@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+센서 수집 데몬
+시리얼 포트, 샘플러, InfluxDB 센서/롤업 기록, 자동화 규칙 평가를 이 프로세스 하나만 소유하고
+온실별 최신 스냅샷을 공유 메모리(sensor_shm)에 게시합니다.
+웹 워커(gunicorn 등)와 음성 서버는 SENSOR_SOURCE=shared(또는 auto)로 블록을 읽기만 하고,
+장치 제어, 아두이노 재연결, 자동화 설정은 제어 소켓으로 이 데몬에 요청합니다.
+
+사용 예:
+    python acquisition_daemon.py
+    SENSOR_SOURCE=shared gunicorn -k gthread -w 4 app:app
+"""
+import os
+
+# 데몬 자신은 항상 직접 수집 (sensors 임포트 전에 설정해야 함)
+os.environ["SENSOR_SOURCE"] = "local"
+
+import signal
+import sys
+import threading
+
+import influx_storage
+from automation import AutomationEngine
+from rollups import RollupEngine
+from sensors import init_sensors
+from sensor_shm import (
+    SnapshotBlockWriter, ControlServer, SENSOR_SHM_NAME, SENSOR_CONTROL_SOCKET, running_daemon_pid,
+)
+
+
+class AcquisitionDaemon:
+    """온실 매니저들의 스냅샷을 공유 메모리에 게시하고 제어 요청을 처리합니다."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.writer = SnapshotBlockWriter(registry.ids(), SENSOR_SHM_NAME)
+        self.rollup_engine = RollupEngine(influx_storage.save_rollup_buckets)
+        # 재시작 전 종료 시 기록한 미완성 구간을 이어서 누적
+        self.rollup_engine.seed(influx_storage.get_open_rollup_buckets())
+        self.automation = AutomationEngine(registry)
+        self.server = None
+        self._published = {}
+        self._publish_lock = threading.Lock()
+
+        for index, (greenhouse_id, manager) in enumerate(registry.items()):
+            # 샘플 틱 콜백을 먼저 등록해 같은 스냅샷이 샘플로 한 번만 게시되도록 함
+            manager.subscribe(lambda snapshot, i=index, m=manager: self._publish(i, m, snapshot, True),
+                              samples_only=True)
+            manager.subscribe(lambda snapshot, i=index, m=manager: self._publish(i, m, snapshot, False))
+            manager.subscribe(self.rollup_engine.on_sample, samples_only=True)
+            manager.subscribe(self.automation.on_sample, samples_only=True)
+            self._publish(index, manager, manager.get_snapshot(), False)
+
+    def _publish(self, index, manager, snapshot, sampled):
+        # 샘플러와 장치 제어 스레드가 동시에 게시할 때 더 오래된 스냅샷이 나중에 덮어쓰지 않도록 함
+        with self._publish_lock:
+            last = self._published.get(index, 0)
+            if snapshot["seq"] < last or (snapshot["seq"] == last and not sampled):
+                return
+            self._published[index] = snapshot["seq"]
+            port = manager.arduino.port if manager.arduino_connected and manager.arduino else None
+            self.writer.publish(index, snapshot, port=port, sampled=sampled)
+
+    def handle(self, request):
+        """제어 요청 하나를 처리합니다. (제어 소켓 연결 스레드에서 호출)"""
+        try:
+            manager = self.registry.get(request.get("greenhouse"))
+        except KeyError:
+            return {"success": False, "error": f"등록되지 않은 온실입니다: {request.get('greenhouse')}"}
+
+        command = request.get("cmd")
+        if command == "update_device":
+            success = manager.update_device(request.get("device"), bool(request.get("status")))
+            if success:
+                # 워커를 거친 수동 제어도 잠시 자동화에서 제외
+                self.automation.hold(manager.greenhouse_id, request.get("device"))
+            return {"success": success}
+        if command == "arduino_status":
+            return {"success": True, "status": manager.get_arduino_status()}
+        if command == "reconnect":
+            return {"success": manager.reconnect_arduino()}
+        if command == "automation_status":
+            return {"success": True, "automation": self.automation.get_status(manager.greenhouse_id)}
+        if command == "automation_update":
+            status = self.automation.update(manager.greenhouse_id, enabled=request.get("enabled"),
+                                            rules=request.get("rules"),
+                                            reset_rules=bool(request.get("reset_rules")))
+            return {"success": True, "automation": status}
+        return {"success": False, "error": f"알 수 없는 명령입니다: {command}"}
+
+    def start(self):
+        self.server = ControlServer(self.handle, SENSOR_CONTROL_SOCKET)
+        self.registry.start_all()
+        print(f"센서 수집 데몬 시작 (PID {os.getpid()}) - 온실: {self.registry.ids()}, "
+              f"공유 메모리: {SENSOR_SHM_NAME}, 제어 소켓: {SENSOR_CONTROL_SOCKET}")
+
+    def stop(self):
+        self.registry.stop_all()
+        self.rollup_engine.flush()
+        if self.server:
+            self.server.close()
+        self.writer.close()
+        print("센서 수집 데몬 종료")
+
+
+def main():
+    # 시리얼 포트를 열기 전에 확인 - 실행 중인 데몬의 아두이노 연결을 건드리지 않음
+    pid = running_daemon_pid(SENSOR_SHM_NAME)
+    if pid is not None:
+        print(f"수집 데몬이 이미 실행 중입니다 (PID {pid}) - 종료합니다.")
+        sys.exit(1)
+
+    influx_storage.init_storage()
+    daemon = AcquisitionDaemon(init_sensors())
+    stopped = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopped.set())
+
+    daemon.start()
+    try:
+        stopped.wait()
+    finally:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
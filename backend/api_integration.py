@@ -1,17 +1,16 @@
 """
 스마트 온실 시스템의 프론트엔드와 백엔드 API 연동을 위한 유틸리티 함수들
 """
-import requests
 import json
 import os
 from dotenv import load_dotenv
 import base64
-from PIL import Image
-import io
 from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
 
 # 프롬프트 매니저 import 추가
 from prompt_manager import prompt_manager, get_system_config
+from http_client import http_client
 
 # 환경 변수 로드
 load_dotenv()
@@ -19,28 +18,29 @@ load_dotenv()
 # Gemini API 키
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-def gemini_text_request(prompt: str, temperature: float = None) -> Dict[str, Any]:
+# Gemini API 엔드포인트 (부하 테스트 시 모의 서버로 바꿀 수 있음)
+GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com/v1").rstrip("/")
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Gemini 응답 생성은 오래 걸릴 수 있으므로 읽기 타임아웃을 따로 둠
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "60"))
+http_client.configure_host(urlsplit(GEMINI_API_BASE_URL).hostname, read_timeout=GEMINI_READ_TIMEOUT)
+
+def gemini_endpoint(method: str, api_key: str) -> str:
+    """Gemini 모델 메서드(generateContent 등)의 요청 URL을 만듭니다."""
+    return f"{GEMINI_API_BASE_URL}/models/{GEMINI_MODEL}:{method}?key={api_key}"
+
+def build_text_payload(prompt: str, temperature: float = None) -> Dict[str, Any]:
     """
-    Google Gemini Pro API를 사용하여 텍스트 생성 요청
+    텍스트 생성 요청 본문을 구성합니다. (동기/비동기 클라이언트 공용)
     
     Args:
         prompt: 입력 프롬프트
         temperature: 출력의 다양성 (0.0-1.0), None이면 설정에서 로드
     
     Returns:
-        API 응답 데이터
+        Gemini generateContent 요청 본문
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        print("API 키 오류: GEMINI_API_KEY 환경변수가 설정되지 않았습니다.")
-        raise ValueError("API 키가 설정되지 않았습니다.")
-    
-    print(f"API 키 확인: 길이 {len(api_key)}자, 마지막 4자리: {api_key[-4:]}")
-    
-    # 업데이트된 Gemini API URL (v1 사용)
-    url = f"https://generativelanguage.googleapis.com/v1/models/gemini-2.0-flash:generateContent?key={api_key}"
-    print(f"API 엔드포인트: {url[:70]}...")
-    
     # 시스템 설정에서 기본값 가져오기
     system_config = get_system_config()
     if temperature is None:
@@ -50,7 +50,10 @@ def gemini_text_request(prompt: str, temperature: float = None) -> Dict[str, Any
     # YAML에서 기본 시스템 프롬프트 가져오기
     system_prompt = prompt_manager.get_basic_system_prompt()
     
-    payload = {
+    print(f"API 요청 데이터: 프롬프트 총 길이 {len(system_prompt) + len(prompt)} 문자")
+    print(f"API 요청 구성: temperature={temperature}, maxOutputTokens={max_tokens}")
+    
+    return {
         "contents": [
             {
                 "role": "user",
@@ -64,17 +67,86 @@ def gemini_text_request(prompt: str, temperature: float = None) -> Dict[str, Any
             "maxOutputTokens": max_tokens
         }
     }
+
+def build_image_payload(prompt: str, image_data: bytes, temperature: float = None) -> Dict[str, Any]:
+    """
+    이미지 분석 요청 본문을 구성합니다. (동기/비동기 클라이언트 공용)
+    
+    Args:
+        prompt: 입력 프롬프트
+        image_data: 이미지 바이너리 데이터
+        temperature: 출력의 다양성 (0.0-1.0), None이면 설정에서 로드
+    
+    Returns:
+        Gemini generateContent 요청 본문
+    """
+    # 이미지를 base64로 인코딩
+    image_base64 = base64.b64encode(image_data).decode('utf-8')
+    
+    # 시스템 설정에서 기본값 가져오기
+    system_config = get_system_config()
+    if temperature is None:
+        temperature = system_config.get('model_temperature', 0.7)
+    max_tokens = system_config.get('max_output_tokens', 2048)
+    
+    # YAML에서 이미지 분석용 시스템 프롬프트 가져오기
+    system_prompt = prompt_manager.get_image_system_prompt()
+    
+    print(f"이미지 크기: {len(image_data)} bytes, Base64 크기: {len(image_base64)} chars")
+    print(f"시스템 프롬프트 길이: {len(system_prompt)} 문자")
+    
+    return {
+        "contents": [
+            {
+                "role": "user",
+                "parts": [
+                    {"text": system_prompt + "\n\n" + prompt},
+                    {
+                        "inline_data": {
+                            "mime_type": "image/jpeg",
+                            "data": image_base64
+                        }
+                    }
+                ]
+            }
+        ],
+        "generationConfig": {
+            "temperature": temperature,
+            "maxOutputTokens": max_tokens
+        }
+    }
+
+def gemini_text_request(prompt: str, temperature: float = None) -> Dict[str, Any]:
+    """
+    Google Gemini Pro API를 사용하여 텍스트 생성 요청
+    
+    Args:
+        prompt: 입력 프롬프트
+        temperature: 출력의 다양성 (0.0-1.0), None이면 설정에서 로드
+    
+    Returns:
+        API 응답 데이터
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("API 키 오류: GEMINI_API_KEY 환경변수가 설정되지 않았습니다.")
+        raise ValueError("API 키가 설정되지 않았습니다.")
+    
+    print(f"API 키 확인: 길이 {len(api_key)}자, 마지막 4자리: {api_key[-4:]}")
+    
+    # 업데이트된 Gemini API URL (v1 사용)
+    url = gemini_endpoint("generateContent", api_key)
+    print(f"API 엔드포인트: {url[:70]}...")
+    
+    payload = build_text_payload(prompt, temperature)
     
     headers = {
         "Content-Type": "application/json"
     }
     
-    print(f"API 요청 데이터: 프롬프트 총 길이 {len(system_prompt) + len(prompt)} 문자")
-    print(f"API 요청 구성: temperature={temperature}, maxOutputTokens={max_tokens}")
-    
     try:
         print("Gemini API 요청 전송 중...")
-        response = requests.post(url, headers=headers, json=payload)
+        response = http_client.post(url, headers=headers, json=payload)
         print(f"응답 상태 코드: {response.status_code}, 컨텐츠 타입: {response.headers.get('Content-Type', 'unknown')}")
         
         if response.status_code != 200:
@@ -117,51 +189,17 @@ def gemini_image_request(prompt: str, image_data: bytes, temperature: float = No
         raise ValueError("API 키가 설정되지 않았습니다.")
     
     # 최신 Gemini API URL - gemini-2.0-flash는 멀티모달(텍스트+이미지) 지원
-    url = f"https://generativelanguage.googleapis.com/v1/models/gemini-2.0-flash:generateContent?key={api_key}"
-    
-    # 이미지를 base64로 인코딩
-    image_base64 = base64.b64encode(image_data).decode('utf-8')
-    
-    # 시스템 설정에서 기본값 가져오기
-    system_config = get_system_config()
-    if temperature is None:
-        temperature = system_config.get('model_temperature', 0.7)
-    max_tokens = system_config.get('max_output_tokens', 2048)
+    url = gemini_endpoint("generateContent", api_key)
+    print(f"이미지 분석 API 요청: {url[:70]}...")
     
-    # YAML에서 이미지 분석용 시스템 프롬프트 가져오기
-    system_prompt = prompt_manager.get_image_system_prompt()
-    
-    payload = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {"text": system_prompt + "\n\n" + prompt},
-                    {
-                        "inline_data": {
-                            "mime_type": "image/jpeg",
-                            "data": image_base64
-                        }
-                    }
-                ]
-            }
-        ],
-        "generationConfig": {
-            "temperature": temperature,
-            "maxOutputTokens": max_tokens
-        }
-    }
+    payload = build_image_payload(prompt, image_data, temperature)
     
     headers = {
         "Content-Type": "application/json"
     }
     
-    print(f"이미지 분석 API 요청: {url[:70]}...")
-    print(f"이미지 크기: {len(image_data)} bytes, Base64 크기: {len(image_base64)} chars")
-    print(f"시스템 프롬프트 길이: {len(system_prompt)} 문자")
-    
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = http_client.post(url, headers=headers, json=payload)
         print(f"이미지 API 응답 코드: {response.status_code}")
         
         if response.status_code != 200:
@@ -173,6 +211,54 @@ def gemini_image_request(prompt: str, image_data: bytes, temperature: float = No
         print(f"이미지 API 오류: {str(e)}")
         raise
 
+def gemini_text_stream(prompt: str, temperature: float = None):
+    """
+    Gemini streamGenerateContent(SSE)로 텍스트를 생성하며 조각 단위로 반환합니다.
+    
+    Args:
+        prompt: 입력 프롬프트
+        temperature: 출력의 다양성 (0.0-1.0), None이면 설정에서 로드
+    
+    Yields:
+        str: 생성된 텍스트 조각
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("API 키가 설정되지 않았습니다.")
+    
+    url = gemini_endpoint("streamGenerateContent", api_key) + "&alt=sse"
+    payload = build_text_payload(prompt, temperature)
+    
+    response = http_client.post(url, headers={"Content-Type": "application/json"}, json=payload, stream=True)
+    try:
+        if response.status_code != 200:
+            print(f"스트리밍 API 오류 응답: {response.status_code}, {response.text[:200]}")
+            response.raise_for_status()
+        
+        # 바이트 단위로 줄을 나눈 뒤 UTF-8로 디코딩 (text/event-stream은 charset이 없어 기본값이 Latin-1)
+        for line in response.iter_lines():
+            text = parse_stream_line(line.decode("utf-8"))
+            if text:
+                yield text
+    finally:
+        response.close()
+
+def parse_stream_line(line: str) -> Optional[str]:
+    """
+    streamGenerateContent SSE 응답의 한 줄에서 텍스트를 꺼냅니다.
+    
+    Returns:
+        텍스트 조각 (data 줄이 아니거나 텍스트가 없으면 None)
+    """
+    if not line or not line.startswith("data:"):
+        return None
+    try:
+        chunk = json.loads(line[5:].strip())
+        parts = chunk["candidates"][0]["content"]["parts"]
+    except (ValueError, KeyError, IndexError):
+        return None
+    return "".join(part.get("text", "") for part in parts) or None
+
 def extract_text_from_gemini_response(response: Dict[str, Any]) -> str:
     """
     Gemini API 응답에서 텍스트를 추출합니다.
@@ -1,29 +1,23 @@
-from flask import Flask, request, jsonify
+"""
+스마트 온실 백엔드 Flask 앱
+create_app()으로 앱을 만들고, 하드웨어 탐색/InfluxDB/유지보수 같은 무거운 초기화는 startup 작업으로
+백그라운드에서 진행합니다. 이 모듈을 임포트하는 것만으로는 아무 것도 초기화하지 않으며,
+`app` 속성(gunicorn app:app, python app.py)에 처음 접근할 때 create_app()이 호출됩니다.
+"""
+from flask import Flask, Blueprint, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import os
+import sys
 from dotenv import load_dotenv
 import json
-import time
-from datetime import datetime
-import io
-from PIL import Image
 import uuid
-from collections import defaultdict
-import random
-import requests
-import threading
-import asyncio
-import re
-
-# 커스텀 모듈 임포트
-from sensors import simulator
-from api_integration import gemini_text_request, gemini_image_request, extract_text_from_gemini_response
-import influx_storage  # 시계열 DB 모듈 추가
-import weather_api  # 날씨 API 모듈 추가
-# from voice_chat_server import GeminiVoiceServer  # Voice chat 서버 제거
+import atexit
+import functools
 
-# 프롬프트 매니저 추가
-from prompt_manager import get_chatbot_prompt, get_image_prompt, get_error_message, prompt_manager
+from sensor_stream import format_sse
+from rollups import RollupEngine, parse_duration, parse_time_bound
+from startup import StartupTasks
+# from voice_chat_server import GeminiVoiceServer  # Voice chat 서버 제거
 
 # 환경 변수 로드
 load_dotenv()
@@ -33,104 +27,392 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     print("경고: GEMINI_API_KEY가 설정되지 않았습니다. 기본 응답을 사용합니다.")
 
-app = Flask(__name__)
-CORS(app)  # 모든 오리진에서의 CORS 요청 허용
+api = Blueprint("api", __name__)
+socketio = None
+
+# /api/history 조회 제한
+HISTORY_METRICS = ["temperature", "humidity", "power", "soil", "co2", "light"]
+MAX_HISTORY_RANGE = 30 * 24 * 3600
+MAX_HISTORY_POINTS = 1000
+
+STREAM_KEEPALIVE = 15  # SSE keepalive 주기 (초)
+
+# 백그라운드 초기화 작업이 채우는 구성 요소 (준비되기 전에는 requires()로 보호한 경로가 503 응답)
+influx_storage = None
+greenhouses = None
+sensor_streams = {}   # 온실 ID -> SnapshotBroadcaster
+sensor_stream = None  # 기본 온실 스트림
+rollup_engine = None
+automation = None     # 서버 측 자동화 엔진 (공유 모드에서는 수집 데몬에 요청하는 RemoteAutomation)
+maintenance = None
+stream_clients = {}  # Socket.IO sid -> (온실 ID, StreamClient)
+
+startup = StartupTasks()
+
+def _init_storage():
+    """InfluxDB 클라이언트, 배치 쓰기, 스풀, 대화/이력 캐시"""
+    global influx_storage
+    import influx_storage as storage_module
+    storage_module.init_storage()
+    influx_storage = storage_module
+
+def _init_sensors():
+    """온실별 센서 매니저 (아두이노 포트 탐색 포함), 샘플러, 롤업, 자동화, 실시간 스트림"""
+    global greenhouses, sensor_streams, sensor_stream, rollup_engine, automation
+    import sensors
+    from sensor_stream import SnapshotBroadcaster
+    from automation import AutomationEngine, RemoteAutomation
+    
+    registry = sensors.init_sensors()
+    USING_ACQUISITION_DAEMON = sensors.USING_ACQUISITION_DAEMON
+    
+    # 요청과 무관하게 온실별 샘플러 스레드가 일정 주기로 센서를 샘플링 (SENSOR_SAMPLE_INTERVAL)
+    registry.start_all()
+    
+    # 샘플 틱마다 온실별 1m/15m/1h 롤업 누적 (/api/history는 롤업 티어를 조회)
+    # 수집 데몬을 사용하면 롤업도 데몬이 한 번만 기록
+    engine = RollupEngine(influx_storage.save_rollup_buckets if influx_storage else lambda buckets: False)
+    if not USING_ACQUISITION_DAEMON:
+        # 재시작 전 종료 시 기록한 미완성 구간을 이어서 누적 (같은 구간을 덮어써 이전 샘플을 잃지 않도록)
+        if influx_storage:
+            engine.seed(influx_storage.get_open_rollup_buckets())
+        for _, manager in registry.items():
+            manager.subscribe(engine.on_sample, samples_only=True)
+    atexit.register(engine.flush)
+    
+    # 샘플 틱마다 자동화 규칙 평가 (장치를 소유한 프로세스 하나만 평가해야 명령이 중복되지 않음)
+    rules = RemoteAutomation() if USING_ACQUISITION_DAEMON else AutomationEngine(registry).attach()
+    
+    # 실시간 센서 스트림 (폴링 대신 새 스냅샷의 변경분만 푸시, 온실별 팬아웃)
+    streams = {greenhouse_id: SnapshotBroadcaster(manager) for greenhouse_id, manager in registry.items()}
+    for broadcaster in streams.values():
+        broadcaster.start()
+    
+    rollup_engine = engine
+    automation = rules
+    sensor_streams = streams
+    sensor_stream = streams[registry.default_id]
+    greenhouses = registry
+
+def _init_maintenance():
+    """요청 경로와 분리된 유지보수 작업 (유휴 대화 세션 정리, 측정값별 보존 기간 적용)"""
+    global maintenance
+    from maintenance import (MaintenanceScheduler, make_retention_task, parse_retention, MAINTENANCE_RETENTION,
+                             MAINTENANCE_SESSION_INTERVAL, MAINTENANCE_RETENTION_INTERVAL)
+    scheduler = MaintenanceScheduler()
+    scheduler.add_task("session_eviction",
+                       lambda: {"sessions": influx_storage.cleanup_expired_sessions()},
+                       MAINTENANCE_SESSION_INTERVAL)
+    scheduler.add_task("retention",
+                       make_retention_task(influx_storage.influx_manager, parse_retention(MAINTENANCE_RETENTION),
+                                           MAINTENANCE_RETENTION_INTERVAL),
+                       MAINTENANCE_RETENTION_INTERVAL, initial_delay=60)
+    scheduler.start()
+    atexit.register(scheduler.stop)
+    maintenance = scheduler
+
+startup.add("storage", _init_storage)
+startup.add("sensors", _init_sensors)
+startup.add("maintenance", _init_maintenance, after=("storage",))
 
-# 인메모리 세션 관리 (InfluxDB 대안)
-sessions = {}
+def _close_http_client():
+    # 외부 API 클라이언트는 처음 사용할 때 임포트되므로 임포트된 경우에만 정리
+    http_client_module = sys.modules.get("http_client")
+    if http_client_module:
+        http_client_module.http_client.close()
+
+atexit.register(_close_http_client)
+
+def requires(*components):
+    """구성 요소가 준비되기 전에는 503과 초기화 상태를 응답하는 경로 데코레이터"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            pending = [name for name in components if not startup.is_ready(name)]
+            if pending:
+                response = jsonify({"error": "서버 초기화 중입니다.", "pending": pending, "startup": startup.get_status()})
+                return response, 503, {"Retry-After": "1"}
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def create_app(init=True, enable_socketio=True):
+    """
+    Flask 앱을 만듭니다.
+    
+    Args:
+        init (bool): 백그라운드 초기화(하드웨어 탐색, InfluxDB, 유지보수)를 시작할지 여부
+        enable_socketio (bool): Socket.IO /stream 네임스페이스 제공 여부 (ASGI 모드에서는 사용하지 않음)
+    """
+    global socketio
+    flask_app = Flask(__name__)
+    CORS(flask_app)  # 모든 오리진에서의 CORS 요청 허용
+    flask_app.register_blueprint(api)
+    
+    if enable_socketio:
+        # Socket.IO는 클라이언트 라이브러리까지 함께 임포트해 무거우므로 사용할 때만 가져옴
+        from flask_socketio import SocketIO
+        if socketio is None:
+            socketio = SocketIO(cors_allowed_origins="*", async_mode='threading')
+            _register_stream_events(socketio)
+        socketio.init_app(flask_app)
+    
+    if init:
+        startup.start()
+    return flask_app
+
+def __getattr__(name):
+    # gunicorn app:app, from app import app - 처음 접근할 때만 앱을 만듦 (임포트 시 부작용 없음)
+    if name == "app":
+        flask_app = globals()["app"] = create_app()
+        return flask_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 세션 ID 생성 함수
 def generate_session_id():
     return str(uuid.uuid4())
 
-# 세션 관리 (대화 기록 저장)
-# -> InfluxDB 모듈로 대체
-SESSION_EXPIRY = 3600  # 세션 만료 시간 (1시간)
-
-# 기본 응답 및 오류 메시지
-DEFAULT_RESPONSES = {
-    "chat_error": get_error_message("chat_error"),
-    "image_error": get_error_message("image_error"),
-    "api_key_missing": get_error_message("api_key_missing"),
-    "network_error": get_error_message("network_error"),
-    "timeout_error": get_error_message("timeout_error")
-}
-
-# 만료된 세션 정리 함수
-def cleanup_expired_sessions():
-    influx_storage.cleanup_expired_sessions()
-
-# 주기적으로 만료된 세션 정리 (10% 확률로 정리 실행)
-@app.before_request
-def before_request():
-    if random.random() < 0.1:  # 10% 확률로 정리 실행 (너무 자주 하지 않도록)
-        cleanup_expired_sessions()
-
-@app.route('/api/status', methods=['GET'])
-def get_status():
-    """현재 온실의 상태 데이터를 반환합니다."""
-    # 센서 값 업데이트
-    current_values = simulator.update_sensor_values()
+class _DefaultResponses(dict):
+    """기본 응답 및 오류 메시지 (프롬프트 설정 파일은 처음 필요할 때 읽음)"""
     
-    return jsonify({
-        "temperature": current_values["temperature"],
-        "humidity": current_values["humidity"],
-        "power": current_values["power"],
-        "soil": current_values["soil"],
-        "co2": current_values["co2"],
-        "light": current_values["light"],
-        "devices": simulator.device_status,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def __missing__(self, key):
+        from prompt_manager import get_error_message
+        message = self[key] = get_error_message(key)
+        return message
+
+DEFAULT_RESPONSES = _DefaultResponses()
+
+@api.route('/api/ready', methods=['GET'])
+def get_ready():
+    """구성 요소별 초기화 상태를 반환합니다. (모두 준비되면 200, 아니면 503 - 로드밸런서 준비 확인용)"""
+    status = startup.get_status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+def _get_greenhouse(greenhouse_id):
+    """온실 ID로 센서 매니저를 찾습니다. ID가 없으면 기본 온실, 등록되지 않은 온실이면 None."""
+    try:
+        return greenhouses.get(greenhouse_id)
+    except KeyError:
+        return None
+
+def _unknown_greenhouse(greenhouse_id):
+    return jsonify({"error": f"등록되지 않은 온실입니다: {greenhouse_id}"}), 404
+
+@api.route('/api/greenhouses', methods=['GET'])
+@requires("sensors")
+def list_greenhouses():
+    """이 서버가 담당하는 온실 목록과 온실별 연결 상태를 반환합니다."""
+    return jsonify(greenhouses.get_status())
+
+@api.route('/api/status', methods=['GET'])
+@api.route('/api/greenhouses/<greenhouse_id>/status', methods=['GET'])
+@requires("sensors")
+def get_status(greenhouse_id=None):
+    """현재 온실의 상태 데이터를 반환합니다.
+    
+    센서 샘플링은 백그라운드 샘플러가 담당하므로 최신 스냅샷만 직렬화합니다.
+    """
+    manager = _get_greenhouse(greenhouse_id)
+    if manager is None:
+        return _unknown_greenhouse(greenhouse_id)
+    return jsonify(dict(manager.get_snapshot()))
+
+def _parse_stream_interval(value):
+    """구독자가 요청한 전송 간격(초)을 파싱합니다. 잘못된 값이면 1초."""
+    try:
+        return float(value) if value is not None else 1.0
+    except (TypeError, ValueError):
+        return 1.0
+
+@api.route('/api/stream', methods=['GET'])
+@api.route('/api/greenhouses/<greenhouse_id>/stream', methods=['GET'])
+@requires("sensors")
+def stream_status(greenhouse_id=None):
+    """센서 스냅샷을 Server-Sent Events로 푸시합니다.
+    
+    첫 이벤트는 전체 스냅샷(snapshot), 이후에는 바뀐 값만 담은 delta 이벤트입니다.
+    `interval` 매개변수로 구독자별 최소 전송 간격(초)을 지정할 수 있습니다.
+    """
+    if _get_greenhouse(greenhouse_id) is None:
+        return _unknown_greenhouse(greenhouse_id)
+    broadcaster = sensor_streams[greenhouse_id or greenhouses.default_id]
+    client = broadcaster.register(_parse_stream_interval(request.args.get('interval')))
+    
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = client.next_event(timeout=STREAM_KEEPALIVE)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            broadcaster.unregister(client)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
     })
 
-@app.route('/api/history', methods=['GET'])
-def get_history():
-    """측정 항목의 기록 데이터를 반환합니다."""
+@api.route('/api/stream/status', methods=['GET'])
+@requires("sensors")
+def get_stream_status():
+    """실시간 스트림 구독자 수와 전송 통계를 반환합니다. (기본 온실, 온실별 통계는 greenhouses)"""
+    stats = sensor_stream.get_stats()
+    stats["greenhouses"] = {greenhouse_id: broadcaster.get_stats() for greenhouse_id, broadcaster in sensor_streams.items()}
+    return jsonify(stats)
+
+def _register_stream_events(socketio):
+    """Socket.IO /stream 네임스페이스 이벤트를 등록합니다."""
+    
+    @socketio.on('connect', namespace='/stream')
+    def stream_connect(auth=None):
+        """Socket.IO 구독자 등록 - 접속 시 전체 스냅샷, 이후 변경분을 'snapshot'/'delta' 이벤트로 전송
+    
+        auth 또는 쿼리의 `greenhouse`로 구독할 온실을 지정합니다. (없으면 기본 온실)
+        """
+        sid = request.sid
+        interval = (auth or {}).get('interval', request.args.get('interval'))
+        greenhouse_id = (auth or {}).get('greenhouse', request.args.get('greenhouse')) or greenhouses.default_id
+        if greenhouse_id not in sensor_streams:
+            return False  # 등록되지 않은 온실이면 연결 거부
+    
+        def send(event):
+            socketio.emit(event["type"], event["data"], to=sid, namespace='/stream')
+    
+        client = sensor_streams[greenhouse_id].register(_parse_stream_interval(interval), send_fn=send)
+        stream_clients[sid] = (greenhouse_id, client)
+
+    @socketio.on('disconnect', namespace='/stream')
+    def stream_disconnect():
+        entry = stream_clients.pop(request.sid, None)
+        if entry:
+            greenhouse_id, client = entry
+            sensor_streams[greenhouse_id].unregister(client)
+
+@api.route('/api/history', methods=['GET'])
+@api.route('/api/greenhouses/<greenhouse_id>/history', methods=['GET'])
+@requires("sensors")
+def get_history(greenhouse_id=None):
+    """측정 항목의 기록 데이터를 반환합니다.
+    
+    매개변수:
+        metric: 센서 항목 (기본 temperature)
+        range: 조회 범위 (예: 24h, 7d, 30d, 기본 24h)
+        every: 집계 간격 (예: 30m, 1h, 기본 30m)
+        metrics: 쉼표로 구분한 여러 항목. 지정하면 열 지향 형식으로 한 번에 반환 (start, stop, every 사용)
+    """
+    manager = _get_greenhouse(greenhouse_id)
+    if manager is None:
+        return _unknown_greenhouse(greenhouse_id)
+    greenhouse_id = manager.greenhouse_id
+    
+    if 'metrics' in request.args:
+        return get_multi_metric_history(manager)
+    
     metric = request.args.get('metric', 'temperature')
-    if metric not in ["temperature", "humidity", "power", "soil", "co2", "light"]:
+    if metric not in HISTORY_METRICS:
         return jsonify({"error": "유효하지 않은 측정 항목입니다."}), 400
     
-    # InfluxDB에서 데이터 가져오기 시도
     try:
-        from influx_storage import influx_manager
-        if influx_manager.query_api:
-            # InfluxDB에서 최근 24시간 **하드웨어 데이터만** 조회
-            query = f'''
-            from(bucket: "smart_greenhouse")
-                |> range(start: -24h)
-                |> filter(fn: (r) => r._measurement == "sensor_data")
-                |> filter(fn: (r) => r.metric == "{metric}")
-                |> filter(fn: (r) => r._field == "value")
-                |> filter(fn: (r) => r.mode == "hardware")
-                |> aggregateWindow(every: 30m, fn: mean, createEmpty: false)
-                |> sort(columns: ["_time"])
-            '''
-            
-            result = influx_manager.query_api.query(org="iotctd", query=query)
-            
-            history = []
-            for table in result:
-                for record in table.records:
-                    history.append({
-                        "timestamp": record.get_time().strftime("%Y-%m-%d %H:%M:%S"),
-                        "value": round(record.get_value(), 2)
-                    })
-            
-            # InfluxDB에 데이터가 있으면 반환
-            if history:
-                print(f"[get_history] {metric} 하드웨어 데이터 반환: {len(history)}개")
-                return jsonify(history)
-            else:
-                print(f"[get_history] {metric} 하드웨어 데이터 없음, 시뮬레이터 데이터 사용")
+        range_seconds = parse_duration(request.args.get('range', '24h'))
+        every_seconds = parse_duration(request.args.get('every', '30m'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if range_seconds > MAX_HISTORY_RANGE:
+        return jsonify({"error": "조회 범위가 너무 깁니다."}), 400
+    # 응답 포인트 수 제한 - 넘으면 집계 간격을 넓힘
+    if range_seconds / every_seconds > MAX_HISTORY_POINTS:
+        every_seconds = -(-range_seconds // MAX_HISTORY_POINTS)
+    
+    # InfluxDB에서 **하드웨어 데이터만** 조회 (롤업 티어 우선, 저장소 초기화 전이면 건너뜀)
+    try:
+        if not startup.is_ready("storage"):
+            raise RuntimeError("InfluxDB 저장소 초기화 중")
+        history = influx_storage.get_cached_metric_history(metric, range_seconds, every_seconds, greenhouse=greenhouse_id)
+        
+        # InfluxDB에 데이터가 있으면 반환
+        if history:
+            print(f"[get_history] {greenhouse_id}/{metric} 하드웨어 데이터 반환: {len(history)}개")
+            return jsonify(history)
+        else:
+            print(f"[get_history] {greenhouse_id}/{metric} 하드웨어 데이터 없음, 프로세스 내 센서 이력 사용")
     except Exception as e:
         print(f"InfluxDB 히스토리 조회 오류: {e}")
     
-    # InfluxDB 실패 시 시뮬레이터 데이터 사용
-    return jsonify(simulator.get_history(metric))
+    # InfluxDB 실패 시 프로세스 내 센서 이력 사용
+    return jsonify(manager.get_history(metric, range_seconds, every_seconds))
+
+def get_multi_metric_history(manager):
+    """여러 항목의 이력을 하나의 쿼리로 조회해 열 지향 형식으로 반환합니다.
+    
+    매개변수:
+        metrics: 쉼표로 구분한 센서 항목 (예: temperature,humidity)
+        start: 시작 시각 (예: -24h 또는 ISO 8601, 기본 -24h)
+        stop: 종료 시각 (예: now 또는 ISO 8601, 기본 now)
+        every: 집계 간격 (기본 30m)
+    
+    응답: {"timestamps": [epoch 초...], "series": {항목: [값...]}, "every": 초, "source": 티어}
+    """
+    metrics = [m.strip() for m in request.args.get('metrics', '').split(',') if m.strip()]
+    metrics = list(dict.fromkeys(metrics))
+    if not metrics or any(m not in HISTORY_METRICS for m in metrics):
+        return jsonify({"error": "유효하지 않은 측정 항목입니다."}), 400
+    
+    try:
+        stop = parse_time_bound(request.args.get('stop', 'now'))
+        start = parse_time_bound(request.args.get('start', '-24h'), now=stop)
+        every_seconds = parse_duration(request.args.get('every', '30m'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    range_seconds = (stop - start).total_seconds()
+    if range_seconds <= 0:
+        return jsonify({"error": "start는 stop보다 이전이어야 합니다."}), 400
+    if range_seconds > MAX_HISTORY_RANGE:
+        return jsonify({"error": "조회 범위가 너무 깁니다."}), 400
+    if range_seconds / every_seconds > MAX_HISTORY_POINTS:
+        every_seconds = int(-(-range_seconds // MAX_HISTORY_POINTS))
+    
+    try:
+        if not startup.is_ready("storage"):
+            raise RuntimeError("InfluxDB 저장소 초기화 중")
+        history = influx_storage.get_multi_metric_history(metrics, start, stop, every_seconds, manager.greenhouse_id)
+        if history["timestamps"]:
+            history["every"] = every_seconds
+            return jsonify(history)
+        print(f"[get_history] {metrics} 하드웨어 데이터 없음, 프로세스 내 센서 이력 사용")
+    except Exception as e:
+        print(f"InfluxDB 다중 항목 히스토리 조회 오류: {e}")
+    
+    # InfluxDB 실패 시 프로세스 내 센서 이력을 같은 형식으로 집계
+    history = manager.get_history_columns(metrics, range_seconds, every_seconds, stop=stop.timestamp())
+    return jsonify({**history, "every": every_seconds, "source": "memory"})
+
+def apply_device_command(manager, device, status):
+    """
+    사용자 장치 명령(/api/control, 채팅 액션 태그)을 적용합니다.
+    성공하면 그 장치는 자동화 규칙이 바로 되돌리지 않도록 잠시 자동화에서 제외합니다.
+    
+    Raises:
+        ConnectionError: 수집 데몬에 연결할 수 없는 경우 (공유 모드)
+    """
+    success = manager.update_device(device, status)
+    if success:
+        automation.hold(manager.greenhouse_id, device)
+    return success
 
-@app.route('/api/control', methods=['POST'])
-def control_device():
+@api.route('/api/control', methods=['POST'])
+@api.route('/api/greenhouses/<greenhouse_id>/control', methods=['POST'])
+@requires("sensors")
+def control_device(greenhouse_id=None):
     """장치 제어 상태를 업데이트합니다."""
+    manager = _get_greenhouse(greenhouse_id)
+    if manager is None:
+        return _unknown_greenhouse(greenhouse_id)
+    
     data = request.json
     if not data or "device" not in data or "status" not in data:
         return jsonify({"error": "잘못된 요청 형식입니다."}), 400
@@ -138,34 +420,79 @@ def control_device():
     device = data["device"]
     status = data["status"]
     
-    success = simulator.update_device(device, status)
+    try:
+        success = apply_device_command(manager, device, status)
+    except ConnectionError as e:
+        return jsonify({"error": str(e)}), 503
     if not success:
         return jsonify({"error": f"유효하지 않은 장치입니다: {device}"}), 400
         
-    return jsonify({"success": True, "devices": simulator.device_status})
+    return jsonify({"success": True, "devices": manager.device_status})
 
-@app.route('/api/arduino/status', methods=['GET'])
-def get_arduino_status():
-    """아두이노 연결 상태를 확인합니다."""
-    status = simulator.get_arduino_status()
+@api.route('/api/automation', methods=['GET', 'PUT'])
+@api.route('/api/greenhouses/<greenhouse_id>/automation', methods=['GET', 'PUT'])
+@requires("sensors")
+def automation_settings(greenhouse_id=None):
+    """서버 측 자동화 설정(자동 모드, 규칙)과 규칙별 발동 상태를 조회하거나 변경합니다.
+    
+    PUT 본문: {"enabled": true} 자동 모드, {"rules": [...]} 온실 전용 규칙 교체, {"rules": null} 공통 규칙으로 복원
+    """
+    manager = _get_greenhouse(greenhouse_id)
+    if manager is None:
+        return _unknown_greenhouse(greenhouse_id)
+    greenhouse_id = manager.greenhouse_id
+    
+    try:
+        if request.method == 'GET':
+            return jsonify(automation.get_status(greenhouse_id))
+        
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get("enabled", False), bool):
+            return jsonify({"error": "잘못된 요청 형식입니다."}), 400
+        rules = data.get("rules")
+        status = automation.update(greenhouse_id, enabled=data.get("enabled"), rules=rules,
+                                   reset_rules="rules" in data and rules is None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ConnectionError as e:
+        return jsonify({"error": str(e)}), 503
     return jsonify(status)
 
-@app.route('/api/arduino/reconnect', methods=['POST'])
-def reconnect_arduino():
-    """아두이노 재연결을 시도합니다."""
-    success = simulator.reconnect_arduino()
-    status = simulator.get_arduino_status()
+@api.route('/api/arduino/status', methods=['GET'])
+@api.route('/api/greenhouses/<greenhouse_id>/arduino/status', methods=['GET'])
+@requires("sensors")
+def get_arduino_status(greenhouse_id=None):
+    """아두이노 연결 상태를 확인합니다."""
+    manager = _get_greenhouse(greenhouse_id)
+    if manager is None:
+        return _unknown_greenhouse(greenhouse_id)
+    return jsonify(manager.get_arduino_status())
+
+@api.route('/api/arduino/reconnect', methods=['POST'])
+@api.route('/api/greenhouses/<greenhouse_id>/arduino/reconnect', methods=['POST'])
+@requires("sensors")
+def reconnect_arduino(greenhouse_id=None):
+    """아두이노 재연결을 시도합니다. (해당 온실의 시리얼 연결만 다시 연결)"""
+    manager = _get_greenhouse(greenhouse_id)
+    if manager is None:
+        return _unknown_greenhouse(greenhouse_id)
+    try:
+        success = manager.reconnect_arduino()
+    except ConnectionError as e:
+        return jsonify({"error": str(e)}), 503
+    status = manager.get_arduino_status()
     return jsonify({
         "success": success,
         "message": "아두이노 재연결 성공" if success else "아두이노 재연결 실패",
         "status": status
     })
 
-@app.route('/api/influxdb/status', methods=['GET'])
+@api.route('/api/influxdb/status', methods=['GET'])
+@requires("storage")
 def get_influxdb_status():
     """InfluxDB 연결 상태를 확인합니다."""
     try:
-        from influx_storage import influx_manager
+        influx_manager = influx_storage.influx_manager
         status = influx_manager.get_status() if hasattr(influx_manager, 'get_status') else {
             "connected": influx_manager.client is not None,
             "url": "http://localhost:8086",
@@ -182,9 +509,31 @@ def get_influxdb_status():
             "bucket": "smart_greenhouse"
         })
 
-@app.route('/api/chat', methods=['POST'])
+def _prepare_chat_prompt(session_id, user_message, user_location):
+    """사용자 메시지를 저장하고 최근 대화 기록을 포함한 챗봇 프롬프트를 만듭니다."""
+    import chat_pipeline
+
+    # 사용자 메시지 저장 (대화 캐시 + InfluxDB 배치 큐)
+    influx_storage.append_chat_message(session_id, {"role": "user", "content": user_message})
+    
+    # 이전 대화 기록 가져오기 (최근 5개, 대화 캐시에서)
+    try:
+        conversation_text = chat_pipeline.format_conversation(
+            influx_storage.get_recent_chat(session_id, limit=5))
+    except Exception as e:
+        print(f"대화 기록 로드 오류: {str(e)}")
+        conversation_text = ""
+    
+    # PromptManager를 사용하여 고급 프롬프트 구성
+    return chat_pipeline.build_chat_prompt(user_message, user_location, conversation_text)
+
+@api.route('/api/chat', methods=['POST'])
+@requires("storage", "sensors")
 def chat():
     """사용자와의 채팅을 처리하고 Gemini API를 사용하여 응답을 생성합니다."""
+    import chat_pipeline
+    from api_integration import gemini_text_request, extract_text_from_gemini_response
+
     data = request.get_json()
     actual_user_message = data.get('message', '')
     session_id = data.get('sessionId', 'default')
@@ -202,40 +551,8 @@ def chat():
         print("API 키 없음: GEMINI_API_KEY 환경변수가 설정되지 않았습니다.")
         return jsonify({"response": DEFAULT_RESPONSES["api_key_missing"], "session_id": session_id}), 200
     
-    # 사용자 메시지 저장 (InfluxDB)
-    user_msg = {"role": "user", "content": actual_user_message}
-    influx_storage.save_chat_message(session_id, user_msg)
-    
-    # 현재 시간
-    current_time = datetime.now().strftime("%Y년 %m월 %d일 %H시 %M분")
-    
-    # 이전 대화 기록 가져오기 (최근 5개)
-    try:
-        conversation_history = influx_storage.get_chat_history(session_id, limit=5)
-        conversation_text = ""
-        for msg in conversation_history[:-1]:  # 방금 저장한 메시지 제외
-            role_name = "사용자" if msg["role"] == "user" else "봇"
-            conversation_text += f"{role_name}: {msg['content']}\n"
-    except Exception as e:
-        print(f"대화 기록 로드 오류: {str(e)}")
-        conversation_text = ""
-    
-    # 모든 메시지를 Gemini API로 전달 (AI가 판단)
-    print("모든 메시지를 Gemini API로 전달")
-    
-    # PromptManager를 사용하여 고급 프롬프트 구성
-    prompt = get_chatbot_prompt(
-        temperature=simulator.current_values['temperature'],
-        humidity=simulator.current_values['humidity'],
-        soil=simulator.current_values['soil'],
-        power=simulator.current_values['power'],
-        co2=simulator.current_values['co2'],
-        device_status=simulator.device_status,
-        user_location=user_location,
-        current_time=current_time,
-        conversation_text=conversation_text,
-        user_message=actual_user_message
-    )
+    # 사용자 메시지 저장 후 대화 기록을 포함한 프롬프트 구성
+    prompt = _prepare_chat_prompt(session_id, actual_user_message, user_location)
     
     print("Gemini API 호출 준비...")
     
@@ -276,78 +593,18 @@ def chat():
         print(f"응답 길이: {len(text_response)} 문자")
         print(f"응답 내용 미리보기: {text_response[:100]}...")
         
-        # WEATHER_REQUEST 태그 확인 및 처리
-        if "[WEATHER_REQUEST]" in text_response:
-            try:
-                print(f"날씨 정보 요청 태그 감지: {actual_user_message}")
-                weather_data = weather_api.get_current_weather(user_location)
-                
-                if weather_data["success"]:
-                    weather_message = weather_api.format_current_weather_message(weather_data)
-                    # 기존 응답에서 태그 제거하고 날씨 정보 추가
-                    final_response = text_response.replace("[WEATHER_REQUEST]", "").strip()
-                    final_response += f"\n\n{weather_message}"
-                    text_response = final_response
-                    print(f"날씨 정보 추가 완료")
-                else:
-                    # 날씨 정보 가져오기 실패시 태그만 제거
-                    text_response = text_response.replace("[WEATHER_REQUEST]", "").strip()
-                    print(f"날씨 정보 가져오기 실패: {weather_data.get('error', '알 수 없는 오류')}")
-            except Exception as weather_error:
-                print(f"날씨 정보 처리 오류: {str(weather_error)}")
-                # 오류 시 태그만 제거
-                text_response = text_response.replace("[WEATHER_REQUEST]", "").strip()
-        
-        # HISTORY_REQUEST 태그 확인 및 처리
-        history_pattern = r'\[HISTORY_REQUEST:([^:]+):([^]]+)\]'
-        history_matches = re.findall(history_pattern, text_response)
+        # WEATHER_REQUEST, HISTORY_REQUEST 태그를 조회 결과로 교체
+        text_response = chat_pipeline.resolve_tags(text_response, user_location)
         
-        if history_matches:
-            try:
-                print(f"과거 데이터 요청 태그 감지: {len(history_matches)}개")
-                
-                for timestamp_str, metric in history_matches:
-                    print(f"요청된 과거 데이터: {timestamp_str} - {metric}")
-                    
-                    # 타임스탬프 파싱
-                    try:
-                        target_time = datetime.strptime(timestamp_str, "%Y-%m-%d_%H:%M:%S")
-                        
-                        # InfluxDB에서 과거 데이터 조회
-                        historical_data = influx_storage.get_historical_sensor_data(
-                            target_time=target_time,
-                            metric=metric,
-                            tolerance_minutes=30
-                        )
-                        
-                        # 태그를 결과로 교체
-                        tag_to_replace = f"[HISTORY_REQUEST:{timestamp_str}:{metric}]"
-                        
-                        if historical_data['success']:
-                            replacement_text = historical_data['message']
-                            print(f"과거 데이터 조회 성공: {replacement_text}")
-                        else:
-                            replacement_text = historical_data['message']
-                            print(f"과거 데이터 조회 실패: {replacement_text}")
-                        
-                        text_response = text_response.replace(tag_to_replace, replacement_text)
-                        
-                    except ValueError as parse_error:
-                        print(f"시간 파싱 오류: {timestamp_str} - {str(parse_error)}")
-                        tag_to_replace = f"[HISTORY_REQUEST:{timestamp_str}:{metric}]"
-                        error_message = f"시간 형식을 인식할 수 없습니다: {timestamp_str}"
-                        text_response = text_response.replace(tag_to_replace, error_message)
-                        
-            except Exception as history_error:
-                print(f"과거 데이터 처리 오류: {str(history_error)}")
-                # 오류 시 모든 HISTORY_REQUEST 태그 제거
-                text_response = re.sub(history_pattern, "데이터 조회 중 오류가 발생했습니다.", text_response)
+        # ACTION 태그는 서버에서 바로 장치에 적용하고 응답에서 제거 (실행 결과와 장치 상태를 함께 응답)
+        actions = chat_pipeline.ActionRunner(greenhouses.default, apply_device_command)
+        text_response = actions.run_all(text_response)
         
         # 봇 응답 저장 (InfluxDB)
-        bot_msg = {"role": "bot", "content": text_response}
-        influx_storage.save_chat_message(session_id, bot_msg)
+        bot_msg = {"role": "bot", "content": actions.history_text(text_response)}
+        influx_storage.append_chat_message(session_id, bot_msg)
         
-        return jsonify({"response": text_response, "session_id": session_id})
+        return jsonify({"response": text_response, "session_id": session_id, **actions.result()})
         
     except Exception as gemini_error:
         import traceback
@@ -357,9 +614,55 @@ def chat():
         # 모든 로컬 응답 제거하고 오류 메시지만 반환
         return jsonify({"response": DEFAULT_RESPONSES["chat_error"], "session_id": session_id}), 200
 
-@app.route('/api/analyze-image', methods=['POST'])
+@api.route('/api/chat/stream', methods=['POST'])
+@requires("storage", "sensors")
+def chat_stream():
+    """
+    /api/chat의 스트리밍 버전 - Gemini 생성 조각을 SSE로 바로 전달합니다.
+    이벤트: chunk {"text"} (여러 번) → done {"response", "session_id", "actions", "devices"} 또는 error {"response", "session_id"}
+    done의 response는 /api/chat 응답과 같은 최종 문자열이며, 액션 태그는 생성 중 나오는 즉시 실행합니다.
+    """
+    import chat_pipeline
+    from api_integration import gemini_text_stream
+
+    data = request.get_json() or {}
+    actual_user_message = data.get('message', '')
+    session_id = data.get('sessionId', 'default')
+    user_location = data.get('location', '서울')
+    
+    def generate():
+        if not actual_user_message:
+            yield format_sse({"type": "done", "data": {"response": "메시지를 입력해주세요.", "session_id": session_id}})
+            return
+        if not GEMINI_API_KEY:
+            yield format_sse({"type": "done", "data": {"response": DEFAULT_RESPONSES["api_key_missing"], "session_id": session_id}})
+            return
+        
+        prompt = _prepare_chat_prompt(session_id, actual_user_message, user_location)
+        actions = chat_pipeline.ActionRunner(greenhouses.default, apply_device_command)
+        try:
+            for event in chat_pipeline.stream_chat(gemini_text_stream(prompt), user_location, actions):
+                if event["type"] == "done":
+                    influx_storage.append_chat_message(
+                        session_id, {"role": "bot", "content": actions.history_text(event["data"]["response"])})
+                    event["data"]["session_id"] = session_id
+                yield format_sse(event)
+        except Exception as gemini_error:
+            print(f"Gemini 스트리밍 오류: {str(gemini_error)}")
+            yield format_sse({"type": "error", "data": {"response": DEFAULT_RESPONSES["chat_error"], "session_id": session_id}})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # 프록시 버퍼링 비활성화
+    })
+
+@api.route('/api/analyze-image', methods=['POST'])
+@requires("sensors")
 def analyze_image():
     """이미지를 분석하고 Gemini API를 사용하여 분석 결과를 반환합니다."""
+    import chat_pipeline
+    from api_integration import gemini_image_request, extract_text_from_gemini_response
+
     if 'image' not in request.files:
         return jsonify({"error": "이미지가 제공되지 않았습니다."}), 400
         
@@ -375,15 +678,7 @@ def analyze_image():
         image_data = image_file.read()
         
         # PromptManager를 사용하여 이미지 분석 프롬프트 구성
-        if not user_prompt:
-            user_prompt = prompt_manager.config.get('image_analysis_prompts', {}).get('default_prompt', '이 이미지의 온실 식물 상태를 분석하고 조언해주세요.')
-        
-        enriched_prompt = get_image_prompt(
-            user_prompt=user_prompt,
-            temperature=simulator.current_values['temperature'],
-            humidity=simulator.current_values['humidity'],
-            soil=simulator.current_values['soil']
-        )
+        enriched_prompt = chat_pipeline.build_image_prompt(user_prompt)
         
         try:
             # Gemini API 호출
@@ -403,9 +698,11 @@ def analyze_image():
         print(f"이미지 분석 처리 중 오류 발생: {str(e)}")
         return jsonify({"error": DEFAULT_RESPONSES["image_error"]}), 500
 
-@app.route('/api/weather', methods=['GET'])
+@api.route('/api/weather', methods=['GET'])
 def get_weather():
     """날씨 예보 정보를 제공합니다."""
+    import weather_api
+
     region = request.args.get('region', '서울')
     
     # 날씨 정보 조회
@@ -427,9 +724,43 @@ def get_weather():
         }
     })
 
-@app.route('/api/weather/current', methods=['GET'])
+@api.route('/api/http/status', methods=['GET'])
+def get_http_status():
+    """외부 API(Gemini, 기상청) 연결 풀과 요청 통계를 반환합니다."""
+    from http_client import http_client
+
+    return jsonify(http_client.get_stats())
+
+@api.route('/api/maintenance/status', methods=['GET'])
+@requires("maintenance")
+def get_maintenance_status():
+    """유지보수 작업별 실행 통계와 회수량(정리한 세션 수, 삭제한 레코드 수)을 반환합니다."""
+    return jsonify(maintenance.get_status())
+
+@api.route('/api/history/cache', methods=['GET'])
+@requires("storage")
+def get_history_cache_status():
+    """/api/history 집계 결과 캐시의 적중률과 메모리 사용량을 반환합니다."""
+    return jsonify(influx_storage.history_cache.get_stats())
+
+@api.route('/api/chat/cache', methods=['GET'])
+@requires("storage")
+def get_chat_cache_status():
+    """세션별 대화 캐시 통계를 반환합니다."""
+    return jsonify(influx_storage.conversation_cache.get_stats())
+
+@api.route('/api/weather/cache', methods=['GET'])
+def get_weather_cache_status():
+    """날씨 API 응답 캐시 통계를 반환합니다."""
+    import weather_api
+
+    return jsonify(weather_api.get_cache_stats())
+
+@api.route('/api/weather/current', methods=['GET'])
 def get_current_weather():
     """현재 날씨 실황 정보를 제공합니다."""
+    import weather_api
+
     region = request.args.get('region', '서울')
     
     # 현재 날씨 정보 조회
@@ -452,5 +783,6 @@ def get_current_weather():
     })
 
 if __name__ == '__main__':
-    # Flask 서버 시작
-    app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
+    # Flask + Socket.IO 서버 시작 (리로더가 초기화를 두 번 하지 않도록 리로더 끔)
+    app = create_app()
+    socketio.run(app, debug=True, use_reloader=False, host='0.0.0.0', port=5001, allow_unsafe_werkzeug=True) 
\ No newline at end of file
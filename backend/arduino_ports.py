@@ -0,0 +1,279 @@
+"""
+아두이노 시리얼 포트 탐색 모듈
+list_ports 메타데이터(USB VID/PID, 시리얼 번호)로 포트를 열기 전에 후보를 거르고,
+남은 후보를 동시에 열어 공통 마감 시간 안에 가장 먼저 응답한 포트를 사용합니다.
+(포트마다 부트로더 대기 3초 + 응답 대기 5초를 차례로 기다리지 않으므로 후보 수와 무관하게 확인 창 하나로 끝남)
+마지막으로 연결에 성공한 포트는 온실별로 파일에 기록해 다음 시작 시 먼저 확인합니다.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import serial
+    import serial.tools.list_ports
+except ImportError:
+    serial = None
+
+ARDUINO_BAUDRATE = 9600
+
+# 모든 후보 포트가 공유하는 확인 마감 시간 (초) - 보드 리셋 후 펌웨어가 응답할 때까지
+ARDUINO_PROBE_TIMEOUT = float(os.getenv("ARDUINO_PROBE_TIMEOUT", "6"))
+
+# 아두이노로 볼 USB 장치 (VID:PID, PID가 *이면 제조사 전체)
+# 2341/2A03 Arduino 정품, 1A86:7523 CH340, 0403:6001 FTDI, 10C4:EA60 CP210x
+ARDUINO_USB_IDS = os.getenv("ARDUINO_USB_IDS", "2341:*,2A03:*,1A86:7523,0403:6001,10C4:EA60")
+
+# 온실별 마지막 연결 포트 기록 파일 (비워두면 기록하지 않음)
+ARDUINO_PORT_CACHE = os.getenv(
+    "ARDUINO_PORT_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "arduino_port_cache.json")
+)
+
+# 포트를 연 직후 보드가 리셋되어 부트로더가 도는 시간 - 이 동안 보낸 명령은 부트로더가 받으므로 보내지 않음
+BOOTLOADER_DELAY = 2.0
+STATUS_INTERVAL = 1.0
+PROBE_READ_TIMEOUT = 0.2
+
+# USB 메타데이터가 없는 환경에서 쓰는 포트 이름 기준 (기존 탐색 방식)
+_PORT_KEYWORDS = ('usbmodem', 'usbserial', 'ttyusb', 'ttyacm', 'com')
+
+
+def parse_usb_ids(spec):
+    """
+    ARDUINO_USB_IDS 설정을 파싱합니다.
+
+    Returns:
+        list: [(VID, PID 또는 None), ...]
+
+    Raises:
+        ValueError: 16진수 형식이 아닌 경우
+    """
+    ids = []
+    for item in str(spec).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        vid, _, pid = item.partition(":")
+        ids.append((int(vid, 16), None if pid in ("", "*") else int(pid, 16)))
+    return ids
+
+
+def _port_info(port):
+    return {
+        "device": port.device,
+        "vid": port.vid,
+        "pid": port.pid,
+        "serial_number": port.serial_number,
+    }
+
+
+def _matches_usb(info, usb_ids):
+    if info["vid"] is None:
+        return False
+    return any(info["vid"] == vid and (pid is None or info["pid"] == pid) for vid, pid in usb_ids)
+
+
+def list_candidates(usb_ids=None):
+    """
+    아두이노일 수 있는 포트를 포트를 열지 않고 메타데이터로만 고릅니다.
+    USB VID/PID가 맞는 포트가 있으면 그 포트만, 메타데이터가 없으면 포트 이름으로 고릅니다.
+
+    Returns:
+        list: [{"device", "vid", "pid", "serial_number"}, ...]
+    """
+    if serial is None:
+        return []
+    usb_ids = parse_usb_ids(ARDUINO_USB_IDS) if usb_ids is None else usb_ids
+    ports = [_port_info(port) for port in serial.tools.list_ports.comports()]
+    matched = [info for info in ports if _matches_usb(info, usb_ids)]
+    if matched:
+        return matched
+    return [
+        info for info in ports
+        if info["vid"] is None and any(keyword in info["device"].lower() for keyword in _PORT_KEYWORDS)
+    ]
+
+
+class PortCache:
+    """온실 ID -> 마지막으로 연결에 성공한 포트 정보 (JSON 파일)"""
+
+    def __init__(self, path=ARDUINO_PORT_CACHE):
+        self.path = path or None
+        self._lock = threading.Lock()
+        self._entries = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                print(f"아두이노 포트 기록 로드 오류: {e}")
+
+    def get(self, greenhouse_id):
+        with self._lock:
+            return self._entries.get(greenhouse_id)
+
+    def others(self, greenhouse_id):
+        """다른 온실들이 마지막으로 사용한 포트 정보 목록"""
+        with self._lock:
+            return [info for key, info in self._entries.items() if key != greenhouse_id]
+
+    def remember(self, greenhouse_id, info):
+        with self._lock:
+            if self._entries.get(greenhouse_id) == info:
+                return
+            self._entries[greenhouse_id] = info
+            stored = dict(self._entries)
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(stored, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"아두이노 포트 기록 저장 오류: {e}")
+
+
+def _same_port(info, known):
+    """시리얼 번호가 있으면 시리얼 번호로 (ttyACM 번호가 바뀌어도 같은 보드), 없으면 장치 이름으로 비교"""
+    if not known:
+        return False
+    if info.get("serial_number") and known.get("serial_number"):
+        return info["serial_number"] == known["serial_number"]
+    return info["device"] == known.get("device")
+
+
+def probe_port(device, deadline, stop=None):
+    """
+    포트를 열고 펌웨어가 응답하는지 확인합니다.
+
+    Args:
+        device (str): 포트 이름
+        deadline (float): time.monotonic() 기준 마감 시각
+        stop (threading.Event, optional): 다른 포트가 먼저 응답하면 설정되는 이벤트
+
+    Returns:
+        serial.Serial: 응답한 포트 (열린 상태) 또는 None
+    """
+    try:
+        ser = serial.Serial(device, ARDUINO_BAUDRATE, timeout=PROBE_READ_TIMEOUT)
+    except Exception as e:
+        print(f"포트 {device} 연결 실패: {e}")
+        return None
+
+    responded = False
+    next_status = time.monotonic() + BOOTLOADER_DELAY
+    try:
+        ser.reset_input_buffer()
+        while time.monotonic() < deadline and not (stop and stop.is_set()):
+            # 부팅 직후 출력하는 텔레메트리 줄이 오면 STATUS 응답을 기다리지 않음
+            now = time.monotonic()
+            if now >= next_status:
+                ser.write(b"STATUS\n")
+                ser.flush()
+                next_status = now + STATUS_INTERVAL
+            line = ser.readline().decode('utf-8', errors='ignore').strip()
+            if not line:
+                continue
+            responded = True
+            if "시스템 상태" in line or "온도:" in line:
+                return ser
+        if responded and not (stop and stop.is_set()):
+            return ser
+    except Exception as e:
+        print(f"포트 {device} 통신 테스트 오류: {e}")
+
+    try:
+        ser.close()
+    except Exception:
+        pass
+    return None
+
+
+def _probe_parallel(candidates, deadline):
+    """후보를 동시에 확인해 가장 먼저 응답한 (시리얼 객체, 포트 정보)를 반환합니다."""
+    stop = threading.Event()
+    lock = threading.Lock()
+    winner = []
+
+    def run(info):
+        ser = probe_port(info["device"], deadline, stop)
+        if ser is None:
+            return
+        with lock:
+            if not winner:
+                winner.append((ser, info))
+                stop.set()
+                return
+        ser.close()
+
+    with ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="port-probe") as pool:
+        list(pool.map(run, candidates))
+    return winner[0] if winner else (None, None)
+
+
+def find_arduino(greenhouse_id, claim, release, port=None, timeout=None, cache=None):
+    """
+    온실 하나의 아두이노 포트를 찾아 엽니다.
+
+    Args:
+        greenhouse_id (str): 온실 ID (포트 기록 키)
+        claim (callable): claim(포트) -> 이 온실이 사용하도록 표시, 다른 온실이 사용 중이면 False
+        release (callable): release(포트) -> 사용 표시 해제
+        port (str, optional): 온실 설정에 지정된 포트 (이 포트만 확인)
+        timeout (float, optional): 확인 마감 시간 (초). 기본값은 ARDUINO_PROBE_TIMEOUT.
+        cache (PortCache, optional): 포트 기록. 기본값은 모듈 기록.
+
+    Returns:
+        serial.Serial: 응답한 포트 (claim된 상태) 또는 None
+    """
+    if serial is None:
+        return None
+    timeout = ARDUINO_PROBE_TIMEOUT if timeout is None else timeout
+    cache = port_cache if cache is None else cache
+
+    if port:
+        candidates = [{"device": port, "vid": None, "pid": None, "serial_number": None}]
+        known = None
+    else:
+        known = cache.get(greenhouse_id)
+        candidates = list_candidates()
+        # 다른 온실이 마지막으로 사용한 보드는 남는 후보가 없을 때만 확인
+        reserved = cache.others(greenhouse_id)
+        preferred = [info for info in candidates if not any(_same_port(info, other) for other in reserved)]
+        candidates = preferred or candidates
+    print(f"[{greenhouse_id}] 아두이노 후보 포트: {[info['device'] for info in candidates]}")
+
+    # 다른 온실이 사용 중이거나 확인 중인 포트는 건너뜀
+    candidates = [info for info in candidates if claim(info["device"])]
+    if not candidates:
+        return None
+
+    started = time.monotonic()
+    ser, info = None, None
+    cached = [info for info in candidates if _same_port(info, known)]
+    if cached:
+        # 마지막으로 사용한 보드를 먼저 혼자 확인 (다른 온실의 보드를 먼저 잡지 않도록)
+        ser = probe_port(cached[0]["device"], time.monotonic() + timeout)
+        info = cached[0] if ser else None
+    if ser is None:
+        rest = [candidate for candidate in candidates if candidate not in cached]
+        if rest:
+            ser, info = _probe_parallel(rest, time.monotonic() + timeout)
+
+    for candidate in candidates:
+        if candidate is not info:
+            release(candidate["device"])
+    if ser is None:
+        return None
+
+    print(f"[{greenhouse_id}] 아두이노 포트 {info['device']} 응답 확인 ({time.monotonic() - started:.1f}초)")
+    if not port:
+        cache.remember(greenhouse_id, info)
+    return ser
+
+
+# 온실별 마지막 연결 포트 기록
+port_cache = PortCache()
@@ -0,0 +1,132 @@
+"""
+아두이노 바이너리 텔레메트리 프레임 모듈
+고정 길이 구조체 프레임(동기 바이트 + 순번 + 센서 값 + CRC16)을 struct.unpack_from으로 복사 없이 해석합니다.
+텍스트 줄("온도: 25.0 °C, 습도: ...")을 정규식 여러 개로 파싱하는 것보다 훨씬 싸고,
+9600bps에서 한 샘플이 18바이트라 샘플링 주기를 올리거나 항목을 늘려도 부담이 작습니다.
+
+협상: 호스트가 "PROTO BIN"을 보내고 펌웨어가 "PROTO BIN OK" 줄로 응답하면 이후 텔레메트리는 프레임으로 옵니다.
+응답하지 않는 (구버전) 펌웨어는 기존 텍스트 형식을 그대로 사용합니다.
+
+프레임 레이아웃 (리틀 엔디언, 18바이트):
+    오프셋 크기 내용
+    0      2    동기 바이트 0xA5 0x5A
+    2      1    프레임 종류 (0x01 = 텔레메트리)
+    3      2    순번 uint16 (프레임마다 1 증가, 65535 다음 0)
+    5      2    온도 int16 (0.1 °C 단위)
+    7      2    습도 uint16 (0.1 % 단위)
+    9      2    CO2 uint16 (ppm)
+    11     2    조도 uint16
+    13     2    토양 수분 원시값 uint16 (0-1023)
+    15     1    장치 상태 비트 (bit0 팬, bit1 펌프, bit2 LED, bit3 창문)
+    16     2    CRC16-CCITT (오프셋 2부터 15까지, 초기값 0xFFFF)
+
+텍스트 형식은 parse_text_telemetry()가 미리 컴파일한 패턴 하나로 한 번만 훑어 모든 항목을 추출합니다.
+"""
+import re
+import struct
+
+SYNC = b"\xA5\x5A"
+FRAME_TELEMETRY = 0x01
+
+FRAME_STRUCT = struct.Struct("<2sBHhHHHHBH")
+FRAME_SIZE = FRAME_STRUCT.size
+_CRC_STRUCT = struct.Struct("<H")
+
+PROTOCOL_REQUEST = "PROTO BIN"
+PROTOCOL_ACK = "PROTO BIN OK"
+
+DEVICE_BITS = ("fan", "water", "light", "window")
+
+
+def _make_crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16_ccitt(data, crc=0xFFFF):
+    """CRC16-CCITT (다항식 0x1021, 초기값 0xFFFF) - 펌웨어의 계산과 같아야 합니다."""
+    table = _CRC_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+
+def decode_frame(view, offset=0):
+    """
+    버퍼의 offset 위치에서 텔레메트리 프레임 하나를 해석합니다.
+
+    Args:
+        view (memoryview|bytes|bytearray): 수신 버퍼 (offset부터 FRAME_SIZE 바이트 이상 있어야 함)
+        offset (int): 프레임 시작 위치 (동기 바이트)
+
+    Returns:
+        tuple: (순번, 온도, 습도, CO2, 조도, 토양 원시값, 장치 비트) 또는 CRC/형식이 맞지 않으면 None
+    """
+    (sync, kind, seq, temperature, humidity, co2, light, soil_raw,
+     devices, crc) = FRAME_STRUCT.unpack_from(view, offset)
+    if sync != SYNC or kind != FRAME_TELEMETRY:
+        return None
+    if crc16_ccitt(view[offset + 2:offset + FRAME_SIZE - 2]) != crc:
+        return None
+    return seq, temperature / 10, humidity / 10, co2, light, soil_raw, devices
+
+
+def encode_frame(seq, temperature, humidity, co2, light, soil_raw, devices=0):
+    """텔레메트리 프레임을 만듭니다. (펌웨어와 같은 형식 - 테스트/에뮬레이션용)"""
+    body = FRAME_STRUCT.pack(SYNC, FRAME_TELEMETRY, seq & 0xFFFF, round(temperature * 10),
+                             round(humidity * 10), co2, light, soil_raw, devices, 0)[:FRAME_SIZE - 2]
+    return body + _CRC_STRUCT.pack(crc16_ccitt(body[2:]))
+
+
+# 텍스트 텔레메트리 ("온도: 25.0 °C, 습도: 60.5 %, CO2: 350, 조도: 15, 토양 수분: 650")
+_TEXT_FIELD = re.compile(r"(온도|습도|CO2|조도|토양\s*수분):\s*(-?[\d.]+)")
+
+
+def _to_int(text):
+    # "350.5" 같은 값은 정수 부분만 사용
+    return int(text.partition(".")[0])
+
+
+def soil_raw_to_percent(raw):
+    """아두이노의 토양수분 원시값을 퍼센트로 변환합니다. (0-1023 → 100-0, 범위 밖 값은 0~100으로 제한)"""
+    return round(min(100.0, max(0.0, 100 - (raw / 1023 * 100))), 1)
+
+
+def _soil_percent(text):
+    return soil_raw_to_percent(_to_int(text))
+
+
+_TEXT_FIELDS = {
+    "온도": ("temperature", float),
+    "습도": ("humidity", float),
+    "CO2": ("co2", _to_int),
+    "조도": ("light", _to_int),
+}
+_SOIL_FIELD = ("soil", _soil_percent)
+
+
+def parse_text_telemetry(line):
+    """
+    텍스트 텔레메트리 한 줄에서 센서 값을 추출합니다. (항목마다 처음 나온 값 사용)
+
+    Returns:
+        dict: 센서 항목 -> 값. 숫자가 잘못된 항목은 건너뜀 (나머지 항목은 그대로 반영).
+    """
+    values = {}
+    for label, number in _TEXT_FIELD.findall(line):
+        key, convert = _TEXT_FIELDS.get(label) or _SOIL_FIELD
+        if key in values:
+            continue
+        try:
+            values[key] = convert(number)
+        except ValueError:
+            continue
+    return values
@@ -0,0 +1,306 @@
+"""
+ASGI 서빙 진입점
+/api/chat, /api/chat/stream, /api/analyze-image는 asyncio 네이티브 핸들러로 처리해 하나의 프로세스가
+수백 개의 Gemini 호출을 동시에 대기할 수 있고, 나머지 경로는 기존 Flask 앱을 그대로 마운트합니다.
+SSE /api/stream도 이벤트 루프에서 대기하므로 오래 열린 스트림이 Flask 경로의 스레드를 차지하지 않으며,
+마운트된 Flask 경로는 전용 스레드 풀(ASGI_WSGI_THREADS)에서 동시에 실행됩니다.
+
+실행: uvicorn asgi:app --host 0.0.0.0 --port 8000
+(Socket.IO /stream 네임스페이스는 python app.py 모드에서만 제공되며,
+ ASGI 모드의 클라이언트는 SSE /api/stream 또는 /api/status 폴링을 사용합니다.)
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as flask_module
+from app import create_app, startup, apply_device_command, DEFAULT_RESPONSES, GEMINI_API_KEY, STREAM_KEEPALIVE
+from sensor_stream import format_sse
+
+# Flask 경로를 실행할 스레드 수 (asgiref 기본값은 모든 WSGI 요청을 스레드 하나에서 차례로 실행)
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+# 채팅 파이프라인/저장소 모듈과 비동기 클라이언트 - lifespan에서 채움
+# (이 모듈을 임포트하는 것만으로는 InfluxDB, 센서, Gemini 클라이언트를 초기화하지 않음)
+chat_pipeline = None
+influx_storage = None
+api_integration = None
+gemini_client = None
+influx_reader = None
+
+# 동기 경로용 Flask 앱 (Socket.IO 없이, 하드웨어 탐색 등 백그라운드 초기화는 lifespan에서 시작)
+flask_app = create_app(init=False, enable_socketio=False)
+
+
+class _PooledWsgiInstance(WsgiToAsgiInstance):
+    """WSGI 요청 하나를 공유 스레드 대신 스레드 풀에서 실행하는 인스턴스"""
+
+    # asgiref가 sync_to_async(thread_sensitive=True)로 감싼 원래 동기 함수
+    _run_wsgi_app = WsgiToAsgiInstance.__dict__["run_wsgi_app"].func
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self._run_wsgi_app, thread_sensitive=False, executor=self.executor)(body)
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """Flask 앱을 스레드 풀에서 동시에 실행하는 WsgiToAsgi"""
+
+    def __init__(self, wsgi_application, max_workers=ASGI_WSGI_THREADS):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wsgi")
+
+    async def __call__(self, scope, receive, send):
+        await _PooledWsgiInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+
+def _not_ready(*components):
+    """구성 요소가 아직 초기화 중이면 503 응답, 준비되었으면 None (Flask requires()와 같은 형식)"""
+    pending = [name for name in components if not startup.is_ready(name)]
+    if not pending:
+        return None
+    return JSONResponse({"error": "서버 초기화 중입니다.", "pending": pending, "startup": startup.get_status()},
+                        status_code=503, headers={"Retry-After": "1"})
+
+
+def _action_runner():
+    """기본 온실에 채팅 액션 태그를 적용하는 실행기 (온실 레지스트리는 백그라운드 초기화가 채우므로 요청 시점에 가져옴)"""
+    return chat_pipeline.ActionRunner(flask_module.greenhouses.default, apply_device_command)
+
+
+async def _read_chat_request(request):
+    try:
+        data = await request.json()
+    except json.JSONDecodeError:
+        data = {}
+    return data.get('message', ''), data.get('sessionId', 'default'), data.get('location', '서울')
+
+
+async def _prepare_chat_prompt(session_id, user_message, user_location):
+    """사용자 메시지를 저장하고 최근 대화 기록을 포함한 챗봇 프롬프트를 만듭니다."""
+    # 캐시에 없는 세션은 비동기 조회기로 먼저 복원 (동기 조회로 이벤트 루프를 막지 않도록)
+    cache = influx_storage.conversation_cache
+    if not cache.is_cached(session_id):
+        cache.hydrate(session_id, await influx_reader.get_chat_history(session_id, limit=cache.window))
+
+    # 사용자 메시지 저장 (캐시에 넣고 배치 큐로 넘기기만 하므로 이벤트 루프를 막지 않음)
+    influx_storage.append_chat_message(session_id, {"role": "user", "content": user_message})
+
+    try:
+        conversation_text = chat_pipeline.format_conversation(influx_storage.get_recent_chat(session_id, limit=5))
+    except Exception as e:
+        print(f"대화 기록 로드 오류: {str(e)}")
+        conversation_text = ""
+
+    return chat_pipeline.build_chat_prompt(user_message, user_location, conversation_text)
+
+
+async def chat(request):
+    """사용자와의 채팅을 처리합니다. (Flask /api/chat과 같은 요청/응답 형식)"""
+    not_ready = _not_ready("storage", "sensors")
+    if not_ready:
+        return not_ready
+    actual_user_message, session_id, user_location = await _read_chat_request(request)
+
+    if not actual_user_message:
+        return JSONResponse({"response": "메시지를 입력해주세요.", "session_id": session_id})
+
+    if not GEMINI_API_KEY:
+        return JSONResponse({"response": DEFAULT_RESPONSES["api_key_missing"], "session_id": session_id})
+
+    prompt = await _prepare_chat_prompt(session_id, actual_user_message, user_location)
+
+    try:
+        response_data = await gemini_client.generate(api_integration.build_text_payload(prompt))
+        text_response = api_integration.extract_text_from_gemini_response(response_data)
+
+        if not text_response or len(text_response.strip()) == 0:
+            print("빈 응답 오류: Gemini API가 빈 응답을 반환했습니다.")
+            return JSONResponse({"response": DEFAULT_RESPONSES["chat_error"], "session_id": session_id})
+
+        # WEATHER_REQUEST, HISTORY_REQUEST 태그를 조회 결과로 교체
+        text_response = await chat_pipeline.resolve_tags_async(
+            text_response, user_location, influx_reader.get_historical_sensor_data)
+
+        # ACTION 태그는 서버에서 바로 장치에 적용하고 응답에서 제거
+        actions = _action_runner()
+        text_response = await asyncio.to_thread(actions.run_all, text_response)
+
+        influx_storage.append_chat_message(session_id, {"role": "bot", "content": actions.history_text(text_response)})
+        return JSONResponse({"response": text_response, "session_id": session_id, **actions.result()})
+
+    except Exception as gemini_error:
+        print(f"Gemini API 오류: {str(gemini_error)}")
+        return JSONResponse({"response": DEFAULT_RESPONSES["chat_error"], "session_id": session_id})
+
+
+async def chat_stream(request):
+    """/api/chat의 스트리밍 버전 (Flask /api/chat/stream과 같은 SSE 이벤트 형식)"""
+    not_ready = _not_ready("storage", "sensors")
+    if not_ready:
+        return not_ready
+    actual_user_message, session_id, user_location = await _read_chat_request(request)
+
+    async def generate():
+        if not actual_user_message:
+            yield format_sse({"type": "done", "data": {"response": "메시지를 입력해주세요.", "session_id": session_id}})
+            return
+        if not GEMINI_API_KEY:
+            yield format_sse({"type": "done", "data": {"response": DEFAULT_RESPONSES["api_key_missing"], "session_id": session_id}})
+            return
+
+        prompt = await _prepare_chat_prompt(session_id, actual_user_message, user_location)
+        actions = _action_runner()
+        try:
+            chunks = gemini_client.stream(api_integration.build_text_payload(prompt))
+            async for event in chat_pipeline.stream_chat_async(
+                    chunks, user_location, influx_reader.get_historical_sensor_data, actions):
+                if event["type"] == "done":
+                    influx_storage.append_chat_message(
+                        session_id, {"role": "bot", "content": actions.history_text(event["data"]["response"])})
+                    event["data"]["session_id"] = session_id
+                yield format_sse(event)
+        except Exception as gemini_error:
+            print(f"Gemini 스트리밍 오류: {str(gemini_error)}")
+            yield format_sse({"type": "error", "data": {"response": DEFAULT_RESPONSES["chat_error"], "session_id": session_id}})
+
+    return StreamingResponse(generate(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+async def analyze_image(request):
+    """이미지를 분석합니다. (Flask /api/analyze-image와 같은 요청/응답 형식)"""
+    not_ready = _not_ready("sensors")
+    if not_ready:
+        return not_ready
+    form = await request.form()
+    image_file = form.get('image')
+    if image_file is None or isinstance(image_file, str):
+        return JSONResponse({"error": "이미지가 제공되지 않았습니다."}, status_code=400)
+    user_prompt = form.get('prompt', '')
+
+    try:
+        if not GEMINI_API_KEY:
+            return JSONResponse({"analysis": DEFAULT_RESPONSES["api_key_missing"]})
+
+        image_data = await image_file.read()
+        enriched_prompt = chat_pipeline.build_image_prompt(user_prompt)
+
+        try:
+            response_data = await gemini_client.generate(api_integration.build_image_payload(enriched_prompt, image_data))
+            analysis_text = api_integration.extract_text_from_gemini_response(response_data)
+
+            if not analysis_text or len(analysis_text.strip()) == 0:
+                return JSONResponse({"analysis": "식물 이미지 분석 중 오류가 발생했습니다. 다시 시도해주세요."})
+
+            return JSONResponse({"analysis": analysis_text})
+
+        except Exception as api_error:
+            print(f"Gemini 이미지 API 오류: {str(api_error)}")
+            return JSONResponse({"analysis": DEFAULT_RESPONSES["image_error"]})
+
+    except Exception as e:
+        print(f"이미지 분석 처리 중 오류 발생: {str(e)}")
+        return JSONResponse({"error": DEFAULT_RESPONSES["image_error"]}, status_code=500)
+
+
+async def stream_status(request):
+    """센서 스냅샷을 SSE로 푸시합니다. (Flask /api/stream과 같은 이벤트 형식)
+
+    구독자를 send_fn으로 등록해 팬아웃 스레드가 이벤트 루프의 큐에 넣으므로 연결이 스레드를 차지하지 않습니다.
+    """
+    not_ready = _not_ready("sensors")
+    if not_ready:
+        return not_ready
+    greenhouse_id = request.path_params.get('greenhouse_id') or flask_module.greenhouses.default_id
+    broadcaster = flask_module.sensor_streams.get(greenhouse_id)
+    if broadcaster is None:
+        return JSONResponse({"error": f"등록되지 않은 온실입니다: {greenhouse_id}"}, status_code=404)
+    interval = flask_module._parse_stream_interval(request.query_params.get('interval'))
+    loop = asyncio.get_running_loop()
+
+    async def generate():
+        queue = asyncio.Queue()
+        client = broadcaster.register(interval, send_fn=lambda event: loop.call_soon_threadsafe(queue.put_nowait, event))
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            broadcaster.unregister(client)
+
+    return StreamingResponse(generate(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+async def async_status(request):
+    """비동기 Gemini 클라이언트의 동시 요청 통계를 반환합니다."""
+    return JSONResponse({
+        "gemini": gemini_client.get_stats(),
+        "influx_async": influx_reader.query_api is not None,
+    })
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    global chat_pipeline, influx_storage, api_integration, gemini_client, influx_reader
+    import chat_pipeline as pipeline_module
+    import influx_storage as storage_module
+    import api_integration as integration_module
+    from async_clients import AsyncGeminiClient, AsyncInfluxReader
+
+    chat_pipeline, influx_storage, api_integration = pipeline_module, storage_module, integration_module
+    gemini_client = AsyncGeminiClient()
+    influx_reader = AsyncInfluxReader()
+    # InfluxDB 클라이언트, 센서 레지스트리, 유지보수 스케줄러는 Flask 앱과 같은 백그라운드 시작 작업으로 초기화
+    startup.start()
+    await gemini_client.start()
+    await influx_reader.start()
+    try:
+        yield
+    finally:
+        await gemini_client.close()
+        await influx_reader.close()
+        wsgi_app.executor.shutdown(wait=False)
+
+
+wsgi_app = PooledWsgiToAsgi(flask_app)
+
+app = Starlette(
+    routes=[
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/chat/stream', chat_stream, methods=['POST']),
+        Route('/api/analyze-image', analyze_image, methods=['POST']),
+        Route('/api/stream', stream_status, methods=['GET']),
+        Route('/api/greenhouses/{greenhouse_id}/stream', stream_status, methods=['GET']),
+        Route('/api/async/status', async_status, methods=['GET']),
+        # 나머지 동기 경로는 기존 Flask 앱이 처리 (전용 스레드 풀에서 동시에 실행)
+        Mount('/', app=wsgi_app),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,201 @@
+"""
+비동기 외부 클라이언트 모듈 (ASGI 서빙 경로 전용)
+이벤트 루프 하나에서 수백 개의 Gemini 호출과 InfluxDB 조회를 동시에 대기할 수 있도록
+aiohttp 연결 풀 기반 Gemini 클라이언트와 InfluxDBClientAsync 기반 조회기를 제공합니다.
+두 클라이언트 모두 실행 중인 이벤트 루프 안에서 start()로 열어야 합니다.
+"""
+import asyncio
+import os
+import random
+
+import aiohttp
+
+import influx_storage
+from api_integration import gemini_endpoint, parse_stream_line, GEMINI_READ_TIMEOUT
+from http_client import HTTP_CONNECT_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_BACKOFF_MAX, RETRY_STATUS_CODES
+
+# 비동기 Gemini 동시 연결 상한
+GEMINI_ASYNC_POOL_SIZE = int(os.getenv("GEMINI_ASYNC_POOL_SIZE", "500"))
+
+
+class GeminiAPIError(Exception):
+    """Gemini API가 오류 응답을 반환한 경우"""
+
+    def __init__(self, status, message):
+        super().__init__(f"API 오류 응답: {status}, 메시지: {message}")
+        self.status = status
+
+
+class AsyncGeminiClient:
+    """aiohttp 세션 하나를 공유하는 비동기 Gemini 클라이언트"""
+
+    def __init__(self, pool_size=GEMINI_ASYNC_POOL_SIZE, connect_timeout=HTTP_CONNECT_TIMEOUT,
+                 read_timeout=GEMINI_READ_TIMEOUT, max_retries=HTTP_MAX_RETRIES):
+        """
+        Args:
+            pool_size (int): 동시에 열 수 있는 최대 연결 수
+            connect_timeout (float): 연결 타임아웃 (초)
+            read_timeout (float): 응답 대기 타임아웃 (초)
+            max_retries (int): 연결 실패/일시적 오류 응답에 대한 최대 재시도 횟수
+        """
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self._session = None
+
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "retries": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+        }
+
+    async def start(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def generate(self, payload):
+        """
+        generateContent 요청을 보내고 응답 JSON을 반환합니다.
+
+        Args:
+            payload (dict): build_text_payload/build_image_payload로 만든 요청 본문
+
+        Raises:
+            ValueError: API 키가 없는 경우
+            GeminiAPIError: 오류 응답
+            aiohttp.ClientError, asyncio.TimeoutError: 연결 실패, 타임아웃
+        """
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("API 키가 설정되지 않았습니다.")
+        url = gemini_endpoint("generateContent", api_key)
+
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            return await self._post_with_retry(url, payload)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def _post_with_retry(self, url, payload):
+        attempt = 0
+        while True:
+            try:
+                async with self._session.post(url, json=payload) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    body = await response.text()
+                    if response.status not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        print(f"Gemini API 오류 응답: {response.status} {body[:200]}")
+                        raise GeminiAPIError(response.status, body[:200])
+            except aiohttp.ClientConnectorError:
+                # 연결 단계 실패만 재시도 (응답 대기 중 끊기면 중복 생성 방지를 위해 포기)
+                if attempt >= self.max_retries:
+                    raise
+            attempt += 1
+            self.stats["retries"] += 1
+            delay = min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_FACTOR * (2 ** (attempt - 1)))
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def stream(self, payload):
+        """
+        streamGenerateContent(SSE) 요청을 보내고 텍스트 조각을 차례로 반환합니다.
+
+        Yields:
+            str: 생성된 텍스트 조각
+        """
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("API 키가 설정되지 않았습니다.")
+        url = gemini_endpoint("streamGenerateContent", api_key) + "&alt=sse"
+
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            async with self._session.post(url, json=payload) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    print(f"스트리밍 API 오류 응답: {response.status} {body[:200]}")
+                    raise GeminiAPIError(response.status, body[:200])
+                async for raw_line in response.content:
+                    text = parse_stream_line(raw_line.decode("utf-8").strip())
+                    if text:
+                        yield text
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["pool_size"] = self.pool_size
+        return stats
+
+
+class AsyncInfluxReader:
+    """채팅 경로에서 쓰는 InfluxDB 조회의 비동기 버전 (쓰기는 기존 배치 큐를 그대로 사용)"""
+
+    def __init__(self):
+        self.client = None
+        self.query_api = None
+
+    async def start(self):
+        try:
+            from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+            self.client = InfluxDBClientAsync(
+                url=influx_storage.INFLUXDB_URL,
+                token=influx_storage.INFLUXDB_TOKEN,
+                org=influx_storage.INFLUXDB_ORG
+            )
+            self.query_api = self.client.query_api()
+        except Exception as e:
+            print(f"비동기 InfluxDB 클라이언트 초기화 실패: {e}")
+            self.client = None
+            self.query_api = None
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+            self.query_api = None
+
+    async def get_chat_history(self, session_id, limit=5):
+        """채팅 히스토리 조회 (influx_storage.get_chat_history와 같은 형식)"""
+        if not self.query_api:
+            return []
+        try:
+            result = await influx_storage.flux_queries.run_async(
+                self.query_api, "chat_history", session_id=session_id, limit=limit)
+            return influx_storage.parse_chat_history(result)
+        except Exception as e:
+            print(f"채팅 히스토리 비동기 조회 실패: {e}")
+            return []
+
+    async def get_historical_sensor_data(self, target_time, metric, tolerance_minutes=30):
+        """특정 시간대의 센서 데이터 조회 (influx_storage.get_historical_sensor_data와 같은 형식)"""
+        if not self.query_api:
+            return influx_storage.historical_error('InfluxDB 연결이 없습니다.')
+        try:
+            params = influx_storage.historical_query_params(target_time, metric, tolerance_minutes)
+            result = await influx_storage.flux_queries.run_async(self.query_api, "historical_sensor", **params)
+            return influx_storage.parse_historical_sensor_data(result, target_time, metric)
+        except Exception as e:
+            print(f"과거 센서 데이터 비동기 조회 실패: {e}")
+            return influx_storage.historical_error(f'데이터 조회 중 오류가 발생했습니다: {str(e)}')
@@ -0,0 +1,461 @@
+"""
+서버 측 자동화 규칙 엔진
+앱(DeviceControl 자동 모드)이 화면에 떠 있을 때만 동작하던 임계값 제어를 서버로 옮겨
+온실 센서 매니저의 샘플 틱마다 평가하고, 장치 명령은 HTTP를 거치지 않고 manager.update_device()로
+시리얼 링크에 바로 보냅니다.
+
+규칙은 온실별로 파일에 저장하고, 평가용으로 (규칙 수,) numpy 배열 몇 개의 평탄한 표로 컴파일합니다.
+틱마다 해당 온실 구간만 배열 연산 몇 번으로 평가하므로 규칙과 온실 수가 늘어도 틱당 수 마이크로초입니다.
+- 히스테리시스: 켜진 규칙은 임계값에서 히스테리시스만큼 되돌아와야 꺼짐 (임계값 근처 떨림 방지)
+- 최소 유지 시간: 장치가 켜진(꺼진) 뒤 min_on(min_off)초가 지나기 전에는 다시 바꾸지 않음
+- 수동 우선: 사용자가 장치를 직접 제어하면 그 장치는 AUTOMATION_MANUAL_HOLD초 동안 자동화에서 제외
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+
+from sensor_shm import ControlClient
+
+METRICS = ("temperature", "humidity", "power", "soil", "co2", "light")
+DEVICES = ("fan", "water", "light", "window")
+CONDITIONS = ("above", "below")
+ACTIONS = ("on", "off")
+
+# 규칙과 온실별 자동 모드 설정 파일 (비워두면 저장하지 않음)
+AUTOMATION_RULES_PATH = os.getenv(
+    "AUTOMATION_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "automation_rules.json")
+)
+
+# 수동 제어 후 해당 장치를 자동화에서 제외하는 시간 (초)
+AUTOMATION_MANUAL_HOLD = float(os.getenv("AUTOMATION_MANUAL_HOLD", "600"))
+
+# 항목별 기본 히스테리시스 (규칙에 지정하지 않은 경우)
+DEFAULT_HYSTERESIS = {
+    "temperature": 0.5,
+    "humidity": 2.0,
+    "power": 5.0,
+    "soil": 2.0,
+    "co2": 25.0,
+    "light": 50.0,
+}
+DEFAULT_MIN_ON = 30.0
+DEFAULT_MIN_OFF = 30.0
+DEFAULT_PRIORITY = 100
+
+# 온실 전용 규칙이 없을 때 쓰는 공통 규칙 (앱 자동 모드 기본값과 같음)
+DEFAULT_RULES = [
+    {"id": "light", "device": "light", "metric": "light", "condition": "above", "threshold": 800},
+    {"id": "fan", "device": "fan", "metric": "co2", "condition": "above", "threshold": 450},
+    {"id": "water", "device": "water", "metric": "soil", "condition": "below", "threshold": 40},
+    {"id": "window", "device": "window", "metric": "temperature", "condition": "above", "threshold": 25},
+]
+
+RECENT_ACTIONS = 50
+
+
+def _number(data, key, default=None, minimum=None):
+    value = data.get(key, default)
+    if value is None:
+        raise ValueError(f"{key} 값이 필요합니다.")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} 값은 숫자여야 합니다: {value}") from None
+    if not np.isfinite(value) or (minimum is not None and value < minimum):
+        raise ValueError(f"{key} 값이 올바르지 않습니다: {value}")
+    return value
+
+
+def parse_rule(data):
+    """
+    규칙 하나를 검증하고 기본값을 채웁니다.
+    앱 자동 제어 설정과 같은 키(sensor)도 metric 대신 받습니다.
+
+    Returns:
+        dict: id, device, metric, condition, threshold, hysteresis, action, min_on, min_off, priority, enabled
+
+    Raises:
+        ValueError: 형식이 잘못된 경우
+    """
+    if not isinstance(data, dict):
+        raise ValueError("규칙은 객체여야 합니다.")
+    device = data.get("device")
+    if device not in DEVICES:
+        raise ValueError(f"유효하지 않은 장치입니다: {device}")
+    metric = data.get("metric", data.get("sensor"))
+    if metric not in METRICS:
+        raise ValueError(f"유효하지 않은 센서 항목입니다: {metric}")
+    condition = data.get("condition", "above")
+    if condition not in CONDITIONS:
+        raise ValueError(f"condition은 {CONDITIONS} 중 하나여야 합니다: {condition}")
+    action = data.get("action", "on")
+    if action not in ACTIONS:
+        raise ValueError(f"action은 {ACTIONS} 중 하나여야 합니다: {action}")
+    try:
+        priority = int(data.get("priority", DEFAULT_PRIORITY))
+    except (TypeError, ValueError):
+        raise ValueError(f"priority 값은 정수여야 합니다: {data.get('priority')}") from None
+
+    return {
+        "id": str(data.get("id") or uuid.uuid4().hex[:8]),
+        "device": device,
+        "metric": metric,
+        "condition": condition,
+        "threshold": _number(data, "threshold"),
+        "hysteresis": _number(data, "hysteresis", DEFAULT_HYSTERESIS[metric], minimum=0),
+        "action": action,
+        "min_on": _number(data, "min_on", DEFAULT_MIN_ON, minimum=0),
+        "min_off": _number(data, "min_off", DEFAULT_MIN_OFF, minimum=0),
+        "priority": priority,
+        "enabled": bool(data.get("enabled", True)),
+    }
+
+
+def parse_rules(items):
+    if not isinstance(items, list):
+        raise ValueError("rules는 목록이어야 합니다.")
+    rules = [parse_rule(item) for item in items]
+    ids = [rule["id"] for rule in rules]
+    if len(set(ids)) != len(ids):
+        raise ValueError("규칙 id가 중복되었습니다.")
+    return rules
+
+
+class RuleStore:
+    """
+    공통 규칙과 온실별 설정 (JSON 파일)
+
+    파일 형식:
+        {"common": [규칙, ...], "greenhouses": {"gh1": {"enabled": true, "rules": [규칙, ...]}}}
+    온실에 rules가 있으면 그 규칙만, 없으면 공통 규칙을 사용합니다. 자동 모드는 온실별로 기본 꺼짐입니다.
+    """
+
+    def __init__(self, path=AUTOMATION_RULES_PATH):
+        self.path = path or None
+        self._lock = threading.Lock()
+        self.common = parse_rules(DEFAULT_RULES)
+        self.houses = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.common = parse_rules(data.get("common", DEFAULT_RULES))
+                for greenhouse_id, config in data.get("greenhouses", {}).items():
+                    house = {"enabled": bool(config.get("enabled", False))}
+                    if config.get("rules") is not None:
+                        house["rules"] = parse_rules(config["rules"])
+                    self.houses[greenhouse_id] = house
+            except Exception as e:
+                print(f"자동화 규칙 로드 오류: {e}")
+
+    def get(self, greenhouse_id):
+        """
+        Returns:
+            tuple: (자동 모드 여부, 적용할 규칙 목록, 온실 전용 규칙 여부)
+        """
+        with self._lock:
+            house = self.houses.get(greenhouse_id, {})
+            custom = "rules" in house
+            return house.get("enabled", False), list(house["rules"] if custom else self.common), custom
+
+    def update(self, greenhouse_id, enabled=None, rules=None, reset_rules=False):
+        """
+        온실 하나의 설정을 바꾸고 저장합니다.
+
+        Args:
+            enabled (bool, optional): 자동 모드 켜기/끄기
+            rules (list, optional): 온실 전용 규칙 (검증된 목록)
+            reset_rules (bool): True면 온실 전용 규칙을 지우고 공통 규칙으로 되돌림
+        """
+        with self._lock:
+            house = self.houses.setdefault(greenhouse_id, {"enabled": False})
+            if enabled is not None:
+                house["enabled"] = bool(enabled)
+            if reset_rules:
+                house.pop("rules", None)
+            elif rules is not None:
+                house["rules"] = list(rules)
+            stored = {"common": self.common, "greenhouses": json.loads(json.dumps(self.houses))}
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(stored, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"자동화 규칙 저장 오류: {e}")
+
+
+class RuleTable:
+    """
+    자동 모드가 켜진 온실들의 규칙을 평탄한 배열로 컴파일한 평가 표
+
+    규칙은 (온실, 장치, 우선순위, 정의 순서)로 정렬되어 온실마다 연속 구간을 차지합니다.
+    "below" 규칙은 값과 임계값의 부호를 뒤집어 모든 규칙을 "부호 * 값 >= 부호 * 임계값" 하나로 평가합니다.
+    장치의 규칙이 하나도 발동하지 않으면 "on" 규칙이 있는 장치는 끄고, "off" 규칙만 있는 장치는 그대로 둡니다.
+    """
+
+    def __init__(self, houses, previous=None):
+        """
+        Args:
+            houses (list): [(온실 ID, 규칙 목록), ...] - 자동 모드가 켜진 온실만
+            previous (RuleTable, optional): 이전 표 (같은 규칙의 히스테리시스 상태를 이어받음)
+        """
+        rows = []
+        self.slices = {}
+        for greenhouse_id, rules in houses:
+            enabled = [rule for rule in rules if rule["enabled"]]
+            # 정렬이 안정적이므로 같은 장치/우선순위 안에서는 정의 순서 유지
+            enabled.sort(key=lambda rule: (DEVICES.index(rule["device"]), rule["priority"]))
+            if not enabled:
+                continue
+            start = len(rows)
+            rows.extend((greenhouse_id, rule) for rule in enabled)
+            devices = [rule["device"] for rule in enabled]
+            group_starts = np.array([i for i in range(len(devices)) if i == 0 or devices[i] != devices[i - 1]],
+                                    dtype=np.intp)
+            self.slices[greenhouse_id] = (start, len(rows), group_starts,
+                                          tuple(devices[i] for i in group_starts))
+
+        count = len(rows)
+        rules = [rule for _, rule in rows]
+        self.keys = [(greenhouse_id, rule["id"]) for greenhouse_id, rule in rows]
+        self.rules = rules
+        self.metric = np.array([METRICS.index(rule["metric"]) for rule in rules], dtype=np.intp)
+        self.sign = np.array([1.0 if rule["condition"] == "above" else -1.0 for rule in rules])
+        self.level = self.sign * np.array([rule["threshold"] for rule in rules], dtype=np.float64)
+        self.hysteresis = np.array([rule["hysteresis"] for rule in rules], dtype=np.float64)
+        self.action = np.array([rule["action"] == "on" for rule in rules], dtype=bool)
+        self.min_on = np.array([rule["min_on"] for rule in rules], dtype=np.float64)
+        self.min_off = np.array([rule["min_off"] for rule in rules], dtype=np.float64)
+        self.active = np.zeros(count, dtype=bool)
+        self._rank = np.arange(max((stop - start for start, stop, _, _ in self.slices.values()), default=0))
+
+        if previous is not None and count:
+            old = {key: i for i, key in enumerate(previous.keys)}
+            for i, key in enumerate(self.keys):
+                if key in old:
+                    self.active[i] = previous.active[old[key]]
+
+    def __len__(self):
+        return len(self.rules)
+
+    def evaluate(self, greenhouse_id, values):
+        """
+        온실 하나의 규칙을 평가합니다. (그 온실의 샘플러 스레드에서만 호출)
+
+        Args:
+            values (np.ndarray): METRICS 순서의 센서 값
+
+        Returns:
+            list: [(장치, 원하는 상태, 결정한 규칙 인덱스, 규칙 발동 여부), ...] 또는 규칙이 없으면 None
+                (발동한 규칙도 "on" 규칙도 없는 장치는 목록에서 빠짐)
+        """
+        entry = self.slices.get(greenhouse_id)
+        if entry is None:
+            return None
+        start, stop, group_starts, devices = entry
+        window = slice(start, stop)
+
+        x = self.sign[window] * values[self.metric[window]]
+        level = self.level[window]
+        active = (x >= level) | (self.active[window] & (x > level - self.hysteresis[window]))
+        self.active[window] = active
+
+        # 장치별로 발동한 규칙 중 첫 번째(우선순위 순)가 결정 - 발동하지 않은 규칙은 순위를 뒤로 미룸
+        count = stop - start
+        rank = self._rank[:count]
+        best = np.minimum.reduceat(np.where(active, rank, rank + count), group_starts)
+        fired = best < count
+        # 발동한 규칙이 없으면 첫 "on" 규칙이 해제된 것으로 보고 끔 ("off" 규칙의 반대로 켜지 않음)
+        first_on = np.minimum.reduceat(np.where(self.action[window], rank, rank + count), group_starts)
+        decided = fired | (first_on < count)
+        chosen = start + np.where(fired, best, first_on) % count
+        wanted = fired & self.action[chosen]
+        return [decision for decision, keep in
+                zip(zip(devices, wanted.tolist(), chosen.tolist(), fired.tolist()), decided.tolist()) if keep]
+
+
+class AutomationEngine:
+    """온실 매니저들의 샘플 틱마다 규칙 표를 평가해 장치를 제어합니다."""
+
+    def __init__(self, registry, store=None, manual_hold=AUTOMATION_MANUAL_HOLD):
+        """
+        Args:
+            registry (GreenhouseRegistry): 장치를 직접 소유하는 센서 매니저 레지스트리
+            store (RuleStore, optional): 규칙 저장소. 기본값은 AUTOMATION_RULES_PATH 파일.
+            manual_hold (float): 수동 제어 후 자동화에서 제외하는 시간 (초)
+        """
+        self.registry = registry
+        self.store = RuleStore() if store is None else store
+        self.manual_hold = manual_hold
+        self._lock = threading.Lock()
+        self._holds = {}         # (온실 ID, 장치) -> 제외 종료 시각 (monotonic)
+        self._last_change = {}   # (온실 ID, 장치) -> (마지막으로 본 상태, 바뀐 시각)
+        self.recent = deque(maxlen=RECENT_ACTIONS)
+        self.stats = {
+            "ticks": 0,
+            "evaluations": 0,
+            "eval_seconds": 0.0,
+            "commands": 0,
+            "dwell_blocked": 0,
+            "held": 0,
+            "errors": 0,
+        }
+        self.table = None
+        self.recompile()
+
+    def recompile(self):
+        """저장소의 설정으로 평가 표를 다시 만듭니다."""
+        with self._lock:
+            houses = []
+            for greenhouse_id in self.registry.ids():
+                enabled, rules, _ = self.store.get(greenhouse_id)
+                if enabled:
+                    houses.append((greenhouse_id, rules))
+            # 표 교체는 참조 하나만 바꾸므로 평가 중인 샘플러 스레드는 이전 표로 끝까지 진행
+            self.table = RuleTable(houses, previous=self.table)
+
+    def attach(self):
+        """모든 온실 매니저의 샘플 틱에 평가를 등록합니다."""
+        for _, manager in self.registry.items():
+            manager.subscribe(self.on_sample, samples_only=True)
+        return self
+
+    def hold(self, greenhouse_id, device, seconds=None):
+        """사용자가 장치를 직접 제어했을 때 호출 - 그 장치를 잠시 자동화에서 제외합니다."""
+        seconds = self.manual_hold if seconds is None else seconds
+        if seconds > 0:
+            self._holds[(greenhouse_id, device)] = time.monotonic() + seconds
+
+    def on_sample(self, snapshot, now=None):
+        """샘플러 틱마다 호출됩니다. 바꿔야 할 장치가 있으면 시리얼 링크로 바로 명령합니다."""
+        now = time.monotonic() if now is None else now
+        greenhouse_id = snapshot["greenhouse"]
+        devices = snapshot["devices"]
+        self.stats["ticks"] += 1
+
+        # 수동 제어를 포함한 모든 상태 변화 시각을 추적 (최소 유지 시간 기준)
+        for device in DEVICES:
+            state = bool(devices.get(device))
+            key = (greenhouse_id, device)
+            last = self._last_change.get(key)
+            if last is None:
+                self._last_change[key] = (state, float("-inf"))
+            elif last[0] != state:
+                self._last_change[key] = (state, now)
+
+        table = self.table
+        started = time.perf_counter()
+        decisions = table.evaluate(greenhouse_id, np.array([snapshot[metric] for metric in METRICS], dtype=np.float64))
+        if decisions is None:
+            return
+        self.stats["evaluations"] += 1
+        self.stats["eval_seconds"] += time.perf_counter() - started
+
+        for device, wanted, index, fired in decisions:
+            current = bool(devices.get(device))
+            if wanted == current:
+                continue
+            key = (greenhouse_id, device)
+            if self._holds.get(key, 0) > now:
+                self.stats["held"] += 1
+                continue
+            since = self._last_change[key][1]
+            dwell = table.min_on[index] if current else table.min_off[index]
+            if now - since < dwell:
+                self.stats["dwell_blocked"] += 1
+                continue
+            self._command(greenhouse_id, device, wanted, table.rules[index], fired, snapshot, now)
+
+    def _command(self, greenhouse_id, device, status, rule, fired, snapshot, now):
+        try:
+            success = self.registry.get(greenhouse_id).update_device(device, status)
+        except Exception as e:
+            success = False
+            print(f"[{greenhouse_id}] 자동화 장치 제어 오류 ({device}): {e}")
+        if not success:
+            self.stats["errors"] += 1
+            return
+        self._last_change[(greenhouse_id, device)] = (status, now)
+        self.stats["commands"] += 1
+        self.recent.append({
+            "greenhouse": greenhouse_id,
+            "device": device,
+            "status": status,
+            "rule": rule["id"],
+            "reason": f"{rule['metric']}={snapshot[rule['metric']]} "
+                      f"{'≥' if rule['condition'] == 'above' else '≤'} {rule['threshold']}"
+                      + ("" if fired else " 해제"),
+            "time": time.time(),
+        })
+        print(f"[{greenhouse_id}] 자동화: {device} {'ON' if status else 'OFF'} (규칙 {rule['id']})")
+
+    def update(self, greenhouse_id, enabled=None, rules=None, reset_rules=False):
+        """
+        온실 하나의 자동화 설정을 바꾸고 평가 표를 다시 만듭니다.
+
+        Raises:
+            KeyError: 등록되지 않은 온실
+            ValueError: 규칙 형식이 잘못된 경우
+        """
+        if greenhouse_id not in self.registry:
+            raise KeyError(greenhouse_id)
+        self.store.update(greenhouse_id, enabled=enabled,
+                          rules=None if rules is None else parse_rules(rules), reset_rules=reset_rules)
+        self.recompile()
+        return self.get_status(greenhouse_id)
+
+    def get_status(self, greenhouse_id):
+        enabled, rules, custom = self.store.get(greenhouse_id)
+        table = self.table
+        active = {rule_id: bool(table.active[i])
+                  for i, (house, rule_id) in enumerate(table.keys) if house == greenhouse_id}
+        now = time.monotonic()
+        holds = {device: round(until - now, 1)
+                 for (house, device), until in list(self._holds.items()) if house == greenhouse_id and until > now}
+        stats = dict(self.stats)
+        evaluations = stats.pop("eval_seconds")
+        stats["avg_eval_us"] = round(evaluations / stats["evaluations"] * 1e6, 2) if stats["evaluations"] else None
+        stats["compiled_rules"] = len(table)
+        return {
+            "greenhouse": greenhouse_id,
+            "enabled": enabled,
+            "custom_rules": custom,
+            "rules": [{**rule, "active": active.get(rule["id"], False)} for rule in rules],
+            "holds": holds,
+            "recent": [action for action in self.recent if action["greenhouse"] == greenhouse_id],
+            "stats": stats,
+        }
+
+
+class RemoteAutomation:
+    """공유 모드 웹 워커 쪽 - 자동화 조회/변경을 수집 데몬에 요청합니다. (규칙 평가는 데몬만)"""
+
+    def __init__(self, control=None):
+        self.control = ControlClient() if control is None else control
+
+    def _request(self, command, greenhouse_id, **params):
+        try:
+            response = self.control.request({"cmd": command, "greenhouse": greenhouse_id, **params})
+        except OSError as e:
+            raise ConnectionError(f"수집 데몬에 연결할 수 없습니다: {e}") from e
+        if not response.get("success"):
+            raise ValueError(response.get("error", "자동화 요청 실패"))
+        return response["automation"]
+
+    def hold(self, greenhouse_id, device, seconds=None):
+        pass  # 데몬이 update_device 제어 요청을 받을 때 직접 처리
+
+    def update(self, greenhouse_id, enabled=None, rules=None, reset_rules=False):
+        return self._request("automation_update", greenhouse_id,
+                             enabled=enabled, rules=rules, reset_rules=reset_rules)
+
+    def get_status(self, greenhouse_id):
+        return self._request("automation_status", greenhouse_id)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+아두이노 텍스트 텔레메트리 파서 벤치마크 스크립트
+기존 방식(항목마다 re.search 다섯 번 + 항목별 print)과 parse_text_telemetry()의 초당 처리 줄 수를 비교합니다.
+바이너리 프레임 해석(decode_frame) 속도도 함께 출력합니다.
+
+사용 예:
+    python bench_arduino_parser.py
+    python bench_arduino_parser.py --corpus captured_lines.txt --repeat 20
+"""
+import argparse
+import contextlib
+import io
+import random
+import re
+import time
+
+from arduino_protocol import parse_text_telemetry, decode_frame, encode_frame
+
+
+def legacy_parse(data_line):
+    """기존 SensorDataManager._parse_arduino_data의 파싱 부분 (비교용)"""
+    data = {}
+    print(f"[DEBUG] 아두이노 원시 데이터: {data_line}")
+    temp_match = re.search(r'온도:\s*([\d.]+)', data_line)
+    humidity_match = re.search(r'습도:\s*([\d.]+)', data_line)
+    co2_match = re.search(r'CO2:\s*(\d+)', data_line)
+    light_match = re.search(r'조도:\s*(\d+)', data_line)
+    soil_match = re.search(r'토양\s*수분:\s*(\d+)', data_line)
+    if temp_match:
+        data['temperature'] = float(temp_match.group(1))
+        print(f"[DEBUG] 온도 파싱: {temp_match.group(1)}")
+    if humidity_match:
+        data['humidity'] = float(humidity_match.group(1))
+        print(f"[DEBUG] 습도 파싱: {humidity_match.group(1)}")
+    if co2_match:
+        data['co2'] = int(co2_match.group(1))
+        print(f"[DEBUG] CO2 파싱: {co2_match.group(1)}")
+    if light_match:
+        data['light'] = int(light_match.group(1))
+        print(f"[DEBUG] 조도 파싱: {light_match.group(1)}")
+    if soil_match:
+        soil_raw = int(soil_match.group(1))
+        data['soil'] = round(max(0, 100 - (soil_raw / 1023 * 100)), 1)
+        print(f"[DEBUG] 토양수분 파싱: {soil_raw} -> {data['soil']}%")
+    return data
+
+
+def make_corpus(size, seed=42):
+    """펌웨어 출력 형식의 줄 모음 (상태 메시지 등 텔레메트리가 아닌 줄 포함)"""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(size):
+        roll = rng.random()
+        if roll < 0.8:
+            lines.append(
+                f"온도: {rng.uniform(10, 35):.1f} °C, 습도: {rng.uniform(30, 90):.1f} %, "
+                f"CO2: {rng.randint(300, 1500)}, 조도: {rng.randint(1, 1000)}, 토양 수분: {rng.randint(0, 1023)}"
+            )
+        elif roll < 0.9:
+            lines.append(f"온도: {rng.uniform(10, 35):.1f} °C, 토양 수분: {rng.randint(0, 1023)}")
+        else:
+            lines.append(rng.choice(["=== 시스템 상태 ===", "팬: ON", "펌프: OFF", "자동 모드 활성화"]))
+    return lines
+
+
+def lines_per_second(parse, lines, repeat):
+    # 기존 방식의 print 비용은 포함하되 터미널 출력 속도는 제외
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for line in lines:
+                parse(line)
+        elapsed = time.perf_counter() - started
+    return len(lines) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="아두이노 텍스트 텔레메트리 파서 벤치마크")
+    parser.add_argument("--corpus", help="캡처한 시리얼 줄 파일 (없으면 형식에 맞춰 생성)")
+    parser.add_argument("--lines", type=int, default=5000, help="생성할 줄 수")
+    parser.add_argument("--repeat", type=int, default=10, help="반복 횟수")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8", errors="ignore") as f:
+            lines = [line.strip() for line in f if line.strip()]
+    else:
+        lines = make_corpus(args.lines)
+
+    mismatches = sum(1 for line in lines if parse_text_telemetry(line) != legacy_parse_quiet(line))
+    print(f"줄 {len(lines)}개, 기존 파서와 결과가 다른 줄: {mismatches}개")
+
+    legacy = lines_per_second(legacy_parse, lines, args.repeat)
+    single = lines_per_second(parse_text_telemetry, lines, args.repeat)
+    print(f"기존 (re.search x5 + print) : {legacy:12,.0f} 줄/초")
+    print(f"단일 패턴 (parse_text_telemetry): {single:12,.0f} 줄/초 ({single / legacy:.1f}배)")
+
+    frame = memoryview(encode_frame(1, 25.0, 60.0, 400, 300, 512))
+    started = time.perf_counter()
+    count = 200000
+    for _ in range(count):
+        decode_frame(frame)
+    print(f"바이너리 프레임 (decode_frame)  : {count / (time.perf_counter() - started):12,.0f} 프레임/초")
+
+
+def legacy_parse_quiet(line):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return legacy_parse(line)
+
+
+if __name__ == "__main__":
+    main()
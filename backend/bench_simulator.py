@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+벡터화 온실 시뮬레이터 벤치마크 스크립트
+온실 수별로 한 틱(step) 진행에 걸리는 시간을 측정하고,
+같은 시드로 만든 두 시뮬레이터가 같은 값을 내는지 확인합니다.
+
+사용 예:
+    python bench_simulator.py
+    python bench_simulator.py --houses 1,100,10000,100000 --ticks 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from greenhouse_sim import VectorSimulator, DEVICES
+
+
+def bench(houses, ticks, seed):
+    sim = VectorSimulator(houses=houses, seed=seed)
+    # 장치 상태를 온실마다 섞어서 모든 규칙이 적용되도록 함
+    sim.devices[:] = np.random.default_rng(seed).random((houses, len(DEVICES))) < 0.5
+
+    sim.step()  # 워밍업
+    started = time.perf_counter()
+    for _ in range(ticks):
+        sim.step()
+    elapsed = time.perf_counter() - started
+    return elapsed / ticks
+
+
+def check_reproducible(seed, houses=100, ticks=50):
+    a = VectorSimulator(houses=houses, seed=seed)
+    b = VectorSimulator(houses=houses, seed=seed)
+    a.devices[::3, :] = True
+    b.devices[::3, :] = True
+    for _ in range(ticks):
+        a.step()
+        b.step()
+    return np.array_equal(a.values, b.values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터화 온실 시뮬레이터 벤치마크")
+    parser.add_argument("--houses", default="1,100,1000,10000", help="온실 수 목록")
+    parser.add_argument("--ticks", type=int, default=500, help="측정할 틱 수")
+    parser.add_argument("--seed", type=int, default=42, help="난수 시드")
+    args = parser.parse_args()
+
+    print(f"같은 시드 재현: {'OK' if check_reproducible(args.seed) else '실패'}")
+    for houses in (int(h) for h in args.houses.split(",")):
+        per_tick = bench(houses, args.ticks, args.seed)
+        print(f"온실 {houses:>7}개 | 틱당 {per_tick * 1000:8.3f}ms | 온실당 {per_tick / houses * 1e9:8.1f}ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+앱 시작 시간 벤치마크 스크립트
+1) python -X importtime으로 `import app`의 임포트 시간과 가장 무거운 모듈을 측정하고
+2) 서버 프로세스를 새로 띄워 첫 응답, 첫 200 응답(/api/status), 준비 완료(/api/ready 200)까지의 시간을 잽니다.
+결과는 기록 파일에 한 줄씩(JSON) 추가하고 직전 기록과 비교해 시작 시간 변화를 추적합니다.
+
+사용 예:
+    python bench_startup.py
+    GREENHOUSES=gh1,gh2:sim python bench_startup.py --runs 5 --history /var/lib/greenhouse/startup.jsonl
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SERVER_CODE = (
+    "import sys\n"
+    "from werkzeug.serving import run_simple\n"
+    "from app import create_app\n"
+    "run_simple('127.0.0.1', int(sys.argv[1]), create_app(), threaded=True)\n"
+)
+
+
+def measure_imports(module="app"):
+    """
+    Returns:
+        tuple: (임포트 전체 시간(초), [(모듈, 자체 시간(초)), ...] 자체 시간 순)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND_DIR, capture_output=True, text=True)
+    modules = []
+    total = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us) / 1e6))
+        if name.strip() == module:
+            total = int(cumulative_us) / 1e6
+    if total is None:
+        raise RuntimeError(f"{module} 임포트 실패:\n{result.stderr[-2000:]}")
+    return total, sorted(modules, key=lambda item: item[1], reverse=True)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None
+
+
+def measure_serving(path, timeout):
+    """
+    서버를 띄워 시작 시점부터의 시간을 잽니다.
+
+    Returns:
+        dict: first_response, first_200, ready (초, 시간 초과면 None)
+    """
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-c", SERVER_CODE, str(port)], cwd=BACKEND_DIR,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {"first_response": None, "first_200": None, "ready": None}
+    try:
+        while time.perf_counter() - started < timeout and server.poll() is None:
+            elapsed = time.perf_counter() - started
+            if result["first_200"] is None:
+                status = _get_status(base + path)
+                if status is not None and result["first_response"] is None:
+                    result["first_response"] = elapsed
+                if status == 200:
+                    result["first_200"] = time.perf_counter() - started
+            if result["first_response"] is not None and result["ready"] is None:
+                if _get_status(base + "/api/ready") == 200:
+                    result["ready"] = time.perf_counter() - started
+            if result["first_200"] is not None and result["ready"] is not None:
+                break
+            time.sleep(0.02)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _median(values):
+    values = [value for value in values if value is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+def _load_previous(history_path):
+    if not history_path or not os.path.exists(history_path):
+        return None
+    with open(history_path, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def _format_seconds(value):
+    return "시간 초과" if value is None else f"{value * 1000:8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="앱 시작 시간 벤치마크")
+    parser.add_argument("--runs", type=int, default=3, help="반복 횟수 (중앙값 기록)")
+    parser.add_argument("--path", default="/api/status", help="첫 200 응답을 확인할 경로")
+    parser.add_argument("--timeout", type=float, default=60, help="서버 한 번당 최대 대기 시간 (초)")
+    parser.add_argument("--top", type=int, default=10, help="출력할 무거운 모듈 수")
+    parser.add_argument("--history", default=os.path.join(BACKEND_DIR, "bench_startup_history.jsonl"),
+                        help="결과를 추가할 기록 파일 (빈 문자열이면 기록하지 않음)")
+    args = parser.parse_args()
+
+    import_times, serving = [], []
+    heaviest = []
+    for _ in range(args.runs):
+        total, modules = measure_imports()
+        import_times.append(total)
+        heaviest = heaviest or modules[:args.top]
+        serving.append(measure_serving(args.path, args.timeout))
+
+    record = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "import_app": _median(import_times),
+        "first_response": _median([run["first_response"] for run in serving]),
+        "first_200": _median([run["first_200"] for run in serving]),
+        "ready": _median([run["ready"] for run in serving]),
+    }
+    previous = _load_previous(args.history)
+
+    print(f"무거운 모듈 (자체 임포트 시간, 상위 {args.top}개):")
+    for name, seconds in heaviest:
+        print(f"  {name:40s} {seconds * 1000:8.1f} ms")
+    print(f"\n중앙값 ({args.runs}회):")
+    for key, label in [("import_app", "import app"), ("first_response", "첫 응답"),
+                       ("first_200", f"첫 200 ({args.path})"), ("ready", "준비 완료 (/api/ready)")]:
+        line = f"  {label:28s} {_format_seconds(record[key])}"
+        if previous and previous.get(key) and record[key]:
+            line += f"  (직전 {previous.get('commit')}: {_format_seconds(previous[key]).strip()}, " \
+                    f"{(record[key] / previous[key] - 1) * 100:+.0f}%)"
+        print(line)
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"\n기록 추가: {args.history}")
+
+
+if __name__ == "__main__":
+    main()
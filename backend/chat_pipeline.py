@@ -0,0 +1,516 @@
+"""
+채팅 처리 파이프라인 모듈
+Flask(동기) /api/chat과 ASGI(비동기) /api/chat이 공유하는 프롬프트 구성과
+응답 태그([WEATHER_REQUEST], [HISTORY_REQUEST:...], [ACTION_...]) 처리 로직입니다.
+태그 조회는 동기(resolve_tags)와 비동기(resolve_tags_async) 두 가지로 제공하며
+결과 반영(apply_tag_results)은 공통입니다.
+장치 제어 태그는 ActionRunner가 서버에서 바로 실행하고 응답에서 지우므로
+앱이 태그를 해석해 /api/control을 다시 호출할 필요가 없습니다.
+"""
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import influx_storage
+import weather_api
+from prompt_manager import get_chatbot_prompt, get_image_prompt, prompt_manager
+
+WEATHER_TAG = "[WEATHER_REQUEST]"
+# 시각 자체에 ':'가 들어가므로 마지막 ':' 뒤를 메트릭으로 봄 ([HISTORY_REQUEST:2024-01-15_14:30:00:temperature])
+HISTORY_TAG_PATTERN = re.compile(r'\[HISTORY_REQUEST:([^\]]+):([A-Za-z0-9_]+)\]')
+HISTORY_TIME_FORMAT = "%Y-%m-%d_%H:%M:%S"
+HISTORY_TOLERANCE_MINUTES = 30
+HISTORY_ERROR_MESSAGE = "데이터 조회 중 오류가 발생했습니다."
+
+# 스트리밍 중 태그 경계 판단용 - 이 접두사로 시작하는 미완성 조각만 다음 청크까지 보류
+HISTORY_TAG_PREFIX = "[HISTORY_REQUEST:"
+ACTION_TAG_PREFIX = "[ACTION_"
+ACTION_TAG_PATTERN = re.compile(r'\[ACTION_[A-Z_]+\]')
+MAX_TAG_LENGTH = 64
+
+# 액션 태그 이름의 마지막 단어 -> 장치 상태 (prompts.yaml action_tags의 light_on, window_open 등)
+ACTION_STATES = {"on": True, "off": False, "open": True, "close": False}
+# 태그를 지운 자리에 남는 공백 정리 ("켰습니다. [ACTION_LIGHT_ON] [ACTION_FAN_ON]" -> "켰습니다.")
+_LINE_END_SPACES = re.compile(r'[ \t]+\n')
+_REPEATED_SPACES = re.compile(r'[ \t]{2,}')
+
+# 스트리밍 경로에서 날씨 조회를 응답 생성과 동시에 진행하기 위한 스레드 풀
+_tag_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chat-tag")
+
+
+def _current_snapshot():
+    return _current_manager().get_snapshot()
+
+
+def _current_manager():
+    # 센서 레지스트리는 앱 시작 작업이 만들며, 스크립트처럼 직접 호출한 경우에만 여기서 초기화
+    from sensors import init_sensors
+    return init_sensors().default
+
+
+def format_conversation(history):
+    """
+    대화 기록을 프롬프트용 텍스트로 변환합니다.
+
+    Args:
+        history (list): get_recent_chat 결과 (마지막 항목은 방금 저장한 사용자 메시지)
+    """
+    conversation_text = ""
+    for msg in history[:-1]:  # 방금 저장한 메시지 제외
+        role_name = "사용자" if msg["role"] == "user" else "봇"
+        conversation_text += f"{role_name}: {msg['content']}\n"
+    return conversation_text
+
+
+def build_chat_prompt(user_message, user_location, conversation_text):
+    """현재 센서 스냅샷과 대화 기록으로 챗봇 프롬프트를 구성합니다."""
+    snapshot = _current_snapshot()
+    return get_chatbot_prompt(
+        temperature=snapshot['temperature'],
+        humidity=snapshot['humidity'],
+        soil=snapshot['soil'],
+        power=snapshot['power'],
+        co2=snapshot['co2'],
+        device_status=snapshot['devices'],
+        user_location=user_location,
+        current_time=datetime.now().strftime("%Y년 %m월 %d일 %H시 %M분"),
+        conversation_text=conversation_text,
+        user_message=user_message
+    )
+
+
+def build_image_prompt(user_prompt):
+    """이미지 분석 프롬프트를 구성합니다. 사용자 프롬프트가 없으면 설정의 기본 프롬프트를 사용합니다."""
+    if not user_prompt:
+        user_prompt = prompt_manager.config.get('image_analysis_prompts', {}).get('default_prompt', '이 이미지의 온실 식물 상태를 분석하고 조언해주세요.')
+
+    snapshot = _current_snapshot()
+    return get_image_prompt(
+        user_prompt=user_prompt,
+        temperature=snapshot['temperature'],
+        humidity=snapshot['humidity'],
+        soil=snapshot['soil']
+    )
+
+
+def find_history_requests(text):
+    """
+    응답에 포함된 과거 데이터 요청 태그를 찾습니다.
+
+    Returns:
+        list: (태그 문자열, 시각 문자열, 메트릭) 목록 (중복 제거)
+    """
+    found = []
+    seen = set()
+    for match in HISTORY_TAG_PATTERN.finditer(text):
+        tag = match.group(0)
+        if tag not in seen:
+            seen.add(tag)
+            found.append((tag, match.group(1), match.group(2)))
+    return found
+
+
+def action_commands():
+    """
+    prompts.yaml의 action_tags로 태그 -> 장치 명령 표를 만듭니다.
+
+    Returns:
+        dict: 태그 문자열 -> (장치, 상태)
+    """
+    commands = {}
+    for key, tag in prompt_manager.config.get('action_tags', {}).items():
+        device, _, verb = key.rpartition("_")
+        if device and verb in ACTION_STATES:
+            commands[tag] = (device, ACTION_STATES[verb])
+    return commands
+
+
+class ActionRunner:
+    """
+    응답의 장치 제어 태그를 나온 순서대로 실행하고 결과를 모읍니다. (요청 하나에 하나)
+    같은 장치에 태그가 여러 번 나오면 마지막 태그의 상태가 남습니다.
+    """
+
+    def __init__(self, manager=None, apply=None):
+        """
+        Args:
+            manager: 장치를 제어할 센서 매니저. 기본값은 기본 온실.
+            apply (callable): (manager, 장치, 상태) -> 성공 여부. 기본값은 manager.update_device.
+        """
+        self._manager = manager
+        self.apply = apply or (lambda target, device, status: target.update_device(device, status))
+        self.commands = action_commands()
+        self.tags = []
+        self.actions = []
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            self._manager = _current_manager()
+        return self._manager
+
+    def run(self, tag):
+        """태그 하나를 실행합니다. 알 수 없는 태그는 실행하지 않고 버립니다."""
+        command = self.commands.get(tag)
+        if command is None:
+            print(f"알 수 없는 액션 태그 무시: {tag}")
+            return
+        device, status = command
+        result = {"device": device, "status": status, "success": False}
+        try:
+            result["success"] = bool(self.apply(self.manager, device, status))
+        except ConnectionError as e:
+            result["error"] = str(e)
+        print(f"액션 태그 실행: {tag} -> {device} {'ON' if status else 'OFF'} ({'성공' if result['success'] else '실패'})")
+        self.tags.append(tag)
+        self.actions.append(result)
+
+    def run_all(self, text):
+        """응답의 모든 액션 태그를 한 번의 탐색으로 실행하고, 태그를 지운 응답을 반환합니다."""
+        parts = []
+        last = 0
+        for match in ACTION_TAG_PATTERN.finditer(text):
+            parts.append(text[last:match.start()])
+            self.run(match.group(0))
+            last = match.end()
+        if not parts:
+            return text
+        parts.append(text[last:])
+        return _collapse_spaces("".join(parts))
+
+    def history_text(self, response):
+        """대화 기록에 저장할 응답 - 실행한 태그를 남겨 이후 응답도 같은 형식으로 태그를 내도록 함"""
+        return f"{response} {' '.join(self.tags)}" if self.tags else response
+
+    def result(self):
+        """응답에 함께 보낼 실행 결과와 실행 후 장치 상태"""
+        return {"actions": self.actions, "devices": dict(self.manager.device_status)}
+
+
+def _collapse_spaces(text):
+    return _REPEATED_SPACES.sub(' ', _LINE_END_SPACES.sub('\n', text)).strip()
+
+
+def fetch_weather_message(user_location):
+    """현재 날씨 안내 문구를 가져옵니다. 실패하면 None."""
+    try:
+        weather_data = weather_api.get_current_weather(user_location)
+        if weather_data["success"]:
+            return weather_api.format_current_weather_message(weather_data)
+        print(f"날씨 정보 가져오기 실패: {weather_data.get('error', '알 수 없는 오류')}")
+    except Exception as weather_error:
+        print(f"날씨 정보 처리 오류: {str(weather_error)}")
+    return None
+
+
+def parse_history_time(timestamp_str):
+    """태그의 시각 문자열을 파싱합니다. 형식이 잘못되면 None."""
+    try:
+        return datetime.strptime(timestamp_str, HISTORY_TIME_FORMAT)
+    except ValueError as parse_error:
+        print(f"시간 파싱 오류: {timestamp_str} - {str(parse_error)}")
+        return None
+
+
+def invalid_time_message(timestamp_str):
+    return f"시간 형식을 인식할 수 없습니다: {timestamp_str}"
+
+
+def apply_tag_results(text, weather_requested, weather_message, history_results):
+    """
+    조회 결과를 응답에 반영합니다.
+
+    Args:
+        text (str): Gemini 응답 원문
+        weather_requested (bool): 날씨 태그 포함 여부
+        weather_message (str): 날씨 안내 문구 (실패 시 None - 태그만 제거)
+        history_results (dict): 태그 문자열 -> 대체 문구 (None이면 조회 전체 실패)
+    """
+    if weather_requested:
+        text = text.replace(WEATHER_TAG, "").strip()
+        if weather_message:
+            text += f"\n\n{weather_message}"
+
+    if history_results is None:
+        # 조회 중 예외가 나면 모든 HISTORY_REQUEST 태그를 오류 문구로 대체
+        return HISTORY_TAG_PATTERN.sub(HISTORY_ERROR_MESSAGE, text)
+    for tag, replacement in history_results.items():
+        text = text.replace(tag, replacement)
+    return text
+
+
+def resolve_tags(text, user_location):
+    """응답의 태그를 동기 조회 결과로 바꿉니다. (Flask 경로)"""
+    weather_requested = WEATHER_TAG in text
+    weather_message = fetch_weather_message(user_location) if weather_requested else None
+
+    history_results = {}
+    history_requests = find_history_requests(text)
+    if history_requests:
+        print(f"과거 데이터 요청 태그 감지: {len(history_requests)}개")
+        try:
+            for tag, timestamp_str, metric in history_requests:
+                target_time = parse_history_time(timestamp_str)
+                if target_time is None:
+                    history_results[tag] = invalid_time_message(timestamp_str)
+                    continue
+                result = influx_storage.get_historical_sensor_data(target_time, metric, HISTORY_TOLERANCE_MINUTES)
+                history_results[tag] = result['message']
+        except Exception as history_error:
+            print(f"과거 데이터 처리 오류: {str(history_error)}")
+            history_results = None
+
+    return apply_tag_results(text, weather_requested, weather_message, history_results)
+
+
+async def resolve_tags_async(text, user_location, history_lookup):
+    """
+    응답의 태그를 비동기로 조회해 바꿉니다. (ASGI 경로)
+    날씨와 과거 데이터 조회를 동시에 진행합니다.
+
+    Args:
+        history_lookup (coroutine function): (target_time, metric, tolerance_minutes) -> 조회 결과 dict
+    """
+    weather_requested = WEATHER_TAG in text
+    history_requests = find_history_requests(text)
+
+    # 날씨 조회는 발표 슬롯 캐시를 거치는 동기 함수이므로 스레드에서 과거 데이터 조회와 동시에 실행
+    weather_task = None
+    if weather_requested:
+        weather_task = asyncio.create_task(asyncio.to_thread(fetch_weather_message, user_location))
+
+    async def lookup(timestamp_str, metric):
+        target_time = parse_history_time(timestamp_str)
+        if target_time is None:
+            return invalid_time_message(timestamp_str)
+        result = await history_lookup(target_time, metric, HISTORY_TOLERANCE_MINUTES)
+        return result['message']
+
+    history_results = {}
+    if history_requests:
+        print(f"과거 데이터 요청 태그 감지: {len(history_requests)}개")
+        try:
+            replacements = await asyncio.gather(
+                *(lookup(timestamp_str, metric) for _, timestamp_str, metric in history_requests))
+            history_results = {tag: replacement for (tag, _, _), replacement in zip(history_requests, replacements)}
+        except Exception as history_error:
+            print(f"과거 데이터 처리 오류: {str(history_error)}")
+            history_results = None
+
+    weather_message = await weather_task if weather_task else None
+    return apply_tag_results(text, weather_requested, weather_message, history_results)
+
+
+class TagStreamProcessor:
+    """
+    Gemini 스트리밍 조각을 받아 일반 텍스트와 태그를 분리합니다.
+    태그가 청크 경계에 걸칠 수 있는 부분('['부터 태그 접두사와 일치하는 구간)만 보류하고
+    나머지 텍스트는 바로 내보냅니다.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """
+        조각을 추가하고 확정된 구간을 반환합니다.
+
+        Returns:
+            list: ("text", 문자열) | ("weather", 태그) | ("history", 태그, 시각 문자열, 메트릭) | ("action", 태그)
+        """
+        self._buffer += chunk
+        segments = []
+        while self._buffer:
+            index = self._buffer.find("[")
+            if index == -1:
+                segments.append(("text", self._buffer))
+                self._buffer = ""
+                break
+            if index > 0:
+                segments.append(("text", self._buffer[:index]))
+                self._buffer = self._buffer[index:]
+
+            if self._buffer.startswith(WEATHER_TAG):
+                segments.append(("weather", WEATHER_TAG))
+                self._buffer = self._buffer[len(WEATHER_TAG):]
+                continue
+            match = HISTORY_TAG_PATTERN.match(self._buffer) or ACTION_TAG_PATTERN.match(self._buffer)
+            if match:
+                tag = match.group(0)
+                if tag.startswith(ACTION_TAG_PREFIX):
+                    segments.append(("action", tag))
+                else:
+                    segments.append(("history", tag, match.group(1), match.group(2)))
+                self._buffer = self._buffer[match.end():]
+                continue
+            if self._may_be_tag(self._buffer):
+                break
+            # 태그가 아닌 '['는 그대로 내보냄
+            segments.append(("text", "["))
+            self._buffer = self._buffer[1:]
+        return self._merge(segments)
+
+    def finish(self):
+        """스트림이 끝나면 보류 중인 조각을 텍스트로 내보냅니다."""
+        rest, self._buffer = self._buffer, ""
+        return [("text", rest)] if rest else []
+
+    @staticmethod
+    def _may_be_tag(pending):
+        if "]" in pending or len(pending) > MAX_TAG_LENGTH:
+            return False
+        for prefix in (WEATHER_TAG, HISTORY_TAG_PREFIX, ACTION_TAG_PREFIX):
+            if prefix.startswith(pending) or pending.startswith(prefix):
+                return True
+        return False
+
+    @staticmethod
+    def _merge(segments):
+        merged = []
+        for segment in segments:
+            if segment[0] == "text" and merged and merged[-1][0] == "text":
+                merged[-1] = ("text", merged[-1][1] + segment[1])
+            else:
+                merged.append(segment)
+        return merged
+
+
+def _stream_event(event_type, **data):
+    return {"type": event_type, "data": data}
+
+
+class _StreamAssembler:
+    """스트리밍으로 내보낸 텍스트를 모아 /api/chat과 같은 최종 응답 문자열을 만듭니다."""
+
+    def __init__(self, actions):
+        self.parts = []
+        self.actions = actions
+
+    def text(self, value):
+        self.parts.append(value)
+        return _stream_event("chunk", text=value)
+
+    def action(self, tag):
+        # 장치 제어 태그는 화면에 흘려보내지 않고 나오는 즉시 실행
+        self.actions.run(tag)
+
+    def finish(self, weather_message):
+        response = "".join(self.parts)
+        response = _collapse_spaces(response) if self.actions.tags else response.strip()
+        events = []
+        if weather_message:
+            response += f"\n\n{weather_message}"
+            events.append(_stream_event("chunk", text=f"\n\n{weather_message}"))
+        return response, events
+
+
+def stream_chat(chunks, user_location, actions=None):
+    """
+    Gemini 텍스트 조각을 태그 처리하며 스트림 이벤트로 바꿉니다. (Flask 경로)
+
+    Args:
+        chunks (iterable): 텍스트 조각
+        user_location (str): 날씨 조회 지역
+        actions (ActionRunner, optional): 장치 제어 태그 실행기. 기본값은 기본 온실.
+
+    Yields:
+        dict: {"type": "chunk", "data": {"text"}} ... 마지막에 {"type": "done", "data": {"response", "actions", "devices"}}
+    """
+    actions = ActionRunner() if actions is None else actions
+    processor = TagStreamProcessor()
+    assembler = _StreamAssembler(actions)
+    weather_future = None
+
+    def handle(segments):
+        nonlocal weather_future
+        for segment in segments:
+            kind = segment[0]
+            if kind == "text":
+                yield assembler.text(segment[1])
+            elif kind == "action":
+                assembler.action(segment[1])
+            elif kind == "weather":
+                # 날씨 태그는 응답 끝에 붙이므로 생성이 끝날 때까지 백그라운드에서 조회
+                if weather_future is None:
+                    weather_future = _tag_executor.submit(fetch_weather_message, user_location)
+            elif kind == "history":
+                _, tag, timestamp_str, metric = segment
+                yield assembler.text(_lookup_history_sync(timestamp_str, metric))
+
+    for chunk in chunks:
+        yield from handle(processor.feed(chunk))
+    yield from handle(processor.finish())
+
+    weather_message = weather_future.result() if weather_future else None
+    response, events = assembler.finish(weather_message)
+    yield from events
+    yield _stream_event("done", response=response, **actions.result())
+
+
+async def stream_chat_async(chunks, user_location, history_lookup, actions=None):
+    """
+    stream_chat의 비동기 버전 (ASGI 경로)
+
+    Args:
+        chunks (async iterable): 텍스트 조각
+        history_lookup (coroutine function): (target_time, metric, tolerance_minutes) -> 조회 결과 dict
+        actions (ActionRunner, optional): 장치 제어 태그 실행기. 기본값은 기본 온실.
+    """
+    actions = ActionRunner() if actions is None else actions
+    processor = TagStreamProcessor()
+    assembler = _StreamAssembler(actions)
+    weather_task = None
+
+    async def history_text(timestamp_str, metric):
+        target_time = parse_history_time(timestamp_str)
+        if target_time is None:
+            return invalid_time_message(timestamp_str)
+        try:
+            result = await history_lookup(target_time, metric, HISTORY_TOLERANCE_MINUTES)
+            return result['message']
+        except Exception as history_error:
+            print(f"과거 데이터 처리 오류: {str(history_error)}")
+            return HISTORY_ERROR_MESSAGE
+
+    async def handle(segments):
+        nonlocal weather_task
+        events = []
+        for segment in segments:
+            kind = segment[0]
+            if kind == "text":
+                events.append(assembler.text(segment[1]))
+            elif kind == "action":
+                # 장치 명령은 제어 소켓/시리얼 쓰기를 거치므로 이벤트 루프 밖에서 실행
+                await asyncio.to_thread(assembler.action, segment[1])
+            elif kind == "weather":
+                if weather_task is None:
+                    weather_task = asyncio.create_task(asyncio.to_thread(fetch_weather_message, user_location))
+            elif kind == "history":
+                _, tag, timestamp_str, metric = segment
+                events.append(assembler.text(await history_text(timestamp_str, metric)))
+        return events
+
+    async for chunk in chunks:
+        for event in await handle(processor.feed(chunk)):
+            yield event
+    for event in await handle(processor.finish()):
+        yield event
+
+    weather_message = await weather_task if weather_task else None
+    response, events = assembler.finish(weather_message)
+    for event in events:
+        yield event
+    yield _stream_event("done", response=response, **actions.result())
+
+
+def _lookup_history_sync(timestamp_str, metric):
+    target_time = parse_history_time(timestamp_str)
+    if target_time is None:
+        return invalid_time_message(timestamp_str)
+    try:
+        result = influx_storage.get_historical_sensor_data(target_time, metric, HISTORY_TOLERANCE_MINUTES)
+        return result['message']
+    except Exception as history_error:
+        print(f"과거 데이터 처리 오류: {str(history_error)}")
+        return HISTORY_ERROR_MESSAGE
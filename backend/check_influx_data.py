@@ -2,7 +2,9 @@
 """
 InfluxDB 데이터 직접 확인 스크립트
 """
-from influx_storage import influx_manager
+from influx_storage import init_storage
+
+influx_manager = init_storage()
 
 def check_influx_temperature_data():
     """InfluxDB에 저장된 온도 데이터를 확인합니다."""
@@ -14,17 +16,7 @@ def check_influx_temperature_data():
     
     try:
         # 최근 온도 데이터 조회
-        query = '''
-        from(bucket: "smart_greenhouse")
-            |> range(start: -2h)
-            |> filter(fn: (r) => r._measurement == "sensor_data")
-            |> filter(fn: (r) => r.metric == "temperature")
-            |> filter(fn: (r) => r._field == "value")
-            |> sort(columns: ["_time"])
-            |> tail(n: 10)
-        '''
-        
-        result = influx_manager.query_api.query(org="iotctd", query=query)
+        result = influx_manager.run_query("recent_metric_values", metric="temperature", limit=10)
         
         print("📊 최근 10개 온도 데이터:")
         print("   시간                    | 값     | 모드")
@@ -64,17 +56,7 @@ def check_influx_soil_data():
     
     try:
         # 최근 토양 습도 데이터 조회
-        query = '''
-        from(bucket: "smart_greenhouse")
-            |> range(start: -2h)
-            |> filter(fn: (r) => r._measurement == "sensor_data")
-            |> filter(fn: (r) => r.metric == "soil")
-            |> filter(fn: (r) => r._field == "value")
-            |> sort(columns: ["_time"])
-            |> tail(n: 20)
-        '''
-        
-        result = influx_manager.query_api.query(org="iotctd", query=query)
+        result = influx_manager.run_query("recent_metric_values", metric="soil", limit=20)
         
         print("📊 최근 20개 토양 습도 데이터:")
         print("   시간                    | 값      | 모드")
@@ -113,16 +95,7 @@ def check_data_sources():
     
     try:
         # 모드별 데이터 개수 확인
-        query = '''
-        from(bucket: "smart_greenhouse")
-            |> range(start: -24h)
-            |> filter(fn: (r) => r._measurement == "sensor_data")
-            |> filter(fn: (r) => r.metric == "temperature")
-            |> group(columns: ["mode"])
-            |> count()
-        '''
-        
-        result = influx_manager.query_api.query(org="iotctd", query=query)
+        result = influx_manager.run_query("metric_count_by_mode", metric="temperature")
         
         print("📊 모드별 데이터 개수:")
         for table in result:
@@ -0,0 +1,156 @@
+"""
+세션별 대화 기록 캐시 모듈
+/api/chat이 매 요청마다 InfluxDB를 다시 조회하지 않도록 세션마다 최근 메시지를 링 버퍼로 보관합니다.
+읽기는 캐시에서만 하고, 새 메시지는 캐시에 넣은 뒤 저장 함수(InfluxDB 배치 큐)로 넘깁니다(write-behind).
+캐시에 없는 세션은 처음 접근할 때 한 번만 InfluxDB에서 복원하며,
+세션 수는 LRU로 제한하고 오래 사용하지 않은 세션은 TTL로 만료시킵니다.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class ConversationCache:
+    """LRU 크기 제한과 TTL 만료를 지원하는 세션별 대화 링 버퍼"""
+
+    def __init__(self, loader=None, persist=None, max_sessions=1000, ttl_seconds=3600, window=20):
+        """
+        Args:
+            loader (callable, optional): loader(session_id, limit) -> 메시지 목록. 캐시에 없는 세션 복원용.
+            persist (callable, optional): persist(session_id, message). 새 메시지 저장용.
+            max_sessions (int): 캐시에 보관할 최대 세션 수
+            ttl_seconds (float): 마지막 접근 후 세션을 만료시킬 시간 (초)
+            window (int): 세션마다 보관할 최근 메시지 수
+        """
+        self.loader = loader
+        self.persist = persist
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # session_id -> {"messages": deque, "last_access": float}
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "appends": 0,
+            "lru_evictions": 0,
+            "ttl_evictions": 0,
+        }
+
+    def _get_entry(self, session_id, now):
+        """잠금을 잡은 상태에서 호출. 만료되지 않은 세션 항목을 LRU 순서 갱신과 함께 반환합니다."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if now - entry["last_access"] > self.ttl_seconds:
+            del self._sessions[session_id]
+            self.stats["ttl_evictions"] += 1
+            return None
+        entry["last_access"] = now
+        self._sessions.move_to_end(session_id)
+        return entry
+
+    def _insert(self, session_id, messages, now):
+        """잠금을 잡은 상태에서 호출. 새 세션 항목을 넣고 LRU 한도를 넘으면 가장 오래된 세션을 내보냅니다."""
+        entry = {"messages": deque(messages, maxlen=self.window), "last_access": now}
+        self._sessions[session_id] = entry
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats["lru_evictions"] += 1
+        return entry
+
+    def is_cached(self, session_id):
+        with self._lock:
+            return self._get_entry(session_id, time.time()) is not None
+
+    def hydrate(self, session_id, history):
+        """
+        외부에서 조회한 대화 기록으로 세션을 채웁니다. (비동기 조회기를 쓰는 ASGI 경로용)
+        그 사이 다른 요청이 세션을 먼저 만들었다면 기존 항목을 유지합니다.
+        """
+        with self._lock:
+            now = time.time()
+            if self._get_entry(session_id, now) is None:
+                self.stats["misses"] += 1
+                self._insert(session_id, history or [], now)
+
+    def _ensure_loaded(self, session_id):
+        with self._lock:
+            now = time.time()
+            if self._get_entry(session_id, now) is not None:
+                self.stats["hits"] += 1
+                return
+
+        # 저장소 조회는 잠금 밖에서 수행
+        history = []
+        if self.loader is not None:
+            try:
+                history = self.loader(session_id, self.window)
+            except Exception as e:
+                print(f"대화 기록 복원 실패: {session_id} - {e}")
+        self.hydrate(session_id, history)
+
+    def append(self, session_id, message):
+        """
+        메시지를 세션 링 버퍼에 추가하고 저장 함수로 넘깁니다.
+
+        Args:
+            session_id (str): 세션 ID
+            message (dict): {"role": "user"|"bot", "content": str}
+        """
+        # 복원을 먼저 해야 방금 저장 큐에 넣은 메시지가 중복으로 읽히지 않음
+        self._ensure_loaded(session_id)
+
+        record = {
+            "role": message.get("role", "unknown"),
+            "content": message.get("content", ""),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+        }
+        with self._lock:
+            now = time.time()
+            entry = self._get_entry(session_id, now) or self._insert(session_id, [], now)
+            entry["messages"].append(record)
+            self.stats["appends"] += 1
+
+        if self.persist is not None:
+            self.persist(session_id, message)
+
+    def get_recent(self, session_id, limit=5):
+        """
+        세션의 최근 메시지를 오래된 순서로 반환합니다. (get_chat_history와 같은 형식)
+
+        Args:
+            session_id (str): 세션 ID
+            limit (int): 반환할 최대 메시지 수
+        """
+        self._ensure_loaded(session_id)
+        with self._lock:
+            entry = self._get_entry(session_id, time.time())
+            if entry is None:
+                return []
+            messages = list(entry["messages"])
+        return messages[-limit:] if limit else messages
+
+    def evict_expired(self):
+        """TTL이 지난 세션을 모두 제거하고 제거한 수를 반환합니다."""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, entry in self._sessions.items()
+                       if now - entry["last_access"] > self.ttl_seconds]
+            for sid in expired:
+                del self._sessions[sid]
+            self.stats["ttl_evictions"] += len(expired)
+        return len(expired)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["sessions"] = len(self._sessions)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        stats["max_sessions"] = self.max_sessions
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["window"] = self.window
+        return stats
@@ -0,0 +1,170 @@
+"""
+Flux 쿼리 템플릿 모듈
+쿼리 모양마다 이름 붙은 템플릿을 한 번만 정의해 두고, 값은 InfluxDB 클라이언트의 params(extern 옵션)로 전달합니다.
+요청마다 쿼리 문자열을 새로 만들지 않고, session_id 같은 입력값이 Flux 코드로 해석되지 않으며,
+템플릿별 지연 시간 히스토그램을 기록합니다.
+
+템플릿 안에서는 파라미터를 p_<이름> 변수로 참조합니다. (Flux 내장 이름과 겹치지 않도록)
+    flux_queries.define("chat_history", '''
+        from(bucket: p_bucket) |> ... |> filter(fn: (r) => r.session_id == p_session_id)
+    ''', params=("session_id",))
+"""
+import bisect
+import textwrap
+import threading
+import time
+
+# 지연 시간 히스토그램 구간 상한 (ms)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+PARAM_PREFIX = "p_"
+
+
+class LatencyHistogram:
+    """고정 구간 지연 시간 히스토그램"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(bounds) + 1)   # 마지막 칸은 +Inf
+        self._total_ms = 0.0
+        self._errors = 0
+
+    def observe(self, elapsed_ms, error=False):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.bounds, elapsed_ms)] += 1
+            self._total_ms += elapsed_ms
+            if error:
+                self._errors += 1
+
+    def _percentile(self, counts, total, pct):
+        """구간 상한으로 근사한 백분위수 (ms). +Inf 구간이면 None."""
+        threshold = total * pct / 100
+        running = 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= threshold:
+                return self.bounds[index] if index < len(self.bounds) else None
+        return None
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total_ms = self._total_ms
+            errors = self._errors
+        total = sum(counts)
+        labels = [f"le_{bound}" for bound in self.bounds] + ["le_inf"]
+        return {
+            "count": total,
+            "errors": errors,
+            "avg_ms": round(total_ms / total, 1) if total else None,
+            "p50_ms": self._percentile(counts, total, 50) if total else None,
+            "p95_ms": self._percentile(counts, total, 95) if total else None,
+            "buckets": dict(zip(labels, counts)),
+        }
+
+
+class FluxQuery:
+    """이름 붙은 Flux 쿼리 템플릿 (정의 시 한 번만 정리해 재사용)"""
+
+    def __init__(self, name, text, params=(), defaults=None, base_params=None):
+        self.name = name
+        self.text = textwrap.dedent(text).strip()
+        self.required = tuple(params)
+        self.defaults = dict(defaults or {})
+        self.base_params = dict(base_params or {})
+        self.latency = LatencyHistogram()
+
+        # 템플릿이 참조하지 않는 파라미터는 정의 단계에서 잡아냄
+        for key in (*self.required, *self.defaults, *self.base_params):
+            if f"{PARAM_PREFIX}{key}" not in self.text:
+                raise ValueError(f"{name} 쿼리 템플릿에 {PARAM_PREFIX}{key} 참조가 없습니다.")
+
+    def bind(self, values):
+        """
+        호출 값을 검증하고 클라이언트에 넘길 params 딕셔너리를 만듭니다.
+
+        Raises:
+            ValueError: 누락되었거나 정의되지 않은 파라미터가 있는 경우
+        """
+        unknown = set(values) - set(self.required) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"{self.name} 쿼리에 정의되지 않은 파라미터: {sorted(unknown)}")
+        missing = [key for key in self.required if key not in values]
+        if missing:
+            raise ValueError(f"{self.name} 쿼리에 필요한 파라미터 누락: {missing}")
+
+        merged = {**self.base_params, **self.defaults, **values}
+        return {f"{PARAM_PREFIX}{key}": value for key, value in merged.items()}
+
+
+class FluxQueryRegistry:
+    """Flux 쿼리 템플릿 등록/실행기"""
+
+    def __init__(self, org, base_params=None):
+        """
+        Args:
+            org (str): InfluxDB 조직
+            base_params (dict, optional): 모든 쿼리에 공통으로 전달할 파라미터 (예: bucket)
+        """
+        self.org = org
+        self.base_params = dict(base_params or {})
+        self._queries = {}
+
+    def define(self, name, text, params=(), defaults=None):
+        """
+        쿼리 템플릿을 등록합니다.
+
+        Args:
+            name (str): 쿼리 이름 (지연 시간 통계 키)
+            text (str): p_<이름>으로 파라미터를 참조하는 Flux 쿼리
+            params (tuple): 필수 파라미터 이름
+            defaults (dict, optional): 선택 파라미터와 기본값
+
+        Returns:
+            FluxQuery: 등록된 템플릿
+        """
+        if name in self._queries:
+            raise ValueError(f"이미 정의된 쿼리입니다: {name}")
+        used_base = {key: value for key, value in self.base_params.items() if f"{PARAM_PREFIX}{key}" in text}
+        query = FluxQuery(name, text, params, defaults, used_base)
+        self._queries[name] = query
+        return query
+
+    def get(self, name):
+        return self._queries[name]
+
+    def run(self, query_api, name, **values):
+        """
+        동기 query_api로 템플릿을 실행하고 지연 시간을 기록합니다.
+
+        Returns:
+            TableList: 쿼리 결과
+        """
+        query = self._queries[name]
+        params = query.bind(values)
+        started = time.perf_counter()
+        try:
+            result = query_api.query(query=query.text, org=self.org, params=params)
+        except Exception:
+            query.latency.observe((time.perf_counter() - started) * 1000, error=True)
+            raise
+        query.latency.observe((time.perf_counter() - started) * 1000)
+        return result
+
+    async def run_async(self, query_api, name, **values):
+        """비동기 query_api(InfluxDBClientAsync)로 템플릿을 실행하고 지연 시간을 기록합니다."""
+        query = self._queries[name]
+        params = query.bind(values)
+        started = time.perf_counter()
+        try:
+            result = await query_api.query(query=query.text, org=self.org, params=params)
+        except Exception:
+            query.latency.observe((time.perf_counter() - started) * 1000, error=True)
+            raise
+        query.latency.observe((time.perf_counter() - started) * 1000)
+        return result
+
+    def get_stats(self):
+        """쿼리별 지연 시간 히스토그램을 반환합니다."""
+        return {name: query.latency.snapshot() for name, query in self._queries.items()}
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+아두이노 수신 경로 퍼즈 테스트 스크립트
+무작위로 변형한 텍스트 줄과 바이트 스트림을 파서/시리얼 전송에 넣어
+예외가 나지 않는지, 결과 값 형식이 올바른지, 정상 프레임은 잡음 속에서도 모두 복원되는지 확인합니다.
+
+사용 예:
+    python fuzz_arduino_parser.py
+    python fuzz_arduino_parser.py --iterations 200000 --seed 7
+"""
+import argparse
+import random
+import sys
+
+from arduino_protocol import parse_text_telemetry, encode_frame, SYNC
+from serial_transport import SerialTransport
+
+EXPECTED_TYPES = {
+    "temperature": float,
+    "humidity": float,
+    "co2": int,
+    "light": int,
+    "soil": float,
+}
+
+SAMPLE_LINE = "온도: 25.0 °C, 습도: 60.5 %, CO2: 350, 조도: 15, 토양 수분: 650"
+TOKENS = ["온도:", "습도:", "CO2:", "조도:", "토양 수분:", "토양수분:", "-", ".", "..", "°C", "%", ",", " ",
+          "\t", "1e5", "NaN", "99999999999999999999", "�", "\x00"]
+
+
+def mutate_line(rng, line):
+    chars = list(line)
+    for _ in range(rng.randint(1, 6)):
+        op = rng.random()
+        pos = rng.randint(0, len(chars))
+        if op < 0.3 and chars:
+            del chars[min(pos, len(chars) - 1)]
+        elif op < 0.6:
+            chars[pos:pos] = list(rng.choice(TOKENS))
+        elif op < 0.8:
+            chars[pos:pos] = [chr(rng.randint(0, 0x2FFF))]
+        else:
+            chars[pos:pos] = list(str(rng.uniform(-1e6, 1e6)))
+    return "".join(chars)
+
+
+def check_values(line, values):
+    for key, value in values.items():
+        expected = EXPECTED_TYPES.get(key)
+        if expected is None or type(value) is not expected:
+            raise AssertionError(f"잘못된 결과 {key}={value!r} (입력: {line!r})")
+        if key == "soil" and value > 100:
+            raise AssertionError(f"토양 수분 범위 초과 {value} (입력: {line!r})")
+
+
+def fuzz_text(rng, iterations):
+    for _ in range(iterations):
+        line = mutate_line(rng, SAMPLE_LINE) if rng.random() < 0.7 else \
+            "".join(chr(rng.randint(0, 0xD7FF)) for _ in range(rng.randint(0, 80)))
+        check_values(line, parse_text_telemetry(line))
+
+
+def fuzz_stream(rng, iterations):
+    """정상 프레임/텍스트 줄 사이에 잡음과 깨진 프레임을 섞어 임의 크기로 나눠 넣습니다."""
+    for _ in range(iterations):
+        frames, lines = [], []
+        transport = SerialTransport(lambda: None, name="fuzz")
+        transport.binary = True
+        transport.subscribe(lines.append)
+        transport.subscribe(frames.append, frames=True)
+
+        stream = bytearray()
+        expected = []
+        for seq in range(rng.randint(1, 20)):
+            roll = rng.random()
+            if roll < 0.2:
+                # 잡음 (동기 바이트가 섞일 수 있음)
+                stream += bytes(rng.randint(0, 255) for _ in range(rng.randint(1, 40)))
+                stream += rng.choice([b"", SYNC, b"\n"])
+            elif roll < 0.3:
+                broken = bytearray(encode_frame(seq, 20.0, 50.0, 400, 100, 500))
+                broken[rng.randint(2, len(broken) - 1)] ^= rng.randint(1, 255)
+                stream += broken
+            frame = encode_frame(seq, rng.uniform(-20, 50), rng.uniform(0, 100), rng.randint(0, 5000),
+                                 rng.randint(0, 1023), rng.randint(0, 1023), rng.randint(0, 15))
+            stream += frame
+            expected.append(seq)
+
+        position = 0
+        while position < len(stream):
+            step = rng.randint(1, 64)
+            transport._feed(bytes(stream[position:position + step]))
+            position += step
+
+        got = [frame[0] for frame in frames]
+        # 잡음이 우연히 올바른 CRC의 프레임이 될 확률은 무시할 수준이므로 정상 프레임은 모두 순서대로 복원되어야 함
+        if [seq for seq in got if seq in expected] != expected:
+            raise AssertionError(f"프레임 복원 실패: 기대 {expected}, 수신 {got}")
+        if len(transport._buffer) > 4096 + 64:
+            raise AssertionError(f"수신 버퍼가 줄지 않음: {len(transport._buffer)}바이트")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="아두이노 수신 경로 퍼즈 테스트")
+    parser.add_argument("--iterations", type=int, default=50000, help="텍스트 줄 반복 횟수")
+    parser.add_argument("--streams", type=int, default=2000, help="바이트 스트림 반복 횟수")
+    parser.add_argument("--seed", type=int, default=None, help="난수 시드 (재현용)")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    rng = random.Random(seed)
+    print(f"시드: {seed}")
+    try:
+        fuzz_text(rng, args.iterations)
+        print(f"텍스트 파서: {args.iterations}개 통과")
+        fuzz_stream(rng, args.streams)
+        print(f"프레임/줄 스트림: {args.streams}개 통과")
+    except AssertionError as e:
+        print(f"실패: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
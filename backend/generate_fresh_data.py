@@ -4,8 +4,10 @@
 """
 import time
 from sensors import SensorDataManager
+from influx_storage import init_storage
 
-# 센서 매니저 인스턴스 생성
+# InfluxDB 저장소 초기화 후 센서 매니저 인스턴스 생성 (샘플마다 InfluxDB에 기록)
+init_storage()
 sensor_manager = SensorDataManager()
 
 def generate_fresh_data(count=5):
@@ -5,7 +5,9 @@ InfluxDB 테스트 데이터 생성 스크립트
 import time
 import random
 from datetime import datetime, timedelta
-from influx_storage import influx_manager
+from influx_storage import init_storage
+
+influx_manager = init_storage()
 
 def generate_test_data(hours=24, interval_minutes=30):
     """
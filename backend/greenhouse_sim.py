@@ -0,0 +1,91 @@
+"""
+벡터화 온실 시뮬레이션 엔진
+여러 온실의 센서 값을 (온실 수, 항목 수) numpy 배열 하나로 보관하고, 무작위 변동과
+장치 효과(팬/급수/조명 증감, 창문 열림 시 외부 공기와 혼합)를 배열 연산 한 번으로 적용합니다.
+시드를 지정하면 같은 순서의 값을 재현할 수 있어 부하 테스트에 사용할 수 있습니다.
+"""
+import numpy as np
+
+METRICS = ("temperature", "humidity", "power", "soil", "co2", "light")
+DEVICES = ("fan", "water", "light", "window")
+
+T, H, P, S, C, L = range(len(METRICS))
+FAN, WATER, LIGHT, WINDOW = range(len(DEVICES))
+
+DEFAULT_VALUES = {
+    "temperature": 23.5,
+    "humidity": 58.0,
+    "power": 135.0,
+    "soil": 42.0,
+    "co2": 420.0,
+    "light": 35,
+}
+
+# 틱당 무작위 변동 폭 (±)
+NOISE = np.array([0.5, 1.0, 2.0, 0.5, 10.0, 6.0])
+
+# 장치가 켜져 있을 때 틱당 증감 (장치 x 항목)
+DEVICE_DELTAS = np.zeros((len(DEVICES), len(METRICS)))
+DEVICE_DELTAS[FAN, [T, C, P]] = (-0.2, -5.0, 5.0)
+DEVICE_DELTAS[WATER, [S, H, P]] = (0.5, 1.0, 3.0)
+DEVICE_DELTAS[LIGHT, [T, C, P, L]] = (0.1, -2.0, 10.0, 10.0)
+
+# 값 범위
+LOWER = np.array([10.0, 20.0, 50.0, 0.0, 200.0, 1.0])
+UPPER = np.array([40.0, 100.0, 300.0, 100.0, 2000.0, 1000.0])
+
+
+class VectorSimulator:
+    """여러 온실의 상태를 배열로 보관하고 한 번에 갱신하는 시뮬레이터"""
+
+    def __init__(self, houses=1, seed=None, init_values=None):
+        """
+        Args:
+            houses (int): 시뮬레이션할 온실 수
+            seed (int, optional): 난수 시드 (같은 시드면 같은 값 순서)
+            init_values (dict, optional): 모든 온실의 센서 초기값
+        """
+        self.rng = np.random.default_rng(seed)
+        initial = {**DEFAULT_VALUES, **(init_values or {})}
+        self.values = np.tile(np.array([initial[m] for m in METRICS], dtype=np.float64), (houses, 1))
+        self.devices = np.zeros((houses, len(DEVICES)), dtype=bool)
+
+    @property
+    def houses(self):
+        return self.values.shape[0]
+
+    def step(self):
+        """모든 온실을 한 틱 진행하고 (온실 수, 항목 수) 값 배열을 반환합니다."""
+        values = self.values
+        n = values.shape[0]
+        noise = self.rng.uniform(-1.0, 1.0, size=(n, len(METRICS) + 2))
+
+        # 무작위 변동 후 장치 효과 합산
+        values += noise[:, :len(METRICS)] * NOISE
+        np.round(values, 1, out=values)
+        values += self.devices @ DEVICE_DELTAS
+
+        # 창문이 열린 온실은 외부 습도/CO2/조도와 혼합
+        window = self.devices[:, WINDOW]
+        if window.any():
+            external_humidity = 50 + 10 * noise[window, len(METRICS)]
+            external_light = 50 + 15 * noise[window, len(METRICS) + 1]
+            values[window, H] = np.round(0.9 * values[window, H] + 0.1 * external_humidity, 1)
+            values[window, C] = np.round(0.8 * values[window, C] + 0.2 * 400, 1)
+            values[window, L] = np.round(0.7 * values[window, L] + 0.3 * external_light, 1)
+
+        np.clip(values, LOWER, UPPER, out=values)
+        return values
+
+    def set_house(self, index, values=None, devices=None):
+        """온실 하나의 센서 값/장치 상태를 지정합니다. (dict, 없는 키는 유지)"""
+        for key, value in (values or {}).items():
+            if key in METRICS:
+                self.values[index, METRICS.index(key)] = value
+        for key, status in (devices or {}).items():
+            if key in DEVICES:
+                self.devices[index, DEVICES.index(key)] = bool(status)
+
+    def get_house(self, index):
+        """온실 하나의 센서 값을 dict로 반환합니다."""
+        return {metric: float(value) for metric, value in zip(METRICS, self.values[index])}
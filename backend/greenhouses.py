@@ -0,0 +1,130 @@
+"""
+온실 레지스트리 모듈
+한 서버(라즈베리파이)가 여러 온실을 담당할 수 있도록 온실 ID별로 센서 매니저를 보관합니다.
+온실마다 자체 시리얼 연결, 샘플러 스레드, InfluxDB greenhouse 태그를 가지므로
+한 온실의 시리얼 I/O가 느려도 다른 온실의 샘플링과 응답에는 영향을 주지 않습니다.
+
+GREENHOUSES 환경 변수 형식 (쉼표로 구분, 첫 번째가 기본 온실):
+    default                       # 온실 하나, 아두이노 포트 자동 탐색 (기존 동작)
+    gh1:/dev/ttyACM0,gh2:/dev/ttyACM1,gh3:sim
+        <ID>:<포트>  지정한 시리얼 포트만 사용
+        <ID>:sim     시뮬레이션 전용
+        <ID>         아직 다른 온실이 사용하지 않는 포트를 자동 탐색
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+SIMULATION_PORT = "sim"
+
+
+def parse_greenhouses(spec):
+    """
+    GREENHOUSES 설정 문자열을 파싱합니다.
+
+    Returns:
+        list: [(온실 ID, 포트 또는 None 또는 "sim"), ...] 설정 순서
+
+    Raises:
+        ValueError: ID 형식이 잘못되었거나 중복된 경우
+    """
+    houses = []
+    for item in str(spec).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        greenhouse_id, _, port = item.partition(":")
+        greenhouse_id = greenhouse_id.strip()
+        if not _ID_PATTERN.match(greenhouse_id):
+            raise ValueError(f"잘못된 온실 ID입니다: {greenhouse_id}")
+        if any(existing == greenhouse_id for existing, _ in houses):
+            raise ValueError(f"중복된 온실 ID입니다: {greenhouse_id}")
+        houses.append((greenhouse_id, port.strip() or None))
+    if not houses:
+        raise ValueError("온실이 하나 이상 필요합니다.")
+    return houses
+
+
+# 이 서버가 담당하는 온실 목록 - 첫 번째 온실이 기존 /api/* 경로와 태그 없는 과거 데이터의 기본 온실
+GREENHOUSES = parse_greenhouses(os.getenv("GREENHOUSES", "default"))
+DEFAULT_GREENHOUSE = GREENHOUSES[0][0]
+
+
+class GreenhouseRegistry:
+    """온실 ID -> 센서 매니저 레지스트리"""
+
+    def __init__(self, default_id=DEFAULT_GREENHOUSE):
+        self.default_id = default_id
+        self._managers = {}
+        self._lock = threading.Lock()
+
+    def build(self, houses, factory):
+        """
+        온실별 매니저를 병렬로 생성해 등록합니다.
+        (아두이노 연결 확인에 수 초가 걸리므로 온실끼리 서로 기다리지 않도록 함)
+
+        Args:
+            houses (list): parse_greenhouses() 결과
+            factory (callable): factory(온실 ID, 포트) -> 센서 매니저
+        """
+        with ThreadPoolExecutor(max_workers=len(houses), thread_name_prefix="greenhouse-init") as pool:
+            futures = [(greenhouse_id, pool.submit(factory, greenhouse_id, port)) for greenhouse_id, port in houses]
+            for greenhouse_id, future in futures:
+                self.register(greenhouse_id, future.result())
+        return self
+
+    def register(self, greenhouse_id, manager):
+        with self._lock:
+            if greenhouse_id in self._managers:
+                raise ValueError(f"이미 등록된 온실입니다: {greenhouse_id}")
+            self._managers[greenhouse_id] = manager
+
+    def get(self, greenhouse_id=None):
+        """
+        온실 ID로 매니저를 찾습니다. ID가 없으면 기본 온실.
+
+        Raises:
+            KeyError: 등록되지 않은 온실인 경우
+        """
+        return self._managers[greenhouse_id or self.default_id]
+
+    def __contains__(self, greenhouse_id):
+        return greenhouse_id in self._managers
+
+    def __len__(self):
+        return len(self._managers)
+
+    @property
+    def default(self):
+        return self.get(self.default_id)
+
+    def ids(self):
+        return list(self._managers)
+
+    def items(self):
+        return list(self._managers.items())
+
+    def start_all(self):
+        """모든 온실의 샘플러 스레드를 시작합니다. (온실마다 독립된 스레드)"""
+        for manager in self._managers.values():
+            manager.start_sampler()
+
+    def stop_all(self):
+        for manager in self._managers.values():
+            manager.stop_sampler()
+
+    def get_status(self):
+        """온실별 연결 상태와 최신 스냅샷 시각을 반환합니다."""
+        houses = []
+        for greenhouse_id, manager in self.items():
+            snapshot = manager.get_snapshot()
+            houses.append({
+                "id": greenhouse_id,
+                "default": greenhouse_id == self.default_id,
+                "arduino": manager.get_arduino_status(),
+                "timestamp": snapshot["timestamp"] if snapshot else None,
+            })
+        return {"default": self.default_id, "greenhouses": houses}
@@ -0,0 +1,154 @@
+"""
+센서 이력 집계 결과 캐시 모듈
+/api/history의 집계 시계열을 (greenhouse, metric, range, every, mode) 단위로 프로세스 전체에서 공유합니다.
+이미 끝난 집계 구간(봉인된 앞부분)은 다시 조회하지 않고, 새 데이터가 기록되면 마지막 구간 이후만
+다시 조회해 이어 붙이므로 같은 이력을 보는 대시보드가 여러 개여도 구간 경계마다 조회 한 번 정도만 발생합니다.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# 캐시에 보관하는 포인트 (구간 종료 epoch 초, 값) 하나의 대략적인 메모리 크기
+_POINT_BYTES = sys.getsizeof((0, 0.0)) + sys.getsizeof(2 ** 31) + sys.getsizeof(0.0) + 8
+
+
+class _Entry:
+    def __init__(self):
+        self.lock = threading.Lock()   # 같은 키의 갱신을 하나로 합침
+        self.sealed = []               # 확정된 구간 [(구간 종료 epoch, 값), ...]
+        self.sealed_until = None       # 이 시각까지 끝난 구간은 확정
+        self.tail = []                 # 아직 값이 바뀔 수 있는 마지막 구간들
+        self.tail_fetched_at = None    # 꼬리를 마지막으로 조회한 시각 (monotonic)
+
+
+class HistoryCache:
+    """봉인된 앞부분 재사용과 쓰기 인지 꼬리 갱신을 지원하는 이력 집계 캐시"""
+
+    def __init__(self, fetch_fn, max_entries=256, tail_ttl=10.0, settle_seconds=5.0):
+        """
+        Args:
+            fetch_fn (callable): fetch_fn(metric, start, every_seconds, greenhouse) -> [(구간 종료 epoch, 값), ...]
+                start는 구간 경계에 맞춘 UTC datetime. 실패 시 예외 발생.
+            max_entries (int): 보관할 최대 키 수 (LRU)
+            tail_ttl (float): 새 데이터가 기록돼도 꼬리를 다시 조회하지 않는 최소 간격 (초)
+            settle_seconds (float): 구간이 끝난 뒤 늦게 도착하는 쓰기(배치 플러시, 롤업 마감)를 기다리는 시간 (초)
+        """
+        self.fetch_fn = fetch_fn
+        self.max_entries = max_entries
+        self.tail_ttl = tail_ttl
+        self.settle_seconds = settle_seconds
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (greenhouse, metric, range, every, mode) -> _Entry
+        self._last_write = {}          # (greenhouse, metric, mode) -> 마지막 쓰기 시각 (monotonic)
+
+        self.stats = {
+            "requests": 0,
+            "hits": 0,
+            "full_fetches": 0,
+            "tail_fetches": 0,
+            "stale_served": 0,
+            "evictions": 0,
+        }
+
+    def note_write(self, metrics, mode, greenhouse=None):
+        """센서 데이터가 기록되었음을 알립니다. 해당 온실/항목 캐시의 꼬리만 갱신 대상이 됩니다."""
+        now = time.monotonic()
+        with self._lock:
+            for metric in metrics:
+                self._last_write[(greenhouse, metric, mode)] = now
+
+    def _entry_for(self, key):
+        with self._lock:
+            self.stats["requests"] += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+            else:
+                self._entries.move_to_end(key)
+            return entry
+
+    def get(self, metric, range_seconds, every_seconds, mode="hardware", greenhouse=None):
+        """
+        집계 시계열을 캐시에서 찾거나 필요한 부분만 조회합니다.
+
+        Returns:
+            list: [(구간 종료 epoch 초, 값), ...] 시간 순서
+        """
+        key = (greenhouse, metric, range_seconds, every_seconds, mode)
+        entry = self._entry_for(key)
+
+        now = time.time()
+        # 시작을 구간 경계에 맞춰 첫 구간도 항상 완전한 구간이 되도록 함
+        range_start = int((now - range_seconds) // every_seconds * every_seconds)
+        seal_boundary = int((now - self.settle_seconds) // every_seconds * every_seconds)
+
+        with entry.lock:
+            if entry.sealed_until is None:
+                points = self.fetch_fn(metric, _utc(range_start), every_seconds, greenhouse)
+                self._count("full_fetches")
+                self._store(entry, points, seal_boundary)
+            elif self._tail_stale(entry, (greenhouse, metric, mode), seal_boundary):
+                try:
+                    points = self.fetch_fn(metric, _utc(entry.sealed_until), every_seconds, greenhouse)
+                    self._count("tail_fetches")
+                    self._store(entry, points, seal_boundary, extend=True)
+                except Exception as e:
+                    # 꼬리 갱신 실패 시 직전 결과를 그대로 제공
+                    print(f"이력 캐시 꼬리 갱신 실패, 이전 결과 사용: {e}")
+                    self._count("stale_served")
+            else:
+                self._count("hits")
+
+            # 범위 밖으로 밀려난 앞부분 제거 (구간 종료 시각 기준)
+            first = 0
+            while first < len(entry.sealed) and entry.sealed[first][0] <= range_start:
+                first += 1
+            if first:
+                del entry.sealed[:first]
+
+            return entry.sealed + entry.tail
+
+    def _tail_stale(self, entry, write_key, seal_boundary):
+        if seal_boundary > entry.sealed_until:
+            return True
+        last_write = self._last_write.get(write_key)
+        return (last_write is not None and last_write > entry.tail_fetched_at
+                and time.monotonic() - entry.tail_fetched_at >= self.tail_ttl)
+
+    def _store(self, entry, points, seal_boundary, extend=False):
+        sealed = [point for point in points if point[0] <= seal_boundary]
+        if extend:
+            entry.sealed.extend(point for point in sealed if point[0] > entry.sealed_until)
+        else:
+            entry.sealed = sealed
+        entry.tail = [point for point in points if point[0] > seal_boundary]
+        entry.sealed_until = max(seal_boundary, entry.sealed_until or seal_boundary)
+        entry.tail_fetched_at = time.monotonic()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_stats(self):
+        """캐시 적중률과 대략적인 메모리 사용량을 반환합니다."""
+        with self._lock:
+            stats = dict(self.stats)
+            entries = list(self._entries.values())
+        points = sum(len(entry.sealed) + len(entry.tail) for entry in entries)
+        stats["entries"] = len(entries)
+        stats["points"] = points
+        stats["memory_bytes"] = points * _POINT_BYTES
+        stats["hit_ratio"] = round(stats["hits"] / stats["requests"], 3) if stats["requests"] else None
+        stats["max_entries"] = self.max_entries
+        stats["tail_ttl"] = self.tail_ttl
+        return stats
+
+
+def _utc(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc)
@@ -0,0 +1,208 @@
+"""
+외부 HTTP API 공용 클라이언트 모듈
+Gemini, 기상청 등 외부 API 호출이 호스트별 keep-alive 연결 풀을 재사용하도록 하고,
+모든 요청에 연결/읽기 타임아웃과 제한된 재시도를 적용합니다.
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 공용 HTTP 클라이언트 설정
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "4"))
+
+# 재시도할 응답 코드 - 서버가 요청을 처리하지 않은 경우만 (POST도 안전)
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+
+class HTTPClient:
+    """호스트별 requests.Session과 연결 풀을 관리하는 HTTP 클라이언트"""
+
+    def __init__(self, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                 pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES,
+                 backoff_factor=HTTP_BACKOFF_FACTOR, backoff_max=HTTP_BACKOFF_MAX):
+        """
+        Args:
+            connect_timeout (float): 기본 연결 타임아웃 (초)
+            read_timeout (float): 기본 읽기 타임아웃 (초)
+            pool_size (int): 호스트당 유지할 최대 연결 수
+            max_retries (int): 연결 실패/일시적 오류 응답에 대한 최대 재시도 횟수
+            backoff_factor (float): 재시도 백오프 계수 (초)
+            backoff_max (float): 재시도 백오프 최대 간격 (초)
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+
+        self._lock = threading.Lock()
+        self._sessions = {}         # (scheme, host) -> Session
+        self._adapters = {}         # (scheme, host) -> HTTPAdapter
+        self._host_timeouts = {}    # host -> (connect, read)
+        self._host_stats = {}       # host -> 요청 통계
+
+    def configure_host(self, host, connect_timeout=None, read_timeout=None):
+        """
+        특정 호스트의 타임아웃을 지정합니다. (예: 응답 생성이 긴 LLM API)
+
+        Args:
+            host (str): 호스트 이름
+            connect_timeout (float, optional): 연결 타임아웃 (초)
+            read_timeout (float, optional): 읽기 타임아웃 (초)
+        """
+        with self._lock:
+            self._host_timeouts[host] = (
+                connect_timeout or self.connect_timeout,
+                read_timeout or self.read_timeout,
+            )
+
+    def _make_retry(self):
+        return Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            # 읽기 타임아웃 후 재전송하면 생성 요청이 중복 처리되므로 재시도하지 않음
+            read=0,
+            status=self.max_retries,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=None,
+            backoff_factor=self.backoff_factor,
+            backoff_max=self.backoff_max,
+            raise_on_status=False,
+        )
+
+    def _session_for(self, scheme, host):
+        key = (scheme, host)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_size,
+                    max_retries=self._make_retry(),
+                )
+                session.mount(f"{scheme}://", adapter)
+                self._sessions[key] = session
+                self._adapters[key] = adapter
+                self._host_stats[host] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "total_seconds": 0.0,
+                    "last_error": None,
+                }
+            return session
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """
+        풀링된 세션으로 요청을 보냅니다.
+
+        Args:
+            method (str): HTTP 메서드
+            url (str): 요청 URL
+            timeout (tuple|float, optional): (연결, 읽기) 타임아웃. 없으면 호스트 설정값 사용.
+            **kwargs: requests 요청 인자 (params, json, headers 등)
+
+        Returns:
+            requests.Response: 응답 객체
+
+        Raises:
+            requests.exceptions.RequestException: 연결 실패, 타임아웃 등
+        """
+        parts = urlsplit(url)
+        host = parts.hostname
+        session = self._session_for(parts.scheme, host)
+        if timeout is None:
+            timeout = self._host_timeouts.get(host, (self.connect_timeout, self.read_timeout))
+
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self._record(host, started, error=e)
+            raise
+
+        retries = getattr(response.raw, "retries", None)
+        self._record(host, started, retries=len(retries.history) if retries else 0)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _record(self, host, started, retries=0, error=None):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            stats = self._host_stats[host]
+            stats["requests"] += 1
+            stats["retries"] += retries
+            stats["total_seconds"] += elapsed
+            if error is not None:
+                stats["errors"] += 1
+                stats["last_error"] = str(error)
+
+    def get_stats(self):
+        """호스트별 요청 통계와 연결 풀 상태를 반환합니다."""
+        with self._lock:
+            adapters = dict(self._adapters)
+            host_stats = {host: dict(stats) for host, stats in self._host_stats.items()}
+            host_timeouts = dict(self._host_timeouts)
+
+        hosts = {}
+        for (scheme, host), adapter in adapters.items():
+            stats = host_stats[host]
+            requests_made = stats["requests"]
+            stats["avg_ms"] = round(stats.pop("total_seconds") / requests_made * 1000, 1) if requests_made else None
+            stats["timeout"] = list(host_timeouts.get(host, (self.connect_timeout, self.read_timeout)))
+
+            # urllib3 풀 통계 - 새로 연 연결 수 대비 요청 수로 재사용률 계산
+            connections = pool_requests = idle = 0
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+                # 풀 큐에는 빈 자리(None)도 들어있으므로 실제 연결만 셈
+                idle += sum(1 for conn in list(pool.pool.queue) if conn) if pool.pool else 0
+            stats["pool"] = {
+                "connections_opened": connections,
+                "requests": pool_requests,
+                "reuse_ratio": round(1 - connections / pool_requests, 3) if pool_requests else None,
+                "idle": idle,
+                "maxsize": self.pool_size,
+            }
+            hosts[f"{scheme}://{host}"] = stats
+
+        return {
+            "hosts": hosts,
+            "max_retries": self.max_retries,
+            "default_timeout": [self.connect_timeout, self.read_timeout],
+        }
+
+    def close(self):
+        """모든 세션의 연결 풀을 닫습니다."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._adapters.clear()
+        for session in sessions:
+            session.close()
+
+
+# 전역 HTTP 클라이언트 인스턴스
+http_client = HTTPClient()
@@ -0,0 +1,295 @@
+"""
+InfluxDB 장애 대비 디스크 스풀 모듈
+DB에 기록하지 못한 라인 프로토콜 배치를 세그먼트 파일에 추가 기록하고,
+연결이 복구되면 백그라운드에서 큰 배치로 재전송합니다.
+
+레코드 형식: [길이 4바이트][CRC32 4바이트][라인 프로토콜(개행 구분) UTF-8]
+"""
+import os
+import struct
+import threading
+import time
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct(">II")
+SEGMENT_PREFIX = "spool-"
+SEGMENT_SUFFIX = ".seg"
+
+
+class WriteAheadSpool:
+    """세그먼트 단위로 회전하는 추가 전용 스풀 파일"""
+
+    def __init__(self, directory, segment_bytes=4 * 1024 * 1024, max_bytes=256 * 1024 * 1024, fsync=True):
+        """
+        스풀 디렉터리를 열고 기존 세그먼트를 스캔합니다.
+
+        Args:
+            directory (str): 세그먼트 파일을 저장할 디렉터리
+            segment_bytes (int): 세그먼트 회전 기준 크기 (바이트)
+            max_bytes (int): 스풀 전체 최대 크기. 초과 시 가장 오래된 세그먼트부터 삭제
+            fsync (bool): 추가 기록마다 디스크 동기화 여부
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._segments = {}          # 세그먼트 번호 -> {"bytes": int, "lines": int}
+        self._active_seq = None
+        self._active_file = None
+
+        self.stats = {
+            "appended_lines": 0,
+            "evicted_lines": 0,
+            "evicted_bytes": 0,
+            "corrupt_records": 0,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan_segments()
+
+    def _segment_path(self, seq):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{seq:010d}{SEGMENT_SUFFIX}")
+
+    def _scan_segments(self):
+        """재시작 시 남아있는 세그먼트의 크기와 레코드 수를 복원합니다."""
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+                continue
+            try:
+                seq = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            except ValueError:
+                continue
+            path = self._segment_path(seq)
+            lines = sum(len(batch) for batch in self._read_segment(path))
+            self._segments[seq] = {"bytes": os.path.getsize(path), "lines": lines}
+
+        if self._segments:
+            logger.info(f"스풀 복원: 세그먼트 {len(self._segments)}개, 레코드 {self.depth()}개")
+
+    def _open_active(self):
+        next_seq = max(self._segments, default=0) + 1
+        self._active_seq = next_seq
+        self._active_file = open(self._segment_path(next_seq), "ab")
+        self._segments[next_seq] = {"bytes": 0, "lines": 0}
+
+    def _seal_active(self):
+        if self._active_file:
+            self._active_file.close()
+        self._active_file = None
+        self._active_seq = None
+
+    def append(self, records):
+        """
+        라인 프로토콜 레코드 배치를 스풀에 기록합니다.
+
+        Args:
+            records (list[str]): 라인 프로토콜 레코드 목록
+
+        Returns:
+            bool: 기록 성공 여부
+        """
+        if not records:
+            return False
+
+        payload = "\n".join(records).encode("utf-8")
+        data = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            try:
+                if self._active_file is None:
+                    self._open_active()
+                self._active_file.write(data)
+                self._active_file.flush()
+                if self.fsync:
+                    os.fsync(self._active_file.fileno())
+
+                segment = self._segments[self._active_seq]
+                segment["bytes"] += len(data)
+                segment["lines"] += len(records)
+                self.stats["appended_lines"] += len(records)
+
+                if segment["bytes"] >= self.segment_bytes:
+                    self._seal_active()
+                self._enforce_cap()
+                return True
+            except OSError as e:
+                logger.error(f"스풀 기록 실패: {e} - {len(records)}개 레코드 손실")
+                return False
+
+    def _enforce_cap(self):
+        """전체 크기가 상한을 넘으면 가장 오래된 세그먼트부터 삭제합니다."""
+        while self.total_bytes() > self.max_bytes and len(self._segments) > 1:
+            oldest = min(self._segments)
+            if oldest == self._active_seq:
+                break
+            segment = self._segments.pop(oldest)
+            self.stats["evicted_lines"] += segment["lines"]
+            self.stats["evicted_bytes"] += segment["bytes"]
+            self._remove_file(oldest)
+            logger.warning(f"스풀 용량 초과 - 세그먼트 {oldest} 삭제 ({segment['lines']}개 레코드)")
+
+    def _remove_file(self, seq):
+        try:
+            os.remove(self._segment_path(seq))
+        except FileNotFoundError:
+            pass
+
+    def _read_segment(self, path):
+        """세그먼트 파일에서 배치 목록을 읽습니다. 잘리거나 손상된 꼬리는 버립니다."""
+        batches = []
+        with open(path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, crc = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                self.stats["corrupt_records"] += 1
+                break
+            batches.append(payload.decode("utf-8").split("\n"))
+            offset = start + length
+        return batches
+
+    def oldest_segment(self):
+        """
+        재전송할 가장 오래된 세그먼트를 반환합니다. 활성 세그먼트만 남았다면 봉인합니다.
+
+        Returns:
+            tuple: (세그먼트 번호, 라인 프로토콜 레코드 목록) 또는 스풀이 비었으면 None
+        """
+        with self._lock:
+            if not self._segments:
+                return None
+            oldest = min(self._segments)
+            if oldest == self._active_seq:
+                self._seal_active()
+            path = self._segment_path(oldest)
+
+        records = []
+        for batch in self._read_segment(path):
+            records.extend(batch)
+        return oldest, records
+
+    def remove_segment(self, seq):
+        """재전송이 끝난 세그먼트를 삭제합니다."""
+        with self._lock:
+            self._segments.pop(seq, None)
+            self._remove_file(seq)
+
+    def depth(self):
+        """스풀에 남아있는 레코드 수"""
+        return sum(segment["lines"] for segment in list(self._segments.values()))
+
+    def total_bytes(self):
+        return sum(segment["bytes"] for segment in list(self._segments.values()))
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                "directory": self.directory,
+                "segments": len(self._segments),
+                "depth": self.depth(),
+                "bytes": self.total_bytes(),
+                "max_bytes": self.max_bytes,
+            })
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._seal_active()
+
+
+class SpoolReplayer:
+    """DB 연결이 복구되면 스풀을 큰 배치로 비우는 백그라운드 스레드"""
+
+    def __init__(self, spool, write_fn, is_available_fn, batch_size=5000, interval=10.0):
+        """
+        Args:
+            spool (WriteAheadSpool): 재전송할 스풀
+            write_fn (callable): 라인 프로토콜 레코드 목록을 기록하는 함수. 실패 시 예외 발생.
+            is_available_fn (callable): DB 사용 가능 여부를 반환하는 함수
+            batch_size (int): 재전송 요청 하나에 담을 레코드 수
+            interval (float): 스풀 확인 주기 (초)
+        """
+        self.spool = spool
+        self.write_fn = write_fn
+        self.is_available_fn = is_available_fn
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self.stats = {
+            "replayed_lines": 0,
+            "replayed_segments": 0,
+            "last_replay_lines_per_sec": None,
+            "last_replay_at": None,
+            "last_error": None,
+        }
+
+        self._thread = threading.Thread(target=self._run, name="influx-spool-replayer", daemon=True)
+        self._thread.start()
+
+    def wakeup(self):
+        """새 데이터가 스풀에 들어왔음을 알립니다."""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=self.interval)
+
+    def get_stats(self):
+        return dict(self.stats)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stop.is_set() or not self.spool.depth():
+                continue
+
+            try:
+                if not self.is_available_fn():
+                    continue
+            except Exception:
+                continue
+
+            self._drain()
+
+    def _drain(self):
+        """스풀이 빌 때까지 세그먼트 단위로 재전송합니다. 실패하면 다음 주기에 다시 시도합니다."""
+        started = time.monotonic()
+        replayed = 0
+        while not self._stop.is_set():
+            segment = self.spool.oldest_segment()
+            if segment is None:
+                break
+            seq, records = segment
+            try:
+                for i in range(0, len(records), self.batch_size):
+                    self.write_fn(records[i:i + self.batch_size])
+            except Exception as e:
+                # 세그먼트 단위로 재전송하므로 일부 중복 기록될 수 있으나 InfluxDB 쓰기는 멱등
+                self.stats["last_error"] = str(e)
+                logger.warning(f"스풀 재전송 중단: {e}")
+                break
+
+            self.spool.remove_segment(seq)
+            replayed += len(records)
+            self.stats["replayed_lines"] += len(records)
+            self.stats["replayed_segments"] += 1
+
+        if replayed:
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.stats["last_replay_lines_per_sec"] = round(replayed / elapsed, 1)
+            self.stats["last_replay_at"] = time.time()
+            logger.info(f"스풀 재전송 완료: {replayed}개 레코드 ({self.stats['last_replay_lines_per_sec']}개/초)")
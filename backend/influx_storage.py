@@ -2,11 +2,22 @@
 InfluxDB 시계열 데이터베이스 연결 모듈
 """
 import os
+import atexit
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from influxdb_client import InfluxDBClient, Point, WritePrecision
 from influxdb_client.client.write_api import SYNCHRONOUS
 import logging
 
+from influx_writer import BatchingWriter
+from influx_spool import WriteAheadSpool, SpoolReplayer
+from rollups import ROLLUP_MEASUREMENT, ROLLUP_TIERS, select_rollup_tier
+from conversation_cache import ConversationCache
+from flux_queries import FluxQueryRegistry
+from history_cache import HistoryCache
+from greenhouses import DEFAULT_GREENHOUSE
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,11 +28,266 @@ INFLUXDB_TOKEN = "P9YXJFSfmaEruB6NgCfwSa2rEV51DQGQH8T53CJwhzkdxKT37rm71CrlXI-Vd_
 INFLUXDB_ORG = "iotctd"
 INFLUXDB_BUCKET = "smart_greenhouse"
 
+# 배치 쓰기 설정
+INFLUX_BATCH_SIZE = int(os.getenv("INFLUX_BATCH_SIZE", "500"))
+INFLUX_FLUSH_INTERVAL = float(os.getenv("INFLUX_FLUSH_INTERVAL", "1.0"))
+INFLUX_QUEUE_SIZE = int(os.getenv("INFLUX_QUEUE_SIZE", "10000"))
+INFLUX_DROP_POLICY = os.getenv("INFLUX_DROP_POLICY", "drop_oldest")
+INFLUX_MAX_RETRIES = int(os.getenv("INFLUX_MAX_RETRIES", "5"))
+
+# DB 장애 시 디스크 스풀 설정
+INFLUX_SPOOL_DIR = os.getenv("INFLUX_SPOOL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "spool"))
+INFLUX_SPOOL_MAX_MB = float(os.getenv("INFLUX_SPOOL_MAX_MB", "256"))
+INFLUX_SPOOL_SEGMENT_MB = float(os.getenv("INFLUX_SPOOL_SEGMENT_MB", "4"))
+INFLUX_SPOOL_REPLAY_BATCH = int(os.getenv("INFLUX_SPOOL_REPLAY_BATCH", "5000"))
+
+# 세션별 대화 캐시 설정 (채팅 기록 읽기 경로)
+CHAT_CACHE_MAX_SESSIONS = int(os.getenv("CHAT_CACHE_MAX_SESSIONS", "1000"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "3600"))
+CHAT_CACHE_WINDOW = int(os.getenv("CHAT_CACHE_WINDOW", "20"))
+
+# 이력 집계 결과 캐시 설정 (/api/history)
+HISTORY_CACHE_MAX_ENTRIES = int(os.getenv("HISTORY_CACHE_MAX_ENTRIES", "256"))
+HISTORY_CACHE_TAIL_TTL = float(os.getenv("HISTORY_CACHE_TAIL_TTL", "10"))
+HISTORY_CACHE_SETTLE = float(os.getenv("HISTORY_CACHE_SETTLE", "5"))
+
+# 롤업 티어로 대체할 수 없을 때 원시 데이터를 직접 집계할 최대 조회 범위 (초)
+RAW_HISTORY_MAX_RANGE = 24 * 3600
+
+KOREA_TZ = timezone(timedelta(hours=9))
+
+# 과거 데이터 응답용 메트릭 이름과 단위
+HISTORICAL_METRIC_NAMES = {
+    'temperature': '온도',
+    'humidity': '습도', 
+    'soil': '토양습도',
+    'co2': 'CO2',
+    'power': '전력사용량'
+}
+HISTORICAL_METRIC_UNITS = {
+    'temperature': '°C',
+    'humidity': '%',
+    'soil': '%', 
+    'co2': 'ppm',
+    'power': 'W'
+}
+
+
+# Flux 쿼리 템플릿 - 값은 params로 전달 (동기/비동기 클라이언트 공용)
+flux_queries = FluxQueryRegistry(INFLUXDB_ORG, base_params={
+    "bucket": INFLUXDB_BUCKET,
+    "default_greenhouse": DEFAULT_GREENHOUSE
+})
+
+# 온실 태그 필터 - greenhouse 태그 도입 전에 기록된 (태그 없는) 데이터는 기본 온실 데이터로 취급
+_GREENHOUSE_FILTER = \
+    '|> filter(fn: (r) => r.greenhouse == p_greenhouse or (p_greenhouse == p_default_greenhouse and not exists r.greenhouse))'
+
+flux_queries.define("chat_history", '''
+    from(bucket: p_bucket)
+        |> range(start: p_start)
+        |> filter(fn: (r) => r._measurement == "chat_messages")
+        |> filter(fn: (r) => r.session_id == p_session_id)
+        |> filter(fn: (r) => r._field == "content")
+        |> sort(columns: ["_time"])
+        |> tail(n: p_limit)
+''', params=("session_id", "limit"), defaults={"start": timedelta(hours=-24)})
+
+flux_queries.define("historical_sensor", f'''
+    from(bucket: p_bucket)
+        |> range(start: p_start, stop: p_stop)
+        |> filter(fn: (r) => r._measurement == "sensor_data")
+        {_GREENHOUSE_FILTER}
+        |> filter(fn: (r) => r.metric == p_metric)
+        |> filter(fn: (r) => r.mode == "hardware")
+        |> filter(fn: (r) => r._field == "value")
+        |> sort(columns: ["_time"])
+''', params=("start", "stop", "metric"), defaults={"greenhouse": DEFAULT_GREENHOUSE})
+
+flux_queries.define("rollup_history", f'''
+    from(bucket: p_bucket)
+        |> range(start: p_start)
+        |> filter(fn: (r) => r._measurement == "{ROLLUP_MEASUREMENT}")
+        |> filter(fn: (r) => r.tier == p_tier)
+        {_GREENHOUSE_FILTER}
+        |> filter(fn: (r) => r.metric == p_metric)
+        |> filter(fn: (r) => r.mode == "hardware")
+        |> filter(fn: (r) => r._field == "mean")
+        |> aggregateWindow(every: p_every, fn: mean, createEmpty: false)
+        |> sort(columns: ["_time"])
+''', params=("start", "tier", "metric", "every"), defaults={"greenhouse": DEFAULT_GREENHOUSE})
+
+# 재시작 시 이어서 누적할 현재 롤업 구간 (구간 시작 시각 이후의 행 = 현재 구간의 미완성 행)
+flux_queries.define("open_rollup_buckets", f'''
+    from(bucket: p_bucket)
+        |> range(start: p_start)
+        |> filter(fn: (r) => r._measurement == "{ROLLUP_MEASUREMENT}")
+        |> filter(fn: (r) => r.tier == p_tier)
+        |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+''', params=("start", "tier"))
+
+flux_queries.define("raw_history", f'''
+    from(bucket: p_bucket)
+        |> range(start: p_start)
+        |> filter(fn: (r) => r._measurement == "sensor_data")
+        {_GREENHOUSE_FILTER}
+        |> filter(fn: (r) => r.metric == p_metric)
+        |> filter(fn: (r) => r._field == "value")
+        |> filter(fn: (r) => r.mode == "hardware")
+        |> aggregateWindow(every: p_every, fn: mean, createEmpty: false)
+        |> sort(columns: ["_time"])
+''', params=("start", "metric", "every"), defaults={"greenhouse": DEFAULT_GREENHOUSE})
+
+# 다중 항목 피벗 조회 - 롤업 티어와 원시 데이터는 필터만 다름
+_MULTI_METRIC_HISTORY = '''
+    from(bucket: p_bucket)
+        |> range(start: p_start, stop: p_stop)
+        |> filter(fn: (r) => {source_filter})
+        {greenhouse_filter}
+        |> filter(fn: (r) => r.mode == "hardware")
+        |> filter(fn: (r) => contains(value: r.metric, set: p_metrics))
+        |> aggregateWindow(every: p_every, fn: mean, createEmpty: false)
+        |> keep(columns: ["_time", "_value", "metric"])
+        |> group()
+        |> pivot(rowKey: ["_time"], columnKey: ["metric"], valueColumn: "_value")
+        |> sort(columns: ["_time"])
+'''
+flux_queries.define("multi_metric_rollup", _MULTI_METRIC_HISTORY.format(
+    source_filter=f'r._measurement == "{ROLLUP_MEASUREMENT}" and r.tier == p_tier and r._field == "mean"',
+    greenhouse_filter=_GREENHOUSE_FILTER
+), params=("start", "stop", "tier", "metrics", "every"), defaults={"greenhouse": DEFAULT_GREENHOUSE})
+flux_queries.define("multi_metric_raw", _MULTI_METRIC_HISTORY.format(
+    source_filter='r._measurement == "sensor_data" and r._field == "value"',
+    greenhouse_filter=_GREENHOUSE_FILTER
+), params=("start", "stop", "metrics", "every"), defaults={"greenhouse": DEFAULT_GREENHOUSE})
+
+# 보존 기간 정리 보고용 - 삭제할 구간만 레코드 단위로 세기 위해 _time만 남겨 집계
+flux_queries.define("count_between", '''
+    from(bucket: p_bucket)
+        |> range(start: p_start, stop: p_stop)
+        |> filter(fn: (r) => r._measurement == p_measurement)
+        |> filter(fn: (r) => p_tier == "" or r.tier == p_tier)
+        |> keep(columns: ["_time"])
+        |> group()
+        |> count(column: "_time")
+''', params=("measurement", "start", "stop"), defaults={"tier": ""})
+
+# 점검 스크립트(check_influx_data.py)용
+flux_queries.define("recent_metric_values", '''
+    from(bucket: p_bucket)
+        |> range(start: p_start)
+        |> filter(fn: (r) => r._measurement == "sensor_data")
+        |> filter(fn: (r) => r.metric == p_metric)
+        |> filter(fn: (r) => r._field == "value")
+        |> sort(columns: ["_time"])
+        |> tail(n: p_limit)
+''', params=("metric", "limit"), defaults={"start": timedelta(hours=-2)})
+
+flux_queries.define("metric_count_by_mode", '''
+    from(bucket: p_bucket)
+        |> range(start: p_start)
+        |> filter(fn: (r) => r._measurement == "sensor_data")
+        |> filter(fn: (r) => r.metric == p_metric)
+        |> group(columns: ["mode"])
+        |> count()
+''', params=("metric",), defaults={"start": timedelta(hours=-24)})
+
+
+# 동기 클라이언트와 비동기 클라이언트(async_clients)가 공유하는 파라미터 구성/결과 변환
+
+def parse_chat_history(tables):
+    """채팅 히스토리 쿼리 결과를 메시지 목록으로 변환합니다."""
+    history = []
+    for table in tables:
+        for record in table.records:
+            history.append({
+                "role": record.values.get("role", "unknown"),
+                "content": record.get_value(),
+                "timestamp": record.get_time().isoformat()
+            })
+    return history
+
+def historical_query_params(target_time, metric, tolerance_minutes):
+    """목표 시각(한국시간) 전후의 하드웨어 센서 데이터를 조회하는 historical_sensor 쿼리 파라미터"""
+    # 한국시간(UTC+9)을 UTC로 변환 - timezone-naive인 경우 한국시간으로 가정
+    if target_time.tzinfo is None:
+        target_time_korea = target_time.replace(tzinfo=KOREA_TZ)
+    else:
+        target_time_korea = target_time
+    target_time_utc = target_time_korea.astimezone(timezone.utc)
+    
+    # 목표 시간 주변의 데이터 범위 설정 (UTC 기준)
+    start_time = target_time_utc - timedelta(minutes=tolerance_minutes)
+    end_time = target_time_utc + timedelta(minutes=tolerance_minutes)
+    
+    logger.info(f"한국시간 {target_time.strftime('%Y-%m-%d %H:%M:%S')} → UTC {target_time_utc.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    return {"start": start_time, "stop": end_time, "metric": metric}
+
+def format_history_points(points):
+    """(epoch 초, 값) 목록을 /api/history 응답 형식으로 변환합니다."""
+    return [
+        {"timestamp": datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"), "value": value}
+        for epoch, value in points
+    ]
+
+def historical_error(message):
+    return {
+        'success': False,
+        'data': None,
+        'actual_time': None,
+        'message': message
+    }
+
+def parse_historical_sensor_data(tables, target_time, metric):
+    """과거 데이터 쿼리 결과에서 목표 시각에 가장 가까운 값을 찾아 응답을 만듭니다."""
+    records = []
+    for table in tables:
+        for record in table.records:
+            # UTC 시간을 한국시간으로 변환 후 timezone-naive로 (기존 target_time과 호환)
+            korea_time = record.get_time().astimezone(KOREA_TZ).replace(tzinfo=None)
+            records.append({
+                'time': korea_time,
+                'value': record.get_value()
+            })
+    
+    if not records:
+        return historical_error(f'{target_time.strftime("%Y-%m-%d %H:%M")} 시점의 {metric} 데이터를 찾을 수 없습니다.')
+    
+    # 목표 시간에 가장 가까운 데이터 찾기 (한국시간 기준, timezone-naive)
+    target_time_naive = target_time.replace(tzinfo=None) if target_time.tzinfo else target_time
+    closest_record = min(records, key=lambda x: abs((x['time'] - target_time_naive).total_seconds()))
+    
+    metric_korean = HISTORICAL_METRIC_NAMES.get(metric, metric)
+    unit = HISTORICAL_METRIC_UNITS.get(metric, '')
+    
+    logger.info(f"과거 데이터 조회 성공: {metric} = {closest_record['value']}{unit} "
+               f"({closest_record['time'].strftime('%Y-%m-%d %H:%M:%S')} 한국시간)")
+    
+    return {
+        'success': True,
+        'data': closest_record['value'],
+        'actual_time': closest_record['time'],
+        'message': f'{closest_record["time"].strftime("%Y년 %m월 %d일 %H시 %M분")} 시점의 '
+                  f'{metric_korean}는 {closest_record["value"]}{unit}였습니다.'
+    }
+
 class InfluxDBManager:
     """InfluxDB 연결 및 데이터 관리 클래스"""
     
     def __init__(self):
         """InfluxDB 클라이언트 초기화"""
+        self.spool = None
+        self.replayer = None
+        try:
+            self.spool = WriteAheadSpool(
+                INFLUX_SPOOL_DIR,
+                segment_bytes=int(INFLUX_SPOOL_SEGMENT_MB * 1024 * 1024),
+                max_bytes=int(INFLUX_SPOOL_MAX_MB * 1024 * 1024)
+            )
+        except OSError as e:
+            logger.error(f"스풀 디렉터리 사용 불가 - 장애 시 데이터 유실 가능: {e}")
+        
         try:
             self.client = InfluxDBClient(
                 url=INFLUXDB_URL,
@@ -30,19 +296,82 @@ class InfluxDBManager:
             )
             self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
             self.query_api = self.client.query_api()
+            # 요청 경로에서는 큐에 넣기만 하고 전송은 배치 스레드가 담당
+            self.writer = BatchingWriter(
+                self._write_records,
+                batch_size=INFLUX_BATCH_SIZE,
+                flush_interval=INFLUX_FLUSH_INTERVAL,
+                max_queue=INFLUX_QUEUE_SIZE,
+                drop_policy=INFLUX_DROP_POLICY,
+                max_retries=INFLUX_MAX_RETRIES,
+                on_failure=self._spool_records
+            )
+            if self.spool:
+                # 연결이 복구되면 스풀을 큰 배치로 재전송
+                self.replayer = SpoolReplayer(
+                    self.spool,
+                    self._write_records,
+                    self.client.ping,
+                    batch_size=INFLUX_SPOOL_REPLAY_BATCH
+                )
             logger.info("InfluxDB 연결 성공")
         except Exception as e:
             logger.error(f"InfluxDB 연결 실패: {e}")
             self.client = None
             self.write_api = None
             self.query_api = None
+            self.writer = None
     
-    def save_sensor_data(self, sensor_data):
-        """센서 데이터를 InfluxDB에 저장"""
-        if not self.write_api:
-            logger.warning("InfluxDB 연결 없음 - 센서 데이터 저장 건너뜀")
+    def _write_records(self, records):
+        """라인 프로토콜 레코드 배치를 한 번의 요청으로 기록합니다. (배치 스레드에서 호출)"""
+        self.write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=records,
+                             write_precision=WritePrecision.NS)
+    
+    def _spool_records(self, records):
+        """DB에 기록하지 못한 레코드를 디스크 스풀에 보관합니다."""
+        if not self.spool:
             return False
+        spooled = self.spool.append(records)
+        if spooled and self.replayer:
+            self.replayer.wakeup()
+        return spooled
+    
+    def _enqueue_records(self, records):
+        """쓰기 큐에 레코드를 넣습니다. 클라이언트가 없으면 바로 스풀에 기록합니다."""
+        if self.writer:
+            return self.writer.enqueue(records)
+        return self._spool_records(records)
+    
+    def get_status(self):
+        """연결 정보와 쓰기 파이프라인/스풀 통계를 반환합니다."""
+        spool_status = None
+        if self.spool:
+            spool_status = self.spool.get_stats()
+            spool_status["replay"] = self.replayer.get_stats() if self.replayer else None
         
+        return {
+            "connected": self.client is not None,
+            "url": INFLUXDB_URL,
+            "org": INFLUXDB_ORG,
+            "bucket": INFLUXDB_BUCKET,
+            "writer": self.writer.get_stats() if self.writer else None,
+            "spool": spool_status,
+            "queries": flux_queries.get_stats()
+        }
+    
+    def close(self):
+        """남은 레코드를 플러시하고 클라이언트를 닫습니다. 전송하지 못한 레코드는 스풀에 남습니다."""
+        if self.replayer:
+            self.replayer.stop()
+        if self.writer:
+            self.writer.close()
+        if self.spool:
+            self.spool.close()
+        if self.client:
+            self.client.close()
+    
+    def save_sensor_data(self, sensor_data):
+        """센서 데이터를 InfluxDB에 저장"""
         try:
             points = []
             timestamp = datetime.utcnow()
@@ -50,11 +379,13 @@ class InfluxDBManager:
             # 센서 메트릭별로 개별 포인트 생성
             sensor_metrics = ["temperature", "humidity", "power", "soil"]
             device_metrics = ["device_fan", "device_water", "device_light", "device_window"]
+            greenhouse = sensor_data.get("greenhouse", DEFAULT_GREENHOUSE)
             
             for metric, value in sensor_data.items():
                 if metric in sensor_metrics:
                     # 센서 데이터는 metric을 tag로, value를 field로 저장
                     point = Point("sensor_data") \
+                        .tag("greenhouse", greenhouse) \
                         .tag("metric", metric) \
                         .tag("mode", sensor_data.get("mode", "unknown")) \
                         .field("value", float(value)) \
@@ -65,17 +396,16 @@ class InfluxDBManager:
                     # 장치 상태는 별도 measurement로 저장
                     device_name = metric.replace("device_", "")
                     point = Point("device_status") \
+                        .tag("greenhouse", greenhouse) \
                         .tag("device", device_name) \
                         .tag("mode", sensor_data.get("mode", "unknown")) \
                         .field("status", int(value)) \
                         .time(timestamp, WritePrecision.NS)
                     points.append(point)
             
-            # 배치로 데이터 저장
+            # 쓰기 큐에 추가 (실제 전송은 배치 스레드에서)
             if points:
-                self.write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=points)
-                logger.info(f"센서 데이터 저장 완료: {len(points)}개 포인트")
-                return True
+                return self._enqueue_records([point.to_line_protocol() for point in points])
             else:
                 logger.warning("저장할 데이터 포인트가 없습니다")
                 return False
@@ -84,12 +414,161 @@ class InfluxDBManager:
             logger.error(f"센서 데이터 저장 실패: {e}")
             return False
     
+    def save_rollup_buckets(self, buckets):
+        """RollupEngine이 닫은 구간들을 sensor_rollup 측정값으로 저장"""
+        points = []
+        for bucket in buckets:
+            point = Point(ROLLUP_MEASUREMENT) \
+                .tag("greenhouse", bucket.get("greenhouse") or DEFAULT_GREENHOUSE) \
+                .tag("tier", bucket["tier"]) \
+                .tag("metric", bucket["metric"]) \
+                .tag("mode", bucket["mode"]) \
+                .field("min", float(bucket["min"])) \
+                .field("max", float(bucket["max"])) \
+                .field("mean", float(bucket["mean"])) \
+                .field("count", int(bucket["count"])) \
+                .time(bucket["start"], WritePrecision.S)
+            points.append(point)
+        return self._enqueue_records([point.to_line_protocol() for point in points])
+    
+    def get_open_rollup_buckets(self, tiers=ROLLUP_TIERS, now=None):
+        """티어별 현재 구간에 이미 기록된 롤업 행을 조회합니다. (RollupEngine.seed용)"""
+        now = time.time() if now is None else now
+        buckets = []
+        for tier_name, seconds in tiers:
+            start = int(now // seconds) * seconds
+            result = self.run_query("open_rollup_buckets", start=datetime.fromtimestamp(start, timezone.utc),
+                                    tier=tier_name)
+            for table in result:
+                for record in table.records:
+                    values = record.values
+                    if values.get("count") is None:
+                        continue
+                    buckets.append({
+                        "greenhouse": values.get("greenhouse") or DEFAULT_GREENHOUSE,
+                        "tier": tier_name,
+                        "metric": values["metric"],
+                        "mode": values["mode"],
+                        "start": int(record.get_time().timestamp()),
+                        "min": float(values["min"]),
+                        "max": float(values["max"]),
+                        "mean": float(values["mean"]),
+                        "count": int(values["count"]),
+                    })
+        return buckets
+    
+    def get_metric_history(self, metric, range_seconds=24 * 3600, every_seconds=30 * 60, greenhouse=DEFAULT_GREENHOUSE):
+        """하드웨어 센서 이력을 요청 해상도로 집계해 조회합니다.
+        
+        Args:
+            metric (str): 센서 항목
+            range_seconds (int): 현재로부터 조회할 범위 (초)
+            every_seconds (int): 집계 간격 (초)
+            greenhouse (str): 온실 ID
+        
+        Returns:
+            list: [{"timestamp": str, "value": float}, ...]
+        """
+        return format_history_points(
+            self.get_metric_points(metric, timedelta(seconds=-range_seconds), every_seconds, greenhouse))
+    
+    def get_metric_points(self, metric, start, every_seconds, greenhouse=DEFAULT_GREENHOUSE):
+        """하드웨어 센서 이력을 집계 구간 단위 (구간 종료 epoch 초, 값) 목록으로 조회합니다.
+        
+        요청 간격을 만족하는 가장 거친 롤업 티어를 사용하고, 롤업이 아직 없으면
+        짧은 범위에 한해 원시 데이터를 집계합니다.
+        
+        Args:
+            metric (str): 센서 항목
+            start (timedelta|datetime): 상대 시작(음수 기간) 또는 UTC 시작 시각
+            every_seconds (int): 집계 간격 (초)
+            greenhouse (str): 온실 ID
+        
+        Returns:
+            list: [(epoch 초, float), ...]
+        """
+        if not self.query_api:
+            return []
+        
+        if isinstance(start, timedelta):
+            range_seconds = -start.total_seconds()
+        else:
+            range_seconds = (datetime.now(timezone.utc) - start).total_seconds()
+        every = timedelta(seconds=every_seconds)
+        
+        tier = select_rollup_tier(every_seconds)
+        if tier:
+            points = self._query_points("rollup_history", start=start, tier=tier[0], metric=metric, every=every,
+                                        greenhouse=greenhouse)
+            if points:
+                logger.info(f"{metric} 이력 조회: {tier[0]} 롤업 티어, {len(points)}개")
+                return points
+        
+        if range_seconds > RAW_HISTORY_MAX_RANGE:
+            return []
+        
+        points = self._query_points("raw_history", start=start, metric=metric, every=every, greenhouse=greenhouse)
+        logger.info(f"{metric} 이력 조회: 원시 데이터 집계, {len(points)}개")
+        return points
+    
+    def get_multi_metric_history(self, metrics, start, stop, every_seconds, greenhouse=DEFAULT_GREENHOUSE):
+        """여러 센서 항목의 이력을 한 번의 피벗 쿼리로 조회해 열 지향 형식으로 반환합니다.
+        
+        Args:
+            metrics (list): 센서 항목 목록
+            start (datetime): 조회 시작 시각 (UTC)
+            stop (datetime): 조회 종료 시각 (UTC)
+            every_seconds (int): 집계 간격 (초)
+            greenhouse (str): 온실 ID
+        
+        Returns:
+            dict: {"timestamps": [epoch 초, ...], "series": {metric: [값 또는 None, ...]}, "source": 티어 이름 또는 "raw"}
+        """
+        empty = {"timestamps": [], "series": {metric: [] for metric in metrics}, "source": None}
+        if not self.query_api:
+            return empty
+        
+        params = {"start": start, "stop": stop, "metrics": list(metrics), "every": timedelta(seconds=every_seconds),
+                  "greenhouse": greenhouse}
+        
+        sources = []
+        tier = select_rollup_tier(every_seconds)
+        if tier:
+            sources.append((tier[0], "multi_metric_rollup", {"tier": tier[0]}))
+        if (stop - start).total_seconds() <= RAW_HISTORY_MAX_RANGE:
+            sources.append(("raw", "multi_metric_raw", {}))
+        
+        for source, query_name, source_params in sources:
+            result = self.run_query(query_name, **params, **source_params)
+            
+            timestamps = []
+            series = {metric: [] for metric in metrics}
+            for table in result:
+                for record in table.records:
+                    timestamps.append(int(record.get_time().timestamp()))
+                    for metric in metrics:
+                        value = record.values.get(metric)
+                        series[metric].append(round(value, 2) if value is not None else None)
+            
+            if timestamps:
+                logger.info(f"다중 항목 이력 조회: {source}, {len(metrics)}개 항목 x {len(timestamps)}개")
+                return {"timestamps": timestamps, "series": series, "source": source}
+        
+        return empty
+    
+    def run_query(self, name, **params):
+        """이름 붙은 Flux 쿼리 템플릿을 실행합니다. (flux_queries 참고)"""
+        return flux_queries.run(self.query_api, name, **params)
+    
+    def _query_points(self, name, **params):
+        result = self.run_query(name, **params)
+        return [
+            (int(record.get_time().timestamp()), round(record.get_value(), 2))
+            for table in result for record in table.records
+        ]
+    
     def save_chat_message(self, session_id, message):
         """채팅 메시지를 InfluxDB에 저장"""
-        if not self.write_api:
-            logger.warning("InfluxDB 연결 없음 - 채팅 메시지 저장 건너뜀")
-            return False
-        
         try:
             point = Point("chat_messages") \
                 .tag("session_id", session_id) \
@@ -97,9 +576,9 @@ class InfluxDBManager:
                 .field("content", message.get("content", "")) \
                 .time(datetime.utcnow(), WritePrecision.NS)
             
-            self.write_api.write(bucket=INFLUXDB_BUCKET, org=INFLUXDB_ORG, record=point)
-            logger.info(f"채팅 메시지 저장: {session_id} - {message.get('role')}")
-            return True
+            queued = self._enqueue_records([point.to_line_protocol()])
+            logger.info(f"채팅 메시지 저장 요청: {session_id} - {message.get('role')}")
+            return queued
             
         except Exception as e:
             logger.error(f"채팅 메시지 저장 실패: {e}")
@@ -112,27 +591,8 @@ class InfluxDBManager:
             return []
         
         try:
-            query = f'''
-            from(bucket: "{INFLUXDB_BUCKET}")
-                |> range(start: -24h)
-                |> filter(fn: (r) => r._measurement == "chat_messages")
-                |> filter(fn: (r) => r.session_id == "{session_id}")
-                |> filter(fn: (r) => r._field == "content")
-                |> sort(columns: ["_time"])
-                |> tail(n: {limit})
-            '''
-            
-            result = self.query_api.query(org=INFLUXDB_ORG, query=query)
-            
-            history = []
-            for table in result:
-                for record in table.records:
-                    history.append({
-                        "role": record.values.get("role", "unknown"),
-                        "content": record.get_value(),
-                        "timestamp": record.get_time().isoformat()
-                    })
-            
+            result = self.run_query("chat_history", session_id=session_id, limit=limit)
+            history = parse_chat_history(result)
             logger.info(f"채팅 히스토리 조회: {session_id} - {len(history)}개 메시지")
             return history
             
@@ -140,6 +600,23 @@ class InfluxDBManager:
             logger.error(f"채팅 히스토리 조회 실패: {e}")
             return []
     
+    def count_records_between(self, measurement, start, stop, tier=None):
+        """measurement(롤업이면 tier)에서 [start, stop) 구간에 기록된 필드 값 수를 셉니다. (보존 기간 정리 보고용)"""
+        result = self.run_query("count_between", measurement=measurement, start=start, stop=stop, tier=tier or "")
+        return sum(int(record.values.get("_time") or 0) for table in result for record in table.records)
+    
+    def delete_before(self, measurement, stop, tier=None):
+        """delete API로 measurement(롤업이면 tier)에서 stop 이전 데이터를 일괄 삭제합니다."""
+        predicate = f'_measurement="{measurement}"' + (f' AND tier="{tier}"' if tier else "")
+        self.client.delete_api().delete(
+            start=datetime(1970, 1, 1, tzinfo=timezone.utc),
+            stop=stop,
+            predicate=predicate,
+            bucket=INFLUXDB_BUCKET,
+            org=INFLUXDB_ORG
+        )
+        logger.info(f"보존 기간 만료 데이터 삭제: {predicate} (~{stop.isoformat()})")
+    
     def get_historical_sensor_data(self, target_time, metric, tolerance_minutes=30):
         """특정 시간대의 센서 데이터를 조회합니다.
         
@@ -153,125 +630,57 @@ class InfluxDBManager:
         """
         if not self.query_api:
             logger.warning("InfluxDB 연결 없음 - 과거 데이터 조회 불가")
-            return {
-                'success': False,
-                'data': None,
-                'actual_time': None,
-                'message': 'InfluxDB 연결이 없습니다.'
-            }
+            return historical_error('InfluxDB 연결이 없습니다.')
         
         try:
-            # 한국시간(UTC+9)을 UTC로 변환 - timezone 정보 추가
-            if target_time.tzinfo is None:
-                # timezone-naive인 경우 한국시간으로 가정
-                korea_tz = timezone(timedelta(hours=9))
-                target_time_korea = target_time.replace(tzinfo=korea_tz)
-            else:
-                target_time_korea = target_time
-            
-            # UTC로 변환
-            target_time_utc = target_time_korea.astimezone(timezone.utc)
-            
-            # 목표 시간 주변의 데이터 범위 설정 (UTC 기준)
-            start_time = target_time_utc - timedelta(minutes=tolerance_minutes)
-            end_time = target_time_utc + timedelta(minutes=tolerance_minutes)
-            
-            logger.info(f"한국시간 {target_time.strftime('%Y-%m-%d %H:%M:%S')} → UTC {target_time_utc.strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            # InfluxDB 쿼리 구성
-            query = f'''
-            from(bucket: "{INFLUXDB_BUCKET}")
-                |> range(start: {start_time.strftime("%Y-%m-%dT%H:%M:%SZ")}, 
-                         stop: {end_time.strftime("%Y-%m-%dT%H:%M:%SZ")})
-                |> filter(fn: (r) => r._measurement == "sensor_data")
-                |> filter(fn: (r) => r.metric == "{metric}")
-                |> filter(fn: (r) => r.mode == "hardware")
-                |> filter(fn: (r) => r._field == "value")
-                |> sort(columns: ["_time"])
-            '''
-            
-            result = self.query_api.query(org=INFLUXDB_ORG, query=query)
-            
-            # 결과 처리
-            records = []
-            for table in result:
-                for record in table.records:
-                    # UTC 시간을 한국시간으로 변환
-                    utc_time = record.get_time()  # timezone-aware UTC
-                    korea_tz = timezone(timedelta(hours=9))
-                    korea_time = utc_time.astimezone(korea_tz)
-                    # timezone-naive로 변환 (기존 target_time과 호환)
-                    korea_time_naive = korea_time.replace(tzinfo=None)
-                    
-                    records.append({
-                        'time': korea_time_naive,
-                        'value': record.get_value()
-                    })
-            
-            if not records:
-                return {
-                    'success': False,
-                    'data': None,
-                    'actual_time': None,
-                    'message': f'{target_time.strftime("%Y-%m-%d %H:%M")} 시점의 {metric} 데이터를 찾을 수 없습니다.'
-                }
-            
-            # 목표 시간에 가장 가까운 데이터 찾기 (한국시간 기준, timezone-naive)
-            target_time_naive = target_time.replace(tzinfo=None) if target_time.tzinfo else target_time
-            closest_record = min(records, key=lambda x: abs((x['time'] - target_time_naive).total_seconds()))
-            
-            # 시간 차이 계산 (분 단위)
-            time_diff_minutes = abs((closest_record['time'] - target_time_naive).total_seconds()) / 60
-            
-            # 메트릭 이름을 한국어로 변환
-            metric_names = {
-                'temperature': '온도',
-                'humidity': '습도', 
-                'soil': '토양습도',
-                'co2': 'CO2',
-                'power': '전력사용량'
-            }
-            metric_korean = metric_names.get(metric, metric)
-            
-            # 단위 설정
-            units = {
-                'temperature': '°C',
-                'humidity': '%',
-                'soil': '%', 
-                'co2': 'ppm',
-                'power': 'W'
-            }
-            unit = units.get(metric, '')
-            
-            logger.info(f"과거 데이터 조회 성공: {metric} = {closest_record['value']}{unit} "
-                       f"({closest_record['time'].strftime('%Y-%m-%d %H:%M:%S')} 한국시간)")
-            
-            return {
-                'success': True,
-                'data': closest_record['value'],
-                'actual_time': closest_record['time'],
-                'message': f'{closest_record["time"].strftime("%Y년 %m월 %d일 %H시 %M분")} 시점의 '
-                          f'{metric_korean}는 {closest_record["value"]}{unit}였습니다.'
-            }
+            result = self.run_query("historical_sensor", **historical_query_params(target_time, metric, tolerance_minutes))
+            return parse_historical_sensor_data(result, target_time, metric)
             
         except Exception as e:
             logger.error(f"과거 센서 데이터 조회 실패: {e}")
-            return {
-                'success': False,
-                'data': None,
-                'actual_time': None,
-                'message': f'데이터 조회 중 오류가 발생했습니다: {str(e)}'
-            }
+            return historical_error(f'데이터 조회 중 오류가 발생했습니다: {str(e)}')
     
-    def cleanup_expired_sessions(self):
-        """만료된 세션 데이터 정리"""
-        try:
-            logger.info("세션 정리 수행")
-        except Exception as e:
-            logger.error(f"세션 정리 실패: {e}")
+# 글로벌 인스턴스 - init_storage()가 만듦 (임포트만으로는 클라이언트와 쓰기/재전송 스레드를 시작하지 않음)
+influx_manager = None
+conversation_cache = None
+history_cache = None
+_init_lock = threading.Lock()
 
-# 글로벌 인스턴스 생성
-influx_manager = InfluxDBManager()
+def init_storage():
+    """
+    InfluxDB 클라이언트(배치 쓰기, 스풀 재전송 스레드)와 대화/이력 캐시를 만듭니다.
+    여러 번 호출해도 한 번만 만들며 앱 시작 작업이나 스크립트가 호출합니다.
+    
+    Returns:
+        InfluxDBManager: 전역 저장소 인스턴스
+    """
+    global influx_manager, conversation_cache, history_cache
+    with _init_lock:
+        if influx_manager is not None:
+            return influx_manager
+        manager = InfluxDBManager()
+        
+        # 세션별 대화 캐시 - 읽기는 캐시, 쓰기는 InfluxDB 배치 큐로 (write-behind)
+        conversation_cache = ConversationCache(
+            loader=manager.get_chat_history,
+            persist=manager.save_chat_message,
+            max_sessions=CHAT_CACHE_MAX_SESSIONS,
+            ttl_seconds=CHAT_CACHE_TTL,
+            window=CHAT_CACHE_WINDOW
+        )
+        
+        # /api/history 집계 결과 캐시 - 하드웨어 데이터가 기록되면 해당 항목의 마지막 구간만 다시 조회
+        history_cache = HistoryCache(
+            manager.get_metric_points,
+            max_entries=HISTORY_CACHE_MAX_ENTRIES,
+            tail_ttl=HISTORY_CACHE_TAIL_TTL,
+            settle_seconds=HISTORY_CACHE_SETTLE
+        )
+        
+        # 종료 시 큐에 남은 레코드 플러시
+        atexit.register(manager.close)
+        influx_manager = manager
+    return manager
 
 # 기존 함수 호환성 유지
 def save_chat_message(session_id, message):
@@ -280,11 +689,64 @@ def save_chat_message(session_id, message):
 def get_chat_history(session_id, limit=5):
     return influx_manager.get_chat_history(session_id, limit)
 
+def append_chat_message(session_id, message):
+    """대화 캐시에 메시지를 추가하고 InfluxDB 저장 큐에 넣습니다."""
+    return conversation_cache.append(session_id, message)
+
+def get_recent_chat(session_id, limit=5):
+    """대화 캐시에서 최근 메시지를 조회합니다. (캐시에 없으면 InfluxDB에서 복원)"""
+    return conversation_cache.get_recent(session_id, limit)
+
 def cleanup_expired_sessions():
-    return influx_manager.cleanup_expired_sessions()
+    """TTL이 지난 세션을 대화 캐시에서 제거합니다."""
+    removed = conversation_cache.evict_expired()
+    if removed:
+        logger.info(f"만료된 대화 세션 정리: {removed}개")
+    return removed
 
+# 센서 기록 함수는 저장소 초기화 전(또는 초기화 실패 시)에 샘플러가 호출해도 기록만 건너뜀
 def save_sensor_data(sensor_data):
-    return influx_manager.save_sensor_data(sensor_data)
+    if influx_manager is None:
+        return False
+    queued = influx_manager.save_sensor_data(sensor_data)
+    if queued:
+        note_sensor_write(sensor_data.keys(), sensor_data.get("mode"),
+                          sensor_data.get("greenhouse", DEFAULT_GREENHOUSE))
+    return queued
+
+def note_sensor_write(metrics, mode, greenhouse=DEFAULT_GREENHOUSE):
+    """다른 프로세스(수집 데몬)가 기록한 센서 샘플을 이 프로세스의 이력 캐시에 알립니다."""
+    if history_cache is not None:
+        history_cache.note_write(metrics, mode, greenhouse)
+
+def save_rollup_buckets(buckets):
+    if influx_manager is None:
+        return False
+    queued = influx_manager.save_rollup_buckets(buckets)
+    if queued:
+        for bucket in buckets:
+            history_cache.note_write([bucket["metric"]], bucket["mode"], bucket.get("greenhouse") or DEFAULT_GREENHOUSE)
+    return queued
+
+def get_open_rollup_buckets():
+    """재시작 전에 기록된 현재 롤업 구간 (조회할 수 없으면 빈 목록 - 이 경우 그 구간은 재시작 후 샘플로만 기록됨)"""
+    if influx_manager is None:
+        return []
+    try:
+        return influx_manager.get_open_rollup_buckets()
+    except Exception as e:
+        logger.warning(f"미완성 롤업 구간 조회 실패: {e}")
+        return []
+
+def get_metric_history(metric, range_seconds=24 * 3600, every_seconds=30 * 60, greenhouse=DEFAULT_GREENHOUSE):
+    return influx_manager.get_metric_history(metric, range_seconds, every_seconds, greenhouse)
+
+def get_cached_metric_history(metric, range_seconds=24 * 3600, every_seconds=30 * 60, greenhouse=DEFAULT_GREENHOUSE):
+    """get_metric_history의 캐시 버전 (여러 클라이언트가 같은 이력을 조회해도 구간 경계마다 조회 한 번)"""
+    return format_history_points(history_cache.get(metric, range_seconds, every_seconds, greenhouse=greenhouse))
+
+def get_multi_metric_history(metrics, start, stop, every_seconds, greenhouse=DEFAULT_GREENHOUSE):
+    return influx_manager.get_multi_metric_history(metrics, start, stop, every_seconds, greenhouse)
 
 def get_historical_sensor_data(target_time, metric, tolerance_minutes=30):
     """특정 시간대의 센서 데이터를 조회합니다."""
@@ -0,0 +1,253 @@
+"""
+InfluxDB 비동기 배치 쓰기 모듈
+요청 핸들러는 라인 프로토콜 레코드를 큐에 넣기만 하고, 백그라운드 스레드가
+크기/주기 기준으로 모아서 한 번의 쓰기 요청으로 전송합니다.
+"""
+import random
+import threading
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# 큐가 가득 찼을 때의 처리 방식
+DROP_OLDEST = "drop_oldest"    # 가장 오래된 레코드를 버리고 새 레코드 추가
+DROP_NEWEST = "drop_newest"    # 새 레코드를 버림
+BLOCK = "block"                # enqueue_timeout 동안 대기 후 새 레코드를 버림
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class BatchingWriter:
+    """제한된 인메모리 큐와 배치 플러시 스레드를 가진 쓰기 파이프라인"""
+
+    def __init__(self, write_fn, batch_size=500, flush_interval=1.0, max_queue=10000,
+                 drop_policy=DROP_OLDEST, enqueue_timeout=0.5, max_retries=5,
+                 retry_base=0.5, retry_max=30.0, on_failure=None, name="influx-writer"):
+        """
+        배치 쓰기 파이프라인을 초기화하고 플러시 스레드를 시작합니다.
+
+        Args:
+            write_fn (callable): 라인 프로토콜 문자열 리스트를 받아 기록하는 함수. 실패 시 예외 발생.
+            batch_size (int): 한 번에 전송할 최대 레코드 수
+            flush_interval (float): 배치가 차지 않아도 플러시하는 주기 (초)
+            max_queue (int): 큐에 보관할 최대 레코드 수
+            drop_policy (str): 큐가 가득 찼을 때의 정책 (drop_oldest, drop_newest, block)
+            enqueue_timeout (float): block 정책에서 대기할 최대 시간 (초)
+            max_retries (int): 배치당 최대 재시도 횟수
+            retry_base (float): 재시도 백오프 기본 간격 (초)
+            retry_max (float): 재시도 백오프 최대 간격 (초)
+            on_failure (callable, optional): 재시도를 모두 소진한 배치를 넘겨받는 함수 (예: 디스크 스풀)
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"지원하지 않는 드롭 정책입니다: {drop_policy}")
+
+        self.write_fn = write_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.drop_policy = drop_policy
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.on_failure = on_failure
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flush_requested = False
+        self._in_flight = 0
+
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "handed_off": 0,
+            "batches": 0,
+            "retries": 0,
+            "last_error": None,
+            "last_flush": None,
+        }
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def enqueue(self, records):
+        """
+        레코드를 큐에 추가합니다. 네트워크 I/O 없이 즉시 반환합니다.
+
+        Args:
+            records (list[str]): 라인 프로토콜 레코드 목록
+
+        Returns:
+            bool: 모든 레코드가 큐에 들어갔으면 True
+        """
+        if not records:
+            return False
+
+        accepted = True
+        with self._cond:
+            if self._closed:
+                self.stats["dropped"] += len(records)
+                return False
+
+            for record in records:
+                if len(self._queue) >= self.max_queue:
+                    if self.drop_policy == DROP_OLDEST:
+                        self._queue.popleft()
+                        self.stats["dropped"] += 1
+                    elif self.drop_policy == BLOCK:
+                        self._flush_requested = True
+                        self._cond.notify_all()
+                        deadline = time.monotonic() + self.enqueue_timeout
+                        while len(self._queue) >= self.max_queue and not self._closed:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                break
+                            self._cond.wait(remaining)
+                        if len(self._queue) >= self.max_queue or self._closed:
+                            self.stats["dropped"] += 1
+                            accepted = False
+                            continue
+                    else:
+                        self.stats["dropped"] += 1
+                        accepted = False
+                        continue
+
+                self._queue.append(record)
+                self.stats["enqueued"] += 1
+
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+
+        return accepted
+
+    def flush(self, timeout=5.0):
+        """
+        큐에 쌓인 레코드를 즉시 전송하고 완료될 때까지 대기합니다.
+
+        Returns:
+            bool: 제한 시간 안에 큐가 비었으면 True
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._queue or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """남은 레코드를 플러시하고 플러시 스레드를 종료합니다."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"InfluxDB 쓰기 종료 시간 초과 - 미전송 레코드 {len(self._queue)}개")
+
+    def get_stats(self):
+        """큐 깊이와 누적 통계를 반환합니다."""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["queue_depth"] = len(self._queue)
+            stats["in_flight"] = self._in_flight
+        stats.update({
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "max_queue": self.max_queue,
+            "drop_policy": self.drop_policy,
+        })
+        return stats
+
+    def _take_batch(self):
+        """플러시 조건이 될 때까지 기다린 뒤 배치를 꺼냅니다. 종료 후 큐가 비면 None."""
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if len(self._queue) >= self.batch_size or self._flush_requested or self._closed:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            if not self._queue:
+                self._flush_requested = False
+                self._cond.notify_all()
+                return None if self._closed else []
+
+            count = min(self.batch_size, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(count)]
+            if not self._queue:
+                self._flush_requested = False
+            self._in_flight = len(batch)
+            # block 정책으로 대기 중인 생산자 깨우기
+            self._cond.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+
+            self._write_with_retry(batch)
+            with self._cond:
+                self._in_flight = 0
+                self.stats["last_flush"] = time.time()
+                self._cond.notify_all()
+
+    def _write_with_retry(self, batch):
+        attempt = 0
+        while True:
+            try:
+                self.write_fn(batch)
+                with self._cond:
+                    self.stats["written"] += len(batch)
+                    self.stats["batches"] += 1
+                logger.debug(f"InfluxDB 배치 쓰기 완료: {len(batch)}개 레코드")
+                return True
+            except Exception as e:
+                attempt += 1
+                with self._cond:
+                    self.stats["last_error"] = str(e)
+                    closed = self._closed
+                # 종료 중에는 재시도로 셧다운을 지연시키지 않음
+                if attempt > self.max_retries or closed:
+                    self._give_up(batch, attempt, e)
+                    return False
+
+                # 지수 백오프 + 지터 (동시 재시도 몰림 방지)
+                delay = min(self.retry_max, self.retry_base * (2 ** (attempt - 1)))
+                delay = random.uniform(delay / 2, delay)
+                with self._cond:
+                    self.stats["retries"] += 1
+                logger.warning(f"InfluxDB 배치 쓰기 재시도 {attempt}/{self.max_retries} ({delay:.2f}초 후): {e}")
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed, timeout=delay)
+
+    def _give_up(self, batch, attempt, error):
+        """재시도를 모두 소진한 배치를 on_failure로 넘기거나 폐기합니다."""
+        if self.on_failure:
+            try:
+                if self.on_failure(batch):
+                    with self._cond:
+                        self.stats["handed_off"] += len(batch)
+                    logger.warning(f"InfluxDB 배치 쓰기 실패 ({attempt}회 시도): {error} - {len(batch)}개 레코드 스풀로 이관")
+                    return
+            except Exception as e:
+                logger.error(f"실패 배치 처리 오류: {e}")
+
+        with self._cond:
+            self.stats["failed"] += len(batch)
+        logger.error(f"InfluxDB 배치 쓰기 실패 ({attempt}회 시도): {error} - {len(batch)}개 레코드 폐기")
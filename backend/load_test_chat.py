@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+/api/chat 동시성 부하 테스트 스크립트
+지연 시간을 설정할 수 있는 모의 Gemini 서버를 띄우고(GEMINI_API_BASE_URL로 연결),
+동기(gunicorn sync 워커) 서빙과 비동기(uvicorn ASGI) 서빙을 차례로 실행해
+동시 요청 수별 처리량과 지연 시간을 비교합니다.
+
+사용 예:
+    python load_test_chat.py                                  # 두 모드 모두, 기본 설정
+    python load_test_chat.py --modes async --concurrency 1,50,200 --upstream-delay 2
+    python load_test_chat.py --target http://localhost:8000   # 이미 실행 중인 서버에 부하만 발생
+    python load_test_chat.py --stream --concurrency 1,8       # /api/chat/stream 첫 조각 도착 시간(TTFT) 측정
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SERVER_COMMANDS = {
+    "sync": [sys.executable, "-m", "gunicorn", "-w", "{workers}", "-b", "127.0.0.1:{port}", "app:app"],
+    "async": [sys.executable, "-m", "uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", "{port}",
+              "--log-level", "warning"],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def start_mock_gemini(delay, stream_chunks=10):
+    """
+    generateContent 요청에 delay초 후 고정 응답을 돌려주는 모의 Gemini 서버.
+    streamGenerateContent 요청에는 delay초에 걸쳐 stream_chunks개의 SSE 조각을 나눠 보냅니다.
+    """
+    reply = "부하 테스트 응답입니다. " * stream_chunks
+
+    def candidate(text):
+        return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+
+    async def generate(request):
+        await request.read()
+        if not request.path.endswith(":streamGenerateContent"):
+            await asyncio.sleep(delay)
+            return web.json_response(candidate(reply))
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        piece = len(reply) // stream_chunks
+        for i in range(stream_chunks):
+            await asyncio.sleep(delay / stream_chunks)
+            text = reply[i * piece:] if i == stream_chunks - 1 else reply[i * piece:(i + 1) * piece]
+            await response.write(f"data: {json.dumps(candidate(text), ensure_ascii=False)}\r\n\r\n".encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    mock_app = web.Application()
+    mock_app.router.add_post("/v1/models/{tail:.*}", generate)
+    runner = web.AppRunner(mock_app, access_log=None)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner, f"http://127.0.0.1:{port}/v1"
+
+
+def start_server(mode, port, workers, gemini_base_url, log_file):
+    command = [part.format(port=port, workers=workers) for part in SERVER_COMMANDS[mode]]
+    env = dict(os.environ)
+    env.update({
+        "GEMINI_API_BASE_URL": gemini_base_url,
+        "GEMINI_API_KEY": env.get("GEMINI_API_KEY") or "load-test",
+        # 실행 중인 서버와 스풀 파일이 섞이지 않도록 임시 디렉터리 사용
+        "INFLUX_SPOOL_DIR": tempfile.mkdtemp(prefix=f"spool-{mode}-"),
+    })
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+
+
+async def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/api/status") as response:
+                    if response.status == 200:
+                        return True
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    return False
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(base_url, concurrency, total, timeout, stream=False):
+    """동시 요청 concurrency개를 유지하며 total개의 /api/chat(또는 /api/chat/stream) 요청을 보냅니다."""
+    latencies = []
+    first_chunk = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    path = "/api/chat/stream" if stream else "/api/chat"
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    async with session.post(f"{base_url}{path}", json={
+                        "message": f"부하 테스트 메시지 {i}",
+                        "sessionId": f"load-test-{i % concurrency}",
+                    }) as response:
+                        if response.status != 200:
+                            errors += 1
+                            return
+                        if stream:
+                            async for line in response.content:
+                                if line.startswith(b"event: chunk"):
+                                    first_chunk.append(time.monotonic() - started)
+                                    break
+                        await response.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                    return
+                latencies.append(time.monotonic() - started)
+
+        started = time.monotonic()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.monotonic() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "ttft_p50": percentile(first_chunk, 50),
+    }
+
+
+def print_result(mode, result):
+    fmt = lambda v: f"{v * 1000:8.0f}ms" if v is not None else "       -"
+    print(f"{mode:>6} | 동시 {result['concurrency']:>4} | 요청 {result['requests']:>5} | "
+          f"{result['throughput']:7.1f} req/s | p50 {fmt(result['p50'])} | p95 {fmt(result['p95'])} | "
+          + (f"TTFT p50 {fmt(result['ttft_p50'])} | " if result['ttft_p50'] is not None else "")
+          + f"오류 {result['errors']}")
+
+
+async def benchmark(base_url, mode, levels, rounds, timeout, stream=False):
+    results = []
+    for concurrency in levels:
+        result = await run_level(base_url, concurrency, concurrency * rounds, timeout, stream)
+        print_result(mode, result)
+        results.append(result)
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="/api/chat 동시성 부하 테스트")
+    parser.add_argument("--modes", default="sync,async", help="실행할 서빙 모드 (sync, async)")
+    parser.add_argument("--concurrency", default="1,8,32,128", help="동시 요청 수 목록")
+    parser.add_argument("--rounds", type=int, default=3, help="동시 요청 수 대비 총 요청 배수")
+    parser.add_argument("--upstream-delay", type=float, default=1.0, help="모의 Gemini 응답 지연 (초)")
+    parser.add_argument("--workers", type=int, default=4, help="sync 모드 gunicorn 워커 수")
+    parser.add_argument("--timeout", type=float, default=120, help="요청당 타임아웃 (초)")
+    parser.add_argument("--target", help="이미 실행 중인 서버 주소 (지정하면 서버를 띄우지 않음)")
+    parser.add_argument("--stream", action="store_true", help="/api/chat/stream으로 요청하고 첫 조각 도착 시간 측정")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    if args.target:
+        print(f"대상 서버: {args.target}")
+        await benchmark(args.target.rstrip("/"), "target", levels, args.rounds, args.timeout, args.stream)
+        return
+
+    runner, gemini_base_url = await start_mock_gemini(args.upstream_delay)
+    print(f"모의 Gemini 서버: {gemini_base_url} (지연 {args.upstream_delay}초)")
+
+    summary = {}
+    try:
+        for mode in args.modes.split(","):
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            with tempfile.NamedTemporaryFile("w", prefix=f"load-test-{mode}-", suffix=".log", delete=False) as log:
+                process = start_server(mode, port, args.workers, gemini_base_url, log)
+                print(f"\n[{mode}] 서버 시작 (pid {process.pid}, 로그 {log.name})")
+            try:
+                if not await wait_ready(base_url):
+                    print(f"[{mode}] 서버가 준비되지 않았습니다. 로그를 확인하세요: {log.name}")
+                    continue
+                summary[mode] = await benchmark(base_url, mode, levels, args.rounds, args.timeout, args.stream)
+            finally:
+                os.killpg(process.pid, signal.SIGTERM)
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    os.killpg(process.pid, signal.SIGKILL)
+    finally:
+        await runner.cleanup()
+
+    if len(summary) > 1:
+        print("\n=== 요약 (처리량 req/s) ===")
+        for index, concurrency in enumerate(levels):
+            row = " | ".join(f"{mode} {results[index]['throughput']:7.1f}" for mode, results in summary.items())
+            print(f"동시 {concurrency:>4}: {row}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
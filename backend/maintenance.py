@@ -0,0 +1,211 @@
+"""
+주기적 유지보수 작업 모듈
+요청 경로와 분리된 백그라운드 스레드에서 유휴 대화 세션 정리와
+측정값별 보존 기간 적용(InfluxDB delete API로 만료 데이터 일괄 삭제)을 실행하고,
+작업마다 실행 시간과 회수한 양을 기록합니다.
+"""
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+
+from rollups import parse_duration
+
+logger = logging.getLogger(__name__)
+
+# 기본 보존 기간 - 대화 기록과 롤업 티어만 정리
+# 원시 센서/장치 데이터(sensor_data, device_status)는 롤업이 생기기 전 기록까지 지우고
+# 과거 데이터 채팅 조회(HISTORY_REQUEST)도 원시 데이터를 조회하므로 MAINTENANCE_RETENTION에 직접 지정해야 정리
+DEFAULT_RETENTION = "chat_messages=30d,sensor_rollup:1m=30d,sensor_rollup:15m=180d,sensor_rollup:1h=730d"
+
+# 유지보수 작업 주기 (초)
+MAINTENANCE_SESSION_INTERVAL = float(os.getenv("MAINTENANCE_SESSION_INTERVAL", "60"))
+MAINTENANCE_RETENTION_INTERVAL = float(os.getenv("MAINTENANCE_RETENTION_INTERVAL", "3600"))
+MAINTENANCE_RETENTION = os.getenv("MAINTENANCE_RETENTION", DEFAULT_RETENTION)
+
+
+def parse_retention(spec):
+    """
+    'measurement[:tier]=기간,...' 형식의 보존 정책 문자열을 변환합니다.
+
+    Args:
+        spec (str): 예) "chat_messages=30d,sensor_rollup:1m=30d"
+
+    Returns:
+        list: [(measurement, tier 또는 None, 보존 기간(초)), ...]
+
+    Raises:
+        ValueError: 형식이 잘못된 경우
+    """
+    policies = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        target, sep, duration = item.partition("=")
+        if not sep:
+            raise ValueError(f"보존 정책 형식이 잘못되었습니다: {item}")
+        measurement, _, tier = target.strip().partition(":")
+        policies.append((measurement, tier or None, parse_duration(duration.strip())))
+    return policies
+
+
+def make_retention_task(manager, policies, interval=MAINTENANCE_RETENTION_INTERVAL):
+    """
+    보존 기간이 지난 레코드를 측정값별로 일괄 삭제하고 삭제한 구간의 레코드 수를 세는 작업을 만듭니다.
+    버킷 전체를 세지 않도록 직전 실행의 기준 시각부터 이번 기준 시각까지만 셉니다.
+    (첫 실행은 기준 시각 전 interval 구간만 세므로 그보다 오래된 레코드는 수에 포함되지 않음)
+
+    Args:
+        manager (InfluxDBManager): count_records_between/delete_before를 제공하는 저장소
+        policies (list): parse_retention 결과
+        interval (float): 작업 실행 주기 (초)
+    """
+    last_cutoffs = {}  # 정책 이름 -> 직전 실행의 기준 시각
+
+    def enforce_retention():
+        if not manager.client:
+            return {"records": 0, "skipped": "InfluxDB 연결 없음"}
+
+        now = datetime.now(timezone.utc)
+        reclaimed = {}
+        ranges = {}
+        for measurement, tier, seconds in policies:
+            cutoff = datetime.fromtimestamp(now.timestamp() - seconds, timezone.utc)
+            name = f"{measurement}:{tier}" if tier else measurement
+            previous = last_cutoffs.get(name)
+            start = previous or datetime.fromtimestamp(cutoff.timestamp() - interval, timezone.utc)
+
+            count = manager.count_records_between(measurement, start, cutoff, tier)
+            # 첫 실행은 세지 않은 더 오래된 레코드가 있을 수 있으므로 항상 삭제
+            if count or previous is None:
+                manager.delete_before(measurement, cutoff, tier)
+            last_cutoffs[name] = cutoff
+            reclaimed[name] = count
+            ranges[name] = {"start": start.isoformat(), "stop": cutoff.isoformat()}
+
+        return {"records": sum(reclaimed.values()), "by_measurement": reclaimed, "counted_ranges": ranges}
+
+    return enforce_retention
+
+
+class MaintenanceScheduler:
+    """작업마다 실행 주기를 가진 단일 스레드 유지보수 스케줄러"""
+
+    def __init__(self, name="maintenance"):
+        self.name = name
+        self._tasks = {}    # 작업 이름 -> {"fn", "interval", "next_run", 통계}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add_task(self, name, fn, interval, initial_delay=None):
+        """
+        주기 작업을 등록합니다.
+
+        Args:
+            name (str): 작업 이름
+            fn (callable): 인자 없이 호출되어 회수 결과(dict)를 반환하는 함수
+            interval (float): 실행 주기 (초)
+            initial_delay (float, optional): 첫 실행까지 대기 시간 (초). 기본값은 interval.
+        """
+        with self._lock:
+            self._tasks[name] = {
+                "fn": fn,
+                "interval": interval,
+                "next_run": time.monotonic() + (interval if initial_delay is None else initial_delay),
+                "runs": 0,
+                "failures": 0,
+                "total_reclaimed": 0,
+                "last_run": None,
+                "last_duration_ms": None,
+                "last_result": None,
+                "last_error": None,
+            }
+        self._wakeup.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run_now(self, name):
+        """작업을 다음 주기를 기다리지 않고 실행하도록 예약합니다."""
+        with self._lock:
+            if name not in self._tasks:
+                raise KeyError(name)
+            self._tasks[name]["next_run"] = time.monotonic()
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                now = time.monotonic()
+                due = [name for name, task in self._tasks.items() if task["next_run"] <= now]
+                next_run = min((task["next_run"] for task in self._tasks.values()), default=now + 60)
+
+            for name in due:
+                if self._stop.is_set():
+                    return
+                self._execute(name)
+
+            if not due:
+                self._wakeup.wait(max(0.0, next_run - time.monotonic()))
+                self._wakeup.clear()
+
+    def _execute(self, name):
+        task = self._tasks[name]
+        started = time.monotonic()
+        result = error = None
+        try:
+            result = task["fn"]()
+        except Exception as e:
+            error = e
+            logger.error(f"유지보수 작업 실패 ({name}): {e}")
+
+        with self._lock:
+            task["runs"] += 1
+            task["last_run"] = datetime.now(timezone.utc).isoformat()
+            task["last_duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+            task["next_run"] = time.monotonic() + task["interval"]
+            if error is not None:
+                task["failures"] += 1
+                task["last_error"] = str(error)
+                return
+            task["last_result"] = result
+            task["total_reclaimed"] += _reclaimed_count(result)
+
+        if _reclaimed_count(result):
+            logger.info(f"유지보수 작업 완료 ({name}): {result}")
+
+    def get_status(self):
+        """작업별 실행 통계와 회수량을 반환합니다."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "tasks": {
+                    name: {
+                        **{k: v for k, v in task.items() if k not in ("fn", "next_run")},
+                        "next_run_in": round(max(0.0, task["next_run"] - now), 1),
+                    }
+                    for name, task in self._tasks.items()
+                },
+            }
+
+
+def _reclaimed_count(result):
+    """작업 결과에서 회수량(세션 수 또는 레코드 수)을 꺼냅니다."""
+    if isinstance(result, dict):
+        return result.get("records", 0) + result.get("sessions", 0)
+    if isinstance(result, int):
+        return result
+    return 0
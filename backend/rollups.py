@@ -0,0 +1,219 @@
+"""
+센서 데이터 다중 해상도 롤업 모듈
+샘플러 틱마다 1분/15분/1시간 구간의 min, max, mean, count를 누적하고,
+구간이 끝나면 sensor_rollup 측정값으로 기록합니다.
+/api/history는 요청 범위와 해상도에 맞는 가장 거친 티어를 조회하므로
+조회 비용이 원시 데이터 수집 속도와 무관해집니다.
+종료 시 기록한 미완성 구간은 같은 시각/태그로 다시 기록하면 덮어쓰이므로,
+재시작하면 저장된 현재 구간을 seed()로 불러와 이어서 누적합니다.
+"""
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+ROLLUP_MEASUREMENT = "sensor_rollup"
+
+# (티어 이름, 구간 길이(초)) - 세밀한 순서
+ROLLUP_TIERS = (
+    ("1m", 60),
+    ("15m", 15 * 60),
+    ("1h", 60 * 60),
+)
+
+ROLLUP_METRICS = ("temperature", "humidity", "power", "soil", "co2", "light")
+
+_DURATION_PATTERN = re.compile(r"^(\d+)(s|m|h|d|w)$")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(value):
+    """
+    '30m', '24h', '7d' 형식의 기간 문자열을 초 단위로 변환합니다.
+
+    Raises:
+        ValueError: 형식이 잘못된 경우
+    """
+    match = _DURATION_PATTERN.match(str(value).strip())
+    if not match:
+        raise ValueError(f"잘못된 기간 형식입니다: {value}")
+    seconds = int(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    if seconds <= 0:
+        raise ValueError(f"기간은 0보다 커야 합니다: {value}")
+    return seconds
+
+
+def parse_time_bound(value, now=None):
+    """
+    조회 범위 경계를 파싱합니다.
+
+    Args:
+        value (str): 'now', '-24h' 같은 상대 기간 또는 ISO 8601 시각 (시간대가 없으면 UTC)
+        now (datetime, optional): 기준 시각 (UTC)
+
+    Returns:
+        datetime: UTC 시각
+
+    Raises:
+        ValueError: 형식이 잘못된 경우
+    """
+    now = now or datetime.now(timezone.utc)
+    value = str(value).strip()
+    if value in ("now", "now()"):
+        return now
+    if value.startswith("-"):
+        return datetime.fromtimestamp(now.timestamp() - parse_duration(value[1:]), timezone.utc)
+
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"잘못된 시각 형식입니다: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def select_rollup_tier(every_seconds):
+    """
+    요청 해상도를 만족하는 가장 거친 롤업 티어를 고릅니다.
+
+    Args:
+        every_seconds (int): 요청한 집계 간격 (초)
+
+    Returns:
+        tuple: (티어 이름, 구간 길이) 또는 원시 데이터를 써야 하면 None
+    """
+    selected = None
+    for name, seconds in ROLLUP_TIERS:
+        if seconds <= every_seconds:
+            selected = (name, seconds)
+    return selected
+
+
+class RollupEngine:
+    """샘플 틱을 티어별 구간으로 누적해 닫힌 구간을 기록하는 인프로세스 집계기"""
+
+    def __init__(self, write_fn, tiers=ROLLUP_TIERS, metrics=ROLLUP_METRICS):
+        """
+        Args:
+            write_fn (callable): 닫힌 구간 목록을 받아 저장하는 함수.
+                각 구간은 {"greenhouse", "tier", "metric", "mode", "start", "min", "max", "mean", "count"} 딕셔너리.
+            tiers (tuple): (티어 이름, 구간 길이(초)) 목록
+            metrics (tuple): 롤업할 센서 항목
+        """
+        self.write_fn = write_fn
+        self.tiers = tiers
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        # (온실, 티어 이름, 메트릭) -> 열린 구간 (여러 온실의 샘플러가 같은 엔진을 공유)
+        self._open = {}
+        # (온실, 티어 이름, 메트릭, 모드, 구간 시작) -> 이전 프로세스가 기록한 미완성 구간 (아직 열리지 않은 구간)
+        self._seeds = {}
+        self.stats = {"samples": 0, "buckets_written": 0, "seeded": 0}
+
+    def on_sample(self, snapshot, now=None):
+        """샘플러 틱마다 호출됩니다. 끝난 구간이 있으면 기록합니다."""
+        now = time.time() if now is None else now
+        mode = snapshot.get("mode", "unknown")
+        greenhouse = snapshot.get("greenhouse")
+        closed = []
+
+        with self._lock:
+            self.stats["samples"] += 1
+            for tier_name, seconds in self.tiers:
+                bucket_start = int(now // seconds) * seconds
+                for metric in self.metrics:
+                    value = snapshot.get(metric)
+                    if value is None:
+                        continue
+                    value = float(value)
+                    key = (greenhouse, tier_name, metric)
+                    bucket = self._open.get(key)
+
+                    # 구간이 바뀌었거나 모드가 바뀌면 이전 구간을 닫음
+                    if bucket and (bucket["start"] != bucket_start or bucket["mode"] != mode):
+                        closed.append(self._finalize(bucket))
+                        bucket = None
+
+                    if bucket is None:
+                        self._open[key] = bucket = {
+                            "greenhouse": greenhouse,
+                            "tier": tier_name,
+                            "metric": metric,
+                            "mode": mode,
+                            "start": bucket_start,
+                            "min": value,
+                            "max": value,
+                            "sum": value,
+                            "count": 1,
+                        }
+                        seed = self._seeds.pop(key + (mode, bucket_start), None)
+                        if seed:
+                            self._merge(bucket, seed)
+                    else:
+                        bucket["min"] = min(bucket["min"], value)
+                        bucket["max"] = max(bucket["max"], value)
+                        bucket["sum"] += value
+                        bucket["count"] += 1
+
+        if closed:
+            self._write(closed)
+
+    def seed(self, rows):
+        """
+        이전 프로세스가 종료하며 기록한 현재 구간을 이어서 누적합니다. (시작 시 한 번 호출)
+
+        Args:
+            rows (list): 저장된 구간 목록 (write_fn에 넘기는 형식, 구간 시작 시각이 현재 구간인 것만)
+        """
+        with self._lock:
+            for row in rows:
+                key = (row.get("greenhouse"), row["tier"], row["metric"])
+                bucket = self._open.get(key)
+                # 샘플이 먼저 들어와 이미 열린 구간이면 바로 합치고, 아니면 구간이 열릴 때 합침
+                if bucket and bucket["start"] == row["start"] and bucket["mode"] == row["mode"]:
+                    self._merge(bucket, row)
+                else:
+                    self._seeds[key + (row["mode"], row["start"])] = row
+            self.stats["seeded"] += len(rows)
+
+    def flush(self):
+        """열려 있는 구간을 모두 닫아 기록합니다. (종료 시 호출)"""
+        with self._lock:
+            closed = [self._finalize(bucket) for bucket in self._open.values()]
+            self._open.clear()
+        if closed:
+            self._write(closed)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["open_buckets"] = len(self._open)
+        stats["tiers"] = [name for name, _ in self.tiers]
+        return stats
+
+    def _merge(self, bucket, row):
+        bucket["min"] = min(bucket["min"], row["min"])
+        bucket["max"] = max(bucket["max"], row["max"])
+        bucket["sum"] += row["mean"] * row["count"]
+        bucket["count"] += row["count"]
+
+    def _finalize(self, bucket):
+        return {
+            "greenhouse": bucket["greenhouse"],
+            "tier": bucket["tier"],
+            "metric": bucket["metric"],
+            "mode": bucket["mode"],
+            "start": bucket["start"],
+            "min": bucket["min"],
+            "max": bucket["max"],
+            "mean": bucket["sum"] / bucket["count"],
+            "count": bucket["count"],
+        }
+
+    def _write(self, buckets):
+        try:
+            self.write_fn(buckets)
+            self.stats["buckets_written"] += len(buckets)
+        except Exception as e:
+            print(f"롤업 저장 오류: {e}")
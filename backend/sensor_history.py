@@ -0,0 +1,127 @@
+"""
+프로세스 내 센서 이력 링 버퍼 모듈
+샘플러 틱마다 모든 센서 값을 미리 할당한 numpy 열(시각 int64 epoch 초, 값 float32)에 기록합니다.
+추가는 O(1)이고, 구간 조회와 집계 간격 리샘플링은 벡터 연산으로 처리하므로
+InfluxDB에 연결할 수 없을 때도 며칠 분량의 실제 샘플로 /api/history를 제공할 수 있습니다.
+구간 조회는 시각이 오름차순이라고 가정하므로, 시계가 뒤로 돌아가면(RTC 없는 기기의 부팅 직후 NTP 보정 등)
+새 시각보다 미래로 기록된 샘플을 버려 순서를 유지합니다.
+"""
+import threading
+
+import numpy as np
+
+
+class SensorHistory:
+    """센서 항목별 열을 가진 고정 크기 원형 버퍼"""
+
+    def __init__(self, metrics, capacity):
+        """
+        Args:
+            metrics (iterable): 기록할 센서 항목 이름
+            capacity (int): 보관할 최대 샘플 수 (초과하면 가장 오래된 샘플부터 덮어씀)
+        """
+        self.metrics = tuple(metrics)
+        self.capacity = int(capacity)
+        self._index = {metric: i for i, metric in enumerate(self.metrics)}
+
+        self._times = np.zeros(self.capacity, dtype=np.int64)
+        self._values = np.zeros((len(self.metrics), self.capacity), dtype=np.float32)
+        self._head = 0      # 다음에 쓸 위치
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self._times.nbytes + self._values.nbytes
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, values):
+        """
+        샘플 하나를 추가합니다.
+
+        Args:
+            timestamp (float): epoch 초
+            values (dict): 센서 항목 -> 값 (없는 항목은 NaN)
+        """
+        timestamp = int(timestamp)
+        with self._lock:
+            if self._size and self._times[(self._head - 1) % self.capacity] > timestamp:
+                self._drop_after(timestamp)
+            head = self._head
+            self._times[head] = timestamp
+            for metric, i in self._index.items():
+                value = values.get(metric)
+                self._values[i, head] = np.nan if value is None else value
+            self._head = (head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def _drop_after(self, timestamp):
+        """timestamp보다 늦은 샘플을 최신 쪽부터 버립니다. 잠금을 잡은 상태에서 호출."""
+        newer = 0
+        for lo, hi in self._segments():
+            newer += hi - lo - int(np.searchsorted(self._times[lo:hi], timestamp, side="right"))
+        self._head = (self._head - newer) % self.capacity
+        self._size -= newer
+
+    def _segments(self):
+        """시간 순서대로 정렬된 물리 구간 (시작, 끝) 목록. 잠금을 잡은 상태에서 호출."""
+        start = (self._head - self._size) % self.capacity
+        end = start + self._size
+        if end <= self.capacity:
+            return [(start, end)]
+        return [(start, self.capacity), (0, end - self.capacity)]
+
+    def slice(self, start, stop, metrics=None):
+        """
+        [start, stop) 구간의 샘플을 복사해 반환합니다.
+
+        Returns:
+            tuple: (시각 int64 배열, {항목: float32 배열})
+        """
+        rows = [self._index[metric] for metric in (metrics or self.metrics)]
+        with self._lock:
+            times, values = [], []
+            for lo, hi in self._segments():
+                segment = self._times[lo:hi]
+                a = lo + int(np.searchsorted(segment, start, side="left"))
+                b = lo + int(np.searchsorted(segment, stop, side="left"))
+                if a < b:
+                    times.append(self._times[a:b].copy())
+                    values.append(self._values[rows, a:b].copy())
+
+        names = metrics or self.metrics
+        if not times:
+            return np.empty(0, dtype=np.int64), {metric: np.empty(0, dtype=np.float32) for metric in names}
+        times = np.concatenate(times)
+        values = np.concatenate(values, axis=1)
+        return times, {metric: values[i] for i, metric in enumerate(names)}
+
+    def resample(self, start, stop, every_seconds, metrics=None):
+        """
+        [start, stop) 구간을 epoch 기준 every_seconds 구간 평균으로 집계합니다.
+        (InfluxDB aggregateWindow와 같이 구간 종료 시각을 타임스탬프로 사용하고 빈 구간은 제외)
+
+        Returns:
+            tuple: (구간 종료 시각 int64 배열, {항목: 평균 float64 배열})
+        """
+        times, columns = self.slice(start, stop, metrics)
+        if not len(times):
+            return times, columns
+
+        first = int(start) - int(start) % every_seconds
+        bins = (times - first) // every_seconds
+        nbins = int(bins[-1]) + 1
+        counts = np.bincount(bins, minlength=nbins)
+        present = counts > 0
+        ends = first + (np.arange(nbins, dtype=np.int64) + 1) * every_seconds
+
+        means = {}
+        for metric, column in columns.items():
+            valid = ~np.isnan(column)
+            sums = np.bincount(bins[valid], weights=column[valid], minlength=nbins)
+            valid_counts = np.bincount(bins[valid], minlength=nbins)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means[metric] = (sums / valid_counts)[present]
+        return ends[present], means
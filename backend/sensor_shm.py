@@ -0,0 +1,336 @@
+"""
+센서 스냅샷 공유 메모리 / 제어 IPC 모듈
+수집 데몬(acquisition_daemon.py) 하나만 시리얼 포트와 샘플러를 소유하고, 온실별 최신 스냅샷을
+multiprocessing.shared_memory 블록에 seqlock으로 게시합니다. 웹 워커와 음성 서버 같은 다른 프로세스는
+블록을 읽기만 하므로 워커 수를 늘려도 포트 탐색, 시뮬레이션, InfluxDB 기록이 중복되지 않습니다.
+장치 제어 명령은 유닉스 도메인 소켓으로 데몬에 전달합니다. (JSON 한 줄 요청 → JSON 한 줄 응답)
+소켓은 서비스 사용자 소유의 런타임 디렉터리에 0600 권한으로 만들어 다른 로컬 사용자가 장치를 제어할 수 없습니다.
+
+블록 레이아웃 (리틀 엔디언):
+    헤더  magic(8) 온실 수(uint32) 데몬 PID(uint32) 세대(float64, 데몬 시작 시각)
+    슬롯  온실 ID(32) | seq(uint64, 쓰는 중이면 홀수) | 본문
+    본문  게시 시각(float64) 스냅샷 순번(uint64) 샘플 순번(uint64) 센서 값 6개(float64)
+          장치 상태 4개(uint8) 하드웨어 모드(uint8) 포트 이름(64)
+"""
+import json
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+from types import MappingProxyType
+
+SENSOR_SHM_NAME = os.getenv("SENSOR_SHM_NAME", "smart_greenhouse_sensors")
+
+# 제어 소켓 - 기본값은 서비스 사용자 전용 런타임 디렉터리 ($XDG_RUNTIME_DIR, 없으면 임시 디렉터리 아래 사용자별 디렉터리)
+_RUNTIME_DIR = (
+    os.path.join(os.environ["XDG_RUNTIME_DIR"], "smart_greenhouse")
+    if os.getenv("XDG_RUNTIME_DIR")
+    else os.path.join(tempfile.gettempdir(), f"smart_greenhouse-{os.getuid()}")
+)
+SENSOR_CONTROL_SOCKET = os.getenv("SENSOR_CONTROL_SOCKET", os.path.join(_RUNTIME_DIR, "control.sock"))
+
+METRICS = ("temperature", "humidity", "power", "soil", "co2", "light")
+DEVICES = ("fan", "water", "light", "window")
+
+_MAGIC = b"GHSHM001"
+_HEADER = struct.Struct("<8sIId")
+_SLOT_ID = struct.Struct("<32s")
+_SEQ = struct.Struct("<Q")
+_BODY = struct.Struct("<dQQ6d4BB3x64s")
+_SLOT_SIZE = _SLOT_ID.size + _SEQ.size + _BODY.size
+
+# 읽는 도중 게시가 겹치면 다시 읽는 최대 횟수
+_READ_RETRIES = 100
+
+
+def _slot_offset(index):
+    return _HEADER.size + index * _SLOT_SIZE
+
+
+def _pid_alive(pid):
+    """프로세스가 실행 중인지 확인합니다. (비정상 종료 후 남은 블록 구분)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # 다른 사용자로 실행 중인 프로세스
+    return True
+
+
+def _owner_pid(shm):
+    """블록 헤더에 기록된 데몬 PID (형식이 다르면 None)"""
+    if shm.size < _HEADER.size:
+        return None
+    magic, _, pid, _ = _HEADER.unpack_from(shm.buf, 0)
+    return pid if magic == _MAGIC else None
+
+
+def _live_owner(shm):
+    """블록을 만든 데몬이 (이 프로세스가 아닌) 실행 중인 프로세스면 그 PID, 아니면 None"""
+    pid = _owner_pid(shm)
+    if pid is not None and pid != os.getpid() and _pid_alive(pid):
+        return pid
+    return None
+
+
+def running_daemon_pid(name=SENSOR_SHM_NAME):
+    """이 이름의 블록을 쓰는 수집 데몬이 실행 중이면 PID를 반환합니다."""
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return None
+    try:
+        return _live_owner(shm)
+    finally:
+        # 확인만 하는 쪽이 종료할 때 resource_tracker가 블록을 지우지 않도록 추적 해제
+        resource_tracker.unregister(shm._name, "shared_memory")
+        shm.close()
+
+
+class SnapshotBlockWriter:
+    """수집 데몬 쪽 - 온실별 스냅샷을 seqlock으로 게시합니다."""
+
+    def __init__(self, greenhouse_ids, name=SENSOR_SHM_NAME):
+        self.name = name
+        self.ids = list(greenhouse_ids)
+        size = _HEADER.size + len(self.ids) * _SLOT_SIZE
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = shared_memory.SharedMemory(name=name)
+            pid = _live_owner(existing)
+            if pid is not None:
+                # 실행 중인 데몬의 블록 - 종료할 때 resource_tracker가 지우지 않도록 추적 해제 후 시작 거부
+                resource_tracker.unregister(existing._name, "shared_memory")
+                existing.close()
+                raise RuntimeError(f"다른 수집 데몬(PID {pid})이 공유 메모리 {name}을 사용 중입니다.")
+            # 비정상 종료한 이전 데몬의 블록만 지우고 새로 만듦 (기존 독자는 세대가 바뀐 것을 보고 다시 연결)
+            existing.close()
+            existing.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self._lock = threading.Lock()
+        self._seqs = [0] * len(self.ids)
+        self._sample_seqs = [0] * len(self.ids)
+        buf = self.shm.buf
+        _HEADER.pack_into(buf, 0, _MAGIC, len(self.ids), os.getpid(), time.time())
+        for index, greenhouse_id in enumerate(self.ids):
+            _SLOT_ID.pack_into(buf, _slot_offset(index), greenhouse_id.encode())
+
+    def publish(self, index, snapshot, port=None, sampled=False):
+        """
+        스냅샷을 슬롯에 기록합니다. (샘플러 스레드와 장치 제어 스레드가 함께 호출할 수 있음)
+
+        Args:
+            index (int): 온실 슬롯 번호
+            snapshot (Mapping): SensorDataManager 스냅샷
+            port (str, optional): 현재 시리얼 포트
+            sampled (bool): 샘플링 틱이면 True (샘플 순번 증가)
+        """
+        values = [float(snapshot[metric]) for metric in METRICS]
+        devices = [1 if snapshot["devices"].get(device) else 0 for device in DEVICES]
+        hardware = 1 if snapshot["mode"] == "hardware" else 0
+        seq_offset = _slot_offset(index) + _SLOT_ID.size
+        body_offset = seq_offset + _SEQ.size
+
+        with self._lock:
+            if sampled:
+                self._sample_seqs[index] += 1
+            buf = self.shm.buf
+            seq = self._seqs[index]
+            _SEQ.pack_into(buf, seq_offset, seq + 1)   # 홀수: 쓰는 중
+            _BODY.pack_into(buf, body_offset, time.time(), snapshot["seq"], self._sample_seqs[index],
+                            *values, *devices, hardware, (port or "").encode()[:64])
+            _SEQ.pack_into(buf, seq_offset, seq + 2)   # 짝수: 완료
+            self._seqs[index] = seq + 2
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SnapshotBlockReader:
+    """웹 워커 쪽 - 게시된 스냅샷을 복사 없이 읽습니다. (쓰기 없음)"""
+
+    def __init__(self, name=SENSOR_SHM_NAME):
+        self.name = name
+        self.shm = shared_memory.SharedMemory(name=name)
+        # 읽는 쪽이 종료할 때 resource_tracker가 데몬의 블록을 지우지 않도록 추적 해제
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        magic, count, self.pid, self.generation = _HEADER.unpack_from(self.shm.buf, 0)
+        if magic != _MAGIC:
+            self.shm.close()
+            raise ValueError(f"센서 공유 메모리 형식이 다릅니다: {name}")
+        self.ids = [
+            _SLOT_ID.unpack_from(self.shm.buf, _slot_offset(index))[0].rstrip(b"\0").decode()
+            for index in range(count)
+        ]
+
+    @classmethod
+    def attach(cls, name=SENSOR_SHM_NAME, wait=0.0):
+        """
+        공유 메모리 블록에 연결합니다.
+
+        Args:
+            wait (float): 데몬이 블록을 만들 때까지 기다릴 최대 시간 (초)
+
+        Returns:
+            SnapshotBlockReader: 연결한 블록 또는 블록이 없으면 None
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                return cls(name)
+            except FileNotFoundError:
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(0.2)
+
+    def is_alive(self):
+        """블록을 만든 데몬 프로세스가 아직 실행 중인지 확인합니다. (비정상 종료 후 남은 블록 구분)"""
+        return _pid_alive(self.pid)
+
+    def read(self, index):
+        """
+        온실 슬롯 하나를 일관된 상태로 읽습니다.
+
+        Returns:
+            tuple: (게시 시각, 스냅샷 순번, 샘플 순번, 값 dict, 장치 dict, 하드웨어 여부, 포트) 또는 읽기 실패 시 None
+        """
+        buf = self.shm.buf
+        seq_offset = _slot_offset(index) + _SLOT_ID.size
+        body_offset = seq_offset + _SEQ.size
+        for _ in range(_READ_RETRIES):
+            before = _SEQ.unpack_from(buf, seq_offset)[0]
+            if before == 0:
+                return None  # 아직 게시 전
+            if before & 1:
+                continue
+            body = _BODY.unpack_from(buf, body_offset)
+            if _SEQ.unpack_from(buf, seq_offset)[0] == before:
+                break
+        else:
+            return None
+
+        published_at, snapshot_seq, sample_seq = body[0], body[1], body[2]
+        values = dict(zip(METRICS, body[3:9]))
+        devices = {device: bool(state) for device, state in zip(DEVICES, body[9:13])}
+        port = body[14].rstrip(b"\0").decode() or None
+        return published_at, snapshot_seq, sample_seq, values, devices, bool(body[13]), port
+
+    def to_snapshot(self, index, state):
+        """read() 결과를 SensorDataManager.get_snapshot()과 같은 형식의 읽기 전용 스냅샷으로 만듭니다."""
+        published_at, snapshot_seq, _, values, devices, hardware, _ = state
+        snapshot = dict(values)
+        snapshot["devices"] = devices
+        snapshot["greenhouse"] = self.ids[index]
+        snapshot["mode"] = "hardware" if hardware else "simulation"
+        snapshot["timestamp"] = datetime.fromtimestamp(published_at).strftime("%Y-%m-%d %H:%M:%S")
+        snapshot["seq"] = snapshot_seq
+        return MappingProxyType(snapshot)
+
+    def close(self):
+        self.shm.close()
+
+
+class ControlServer:
+    """수집 데몬 쪽 - 유닉스 소켓으로 제어 요청을 받아 handler(request) 결과를 돌려줍니다."""
+
+    def __init__(self, handler, path=SENSOR_CONTROL_SOCKET):
+        """
+        Raises:
+            RuntimeError: 소켓 디렉터리가 다른 사용자 소유이거나 경로에 소켓이 아닌 파일이 있는 경우
+        """
+        self.handler = handler
+        self.path = path
+        _prepare_socket_path(path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # 만들어지는 순간부터 소유자만 접근할 수 있도록 umask를 좁혀 bind하고 권한을 다시 고정
+        previous_umask = os.umask(0o177)
+        try:
+            self._sock.bind(path)
+        finally:
+            os.umask(previous_umask)
+        os.chmod(path, 0o600)
+        self._sock.listen(16)
+        self._thread = threading.Thread(target=self._accept_loop, name="control-server", daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return  # 닫힘
+            threading.Thread(target=self._serve, args=(conn,), name="control-conn", daemon=True).start()
+
+    def _serve(self, conn):
+        with conn, conn.makefile("rwb") as stream:
+            for line in stream:
+                try:
+                    response = self.handler(json.loads(line))
+                except Exception as e:
+                    response = {"success": False, "error": str(e)}
+                stream.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+                stream.flush()
+
+    def close(self):
+        self._sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _prepare_socket_path(path):
+    """소켓 디렉터리를 서비스 사용자 전용으로 만들고, 이전 데몬이 남긴 소켓만 지웁니다."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise RuntimeError(f"제어 소켓 디렉터리가 이 사용자 소유의 디렉터리가 아닙니다: {directory}")
+
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode):
+        raise RuntimeError(f"제어 소켓 경로에 소켓이 아닌 파일이 있습니다: {path}")
+    os.unlink(path)
+
+
+class ControlClient:
+    """웹 워커 쪽 - 제어 요청을 데몬에 보냅니다. (요청마다 짧은 연결)"""
+
+    def __init__(self, path=SENSOR_CONTROL_SOCKET, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+
+    def request(self, payload):
+        """
+        Returns:
+            dict: 데몬의 응답
+
+        Raises:
+            OSError: 데몬에 연결할 수 없는 경우
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps(payload, ensure_ascii=False).encode() + b"\n")
+                stream.flush()
+                line = stream.readline()
+        if not line:
+            raise OSError("수집 데몬이 응답 없이 연결을 닫았습니다.")
+        return json.loads(line)
@@ -0,0 +1,209 @@
+"""
+실시간 센서 스트림 모듈
+SensorDataManager가 게시하는 스냅샷을 모든 구독자(SSE, Socket.IO)에게 변경분(delta)만 전달합니다.
+구독자마다 최소 전송 간격을 둘 수 있으며, 건너뛴 변경은 다음 전송에 합쳐집니다.
+"""
+import itertools
+import json
+import threading
+import time
+
+# 구독자가 요청할 수 있는 최소 전송 간격 (초)
+MIN_STREAM_INTERVAL = 0.2
+
+
+def compute_delta(previous, current):
+    """
+    두 스냅샷의 차이를 계산합니다.
+
+    Args:
+        previous (Mapping): 마지막으로 전송한 스냅샷 (없으면 None)
+        current (Mapping): 새 스냅샷
+
+    Returns:
+        dict: 바뀐 항목만 담은 딕셔너리. seq와 timestamp는 항상 포함.
+    """
+    if previous is None:
+        return dict(current)
+
+    delta = {}
+    for key, value in current.items():
+        if key == "devices":
+            changed = {name: state for name, state in value.items()
+                       if previous["devices"].get(name) != state}
+            if changed:
+                delta["devices"] = changed
+        elif previous.get(key) != value:
+            delta[key] = value
+
+    delta["seq"] = current["seq"]
+    delta["timestamp"] = current["timestamp"]
+    return delta
+
+
+class StreamClient:
+    """스트림 구독자 하나의 상태 (마지막 전송 스냅샷, 전송 간격, 대기 이벤트)"""
+
+    def __init__(self, client_id, min_interval, send_fn=None):
+        self.client_id = client_id
+        self.min_interval = max(MIN_STREAM_INTERVAL, min_interval)
+        self.send_fn = send_fn
+        self.last_sent = None
+        self.next_allowed = 0.0
+
+        # send_fn이 없는 구독자(SSE)는 이벤트를 꺼내갈 때까지 보관
+        self._cond = threading.Condition()
+        self._pending = None
+        self._closed = False
+
+    def deliver(self, event):
+        """팬아웃 스레드에서 호출됩니다. 직접 전송하거나 꺼내갈 수 있도록 보관합니다."""
+        if self.send_fn:
+            self.send_fn(event)
+            return
+        with self._cond:
+            if self._pending is None:
+                self._pending = event
+            else:
+                # 소비자가 느리면 변경분을 합쳐서 하나의 이벤트로 유지
+                merged = dict(self._pending["data"])
+                for key, value in event["data"].items():
+                    if key == "devices" and "devices" in merged:
+                        merged["devices"] = {**merged["devices"], **value}
+                    else:
+                        merged[key] = value
+                self._pending = {"type": self._pending["type"], "data": merged}
+            self._cond.notify()
+
+    def next_event(self, timeout):
+        """
+        다음 이벤트를 기다려 반환합니다.
+
+        Returns:
+            dict: {"type": "snapshot"|"delta", "data": dict} 또는 시간 초과/종료 시 None
+        """
+        with self._cond:
+            if self._pending is None and not self._closed:
+                self._cond.wait(timeout)
+            event, self._pending = self._pending, None
+            return event
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+
+class SnapshotBroadcaster:
+    """센서 스냅샷을 구독자들에게 팬아웃하는 허브"""
+
+    def __init__(self, manager):
+        """
+        Args:
+            manager (SensorDataManager): 스냅샷을 게시하는 센서 매니저
+        """
+        self.manager = manager
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        self._cond = threading.Condition()
+        self._latest = None
+        self._thread = None
+
+        self.stats = {
+            "snapshots": 0,
+            "events_sent": 0,
+            "deltas_computed": 0,
+        }
+
+    def start(self):
+        """팬아웃 스레드를 시작하고 센서 매니저를 구독합니다."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="sensor-stream-fanout", daemon=True)
+        self._thread.start()
+        self.manager.subscribe(self._on_snapshot)
+
+    def register(self, min_interval=1.0, send_fn=None):
+        """
+        새 구독자를 등록하고 현재 스냅샷 전체를 첫 이벤트로 전달합니다.
+
+        Args:
+            min_interval (float): 이 구독자에게 보낼 최소 전송 간격 (초)
+            send_fn (callable, optional): 이벤트를 직접 전송할 함수. 없으면 next_event()로 꺼내감.
+
+        Returns:
+            StreamClient: 등록된 구독자
+        """
+        client = StreamClient(next(self._ids), min_interval, send_fn)
+        snapshot = self.manager.get_snapshot()
+        if snapshot is not None:
+            client.last_sent = snapshot
+            client.next_allowed = time.monotonic() + client.min_interval
+            client.deliver({"type": "snapshot", "data": dict(snapshot)})
+        with self._lock:
+            self._clients[client.client_id] = client
+        return client
+
+    def unregister(self, client):
+        with self._lock:
+            self._clients.pop(client.client_id, None)
+        client.close()
+
+    def client_count(self):
+        return len(self._clients)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["subscribers"] = self.client_count()
+        return stats
+
+    def _on_snapshot(self, snapshot):
+        # 샘플러 스레드를 막지 않도록 최신 스냅샷만 넘기고 바로 반환
+        with self._cond:
+            self._latest = snapshot
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._latest is None:
+                    self._cond.wait()
+                snapshot, self._latest = self._latest, None
+            self.stats["snapshots"] += 1
+            self._fan_out(snapshot)
+
+    def _fan_out(self, snapshot):
+        now = time.monotonic()
+        with self._lock:
+            clients = list(self._clients.values())
+
+        # 같은 스냅샷을 기준으로 한 구독자들은 델타를 공유
+        deltas = {}
+        for client in clients:
+            if now < client.next_allowed:
+                continue
+            base = client.last_sent
+            base_seq = base["seq"] if base is not None else None
+            if base_seq not in deltas:
+                deltas[base_seq] = compute_delta(base, snapshot)
+                self.stats["deltas_computed"] += 1
+            delta = deltas[base_seq]
+
+            client.last_sent = snapshot
+            # seq/timestamp 외에 바뀐 값이 없으면 보내지 않음
+            if base is not None and len(delta) <= 2:
+                continue
+            client.next_allowed = now + client.min_interval
+            try:
+                client.deliver({"type": "delta" if base is not None else "snapshot", "data": delta})
+                self.stats["events_sent"] += 1
+            except Exception as e:
+                print(f"스트림 전송 오류 (구독자 {client.client_id}): {e}")
+
+
+def format_sse(event):
+    """이벤트를 text/event-stream 형식 문자열로 변환합니다."""
+    payload = json.dumps(event["data"], ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event['type']}\ndata: {payload}\n\n"
@@ -2,17 +2,25 @@
 스마트 온실 시스템의 센서 데이터 관리 모듈
 실제 아두이노 센서 연동 및 시뮬레이션 지원
 """
-import random
+import os
 import time
 import threading
-import re
-from datetime import datetime, timedelta
+import zlib
+from datetime import datetime, timezone
+from types import MappingProxyType
 import numpy as np
 
+from sensor_history import SensorHistory
+from greenhouse_sim import VectorSimulator
+from serial_transport import SerialTransport, SERIAL_READ_TIMEOUT
+from arduino_ports import find_arduino, ARDUINO_BAUDRATE
+from arduino_protocol import PROTOCOL_REQUEST, PROTOCOL_ACK, DEVICE_BITS, parse_text_telemetry, soil_raw_to_percent
+from greenhouses import GreenhouseRegistry, GREENHOUSES, DEFAULT_GREENHOUSE, SIMULATION_PORT
+from sensor_shm import SnapshotBlockReader, ControlClient, METRICS, DEVICES
+
 # 아두이노 연결을 위한 추가 임포트
 try:
     import serial
-    import serial.tools.list_ports
     SERIAL_AVAILABLE = True
 except ImportError:
     print("pyserial이 설치되지 않았습니다. 시뮬레이션 모드로만 동작합니다.")
@@ -20,24 +28,112 @@ except ImportError:
 
 # InfluxDB 연결 추가
 try:
-    from influx_storage import save_sensor_data
+    from influx_storage import save_sensor_data, note_sensor_write
     INFLUXDB_AVAILABLE = True
     print("InfluxDB 모듈 연결 성공")
 except ImportError as e:
     print(f"InfluxDB 모듈 연결 실패: {e}")
     INFLUXDB_AVAILABLE = False
 
-class SensorDataManager:
+# 샘플러 주기 (초) - 요청 수와 무관하게 이 주기로만 센서를 갱신/저장
+SENSOR_SAMPLE_INTERVAL = float(os.getenv("SENSOR_SAMPLE_INTERVAL", "1.0"))
+
+# 프로세스 내 센서 이력 보관 기간 (시간) - InfluxDB에 연결할 수 없을 때 /api/history에 사용
+SENSOR_HISTORY_HOURS = float(os.getenv("SENSOR_HISTORY_HOURS", "48"))
+
+# 시뮬레이션 난수 시드 (지정하면 시뮬레이션 값 순서를 재현 가능)
+SENSOR_SIM_SEED = int(os.getenv("SENSOR_SIM_SEED")) if os.getenv("SENSOR_SIM_SEED") else None
+
+# 아두이노 텔레메트리 형식 - auto: 바이너리 프레임을 요청하고 응답이 없으면 텍스트, text: 텍스트만 사용
+ARDUINO_PROTOCOL = os.getenv("ARDUINO_PROTOCOL", "auto")
+
+# 아두이노 수신 줄/파싱 결과 디버그 출력 (줄마다 출력하므로 기본은 끔)
+ARDUINO_DEBUG = os.getenv("ARDUINO_DEBUG", "0") == "1"
+
+# 센서 소스 - auto: 수집 데몬(acquisition_daemon.py)의 공유 메모리가 있으면 읽고 없으면 직접 수집,
+# shared: 수집 데몬만 사용 (SENSOR_SHM_WAIT초 안에 없으면 시작 실패), local: 이 프로세스가 직접 수집
+SENSOR_SOURCE = os.getenv("SENSOR_SOURCE", "auto")
+SENSOR_SHM_WAIT = float(os.getenv("SENSOR_SHM_WAIT", "10"))
+
+# 공유 메모리 스냅샷 변경 확인 주기 (초) - 스트림 구독자에게 전달되는 지연의 상한
+SHARED_POLL_INTERVAL = 0.05
+
+# 온실 매니저들이 사용 중인 시리얼 포트 (자동 탐색 시 다른 온실의 포트를 건드리지 않도록)
+_claimed_ports = set()
+_claimed_ports_lock = threading.Lock()
+
+class _SensorSource:
+    """SensorDataManager와 SharedSensorView 공통 - 스냅샷 구독과 프로세스 내 센서 이력(self.history) 조회"""
+    
+    def subscribe(self, callback, samples_only=False):
+        """새 스냅샷이 게시될 때마다 callback(snapshot)을 호출하도록 등록합니다.
+        
+        콜백은 샘플러 스레드에서 호출되므로 오래 걸리는 작업을 하면 안 됩니다.
+        
+        Args:
+            callback (callable): 스냅샷을 받을 함수
+            samples_only (bool): True면 장치 변경으로 인한 게시는 제외하고 센서 샘플링 틱에만 호출
+        """
+        self._snapshot_listeners.append((callback, samples_only))
+    
+    def unsubscribe(self, callback):
+        """등록된 스냅샷 콜백을 해제합니다."""
+        self._snapshot_listeners = [
+            entry for entry in self._snapshot_listeners if entry[0] != callback
+        ]
+    
+    def _notify_listeners(self, snapshot, sampled=False):
+        for callback, samples_only in list(self._snapshot_listeners):
+            if samples_only and not sampled:
+                continue
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"스냅샷 구독자 처리 오류: {e}")
+    
+    def get_history(self, metric, range_seconds=24 * 3600, every_seconds=30 * 60):
+        """특정 항목의 기록 데이터를 집계 간격 평균으로 반환합니다. (InfluxDB 이력과 같은 형식)"""
+        if metric not in self.history.metrics:
+            return []
+        columns = self.get_history_columns([metric], range_seconds, every_seconds)
+        return [
+            {"timestamp": datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"), "value": value}
+            for ts, value in zip(columns["timestamps"], columns["series"][metric])
+        ]
+    
+    def get_history_columns(self, metrics, range_seconds=24 * 3600, every_seconds=30 * 60, stop=None):
+        """
+        여러 항목의 기록 데이터를 열 지향 형식으로 반환합니다.
+        
+        Returns:
+            dict: {"timestamps": [epoch 초, ...], "series": {항목: [값 또는 None, ...]}}
+        """
+        stop = time.time() if stop is None else stop
+        ends, means = self.history.resample(stop - range_seconds, stop, every_seconds, metrics)
+        return {
+            "timestamps": ends.tolist(),
+            "series": {
+                metric: [None if np.isnan(v) else round(float(v), 2) for v in means[metric]]
+                for metric in metrics
+            }
+        }
+
+class SensorDataManager(_SensorSource):
     """센서 데이터를 관리하는 클래스 (실제 하드웨어 + 시뮬레이션 지원)"""
     
-    def __init__(self, use_arduino=True, init_values=None):
+    def __init__(self, use_arduino=True, init_values=None, greenhouse_id=DEFAULT_GREENHOUSE, port=None):
         """
         센서 데이터 매니저를 초기화합니다.
         
         Args:
             use_arduino (bool): 아두이노 연결 시도 여부. 기본값은 True.
             init_values (dict, optional): 센서 초기값. 기본값은 None.
+            greenhouse_id (str): 온실 ID (스냅샷과 InfluxDB greenhouse 태그에 사용)
+            port (str, optional): 사용할 시리얼 포트. 없으면 다른 온실이 쓰지 않는 포트를 자동 탐색.
         """
+        self.greenhouse_id = greenhouse_id
+        self.port = port
+        
         # 기본 초기값 설정
         self.current_values = {
             "temperature": 23.5,  # 섭씨
@@ -65,19 +161,32 @@ class SensorDataManager:
         # 아두이노 관련 변수
         self.arduino = None
         self.arduino_connected = False
+        self.transport = None
+        self._protocol_requested = False
+        self.hardware_devices = None  # 바이너리 프레임으로 보고된 실제 장치 출력 상태
         self.use_arduino = use_arduino and SERIAL_AVAILABLE
         self.data_lock = threading.Lock()
         self.arduino_sensor_data = {}
         
-        # 히스토리 데이터 초기화
-        self.history = {
-            "temperature": [],
-            "humidity": [],
-            "power": [],
-            "soil": [],
-            "co2": [],
-            "light": []
-        }
+        # 샘플러 스레드 및 최신 스냅샷 (요청 경로에서는 스냅샷만 읽음)
+        self.state_lock = threading.RLock()
+        self.sample_interval = SENSOR_SAMPLE_INTERVAL
+        self._sampler_thread = None
+        self._sampler_stop = threading.Event()
+        self._snapshot_seq = 0
+        self._snapshot = None
+        self._snapshot_listeners = []
+        
+        # 시뮬레이션 모드에서 센서 값을 진행시키는 엔진
+        # (시드를 지정해도 온실마다 다른 값 순서가 나오도록 온실 ID를 섞음)
+        seed = None if SENSOR_SIM_SEED is None else [SENSOR_SIM_SEED, zlib.crc32(greenhouse_id.encode())]
+        self.simulation = VectorSimulator(houses=1, seed=seed)
+        
+        # 샘플러 틱마다 기록하는 센서 이력 (48시간, 1초 주기 기준 약 5.5MB)
+        self.history = SensorHistory(
+            self.current_values.keys(),
+            capacity=max(1, int(SENSOR_HISTORY_HOURS * 3600 / self.sample_interval))
+        )
         
         # 아두이노 연결 시도
         if self.use_arduino:
@@ -85,54 +194,21 @@ class SensorDataManager:
             if self.arduino_connected:
                 self._start_arduino_reader()
         
-        # 24시간 더미 히스토리 데이터 생성
-        self._generate_initial_history()
+        self._publish_snapshot()
         
-        print(f"센서 매니저 초기화 완료 - 아두이노 연결: {'성공' if self.arduino_connected else '실패 (시뮬레이션 모드)'}")
+        print(f"[{self.greenhouse_id}] 센서 매니저 초기화 완료 - 아두이노 연결: {'성공' if self.arduino_connected else '실패 (시뮬레이션 모드)'}")
     
     def _connect_arduino(self):
-        """아두이노 연결을 시도합니다."""
+        """아두이노 연결을 시도합니다. (후보 포트를 동시에 확인, 마지막 연결 포트 우선)"""
         if not SERIAL_AVAILABLE:
             return False
             
         try:
-            # 사용 가능한 포트 목록 가져오기
-            available_ports = [port.device for port in serial.tools.list_ports.comports()]
-            print(f"사용 가능한 포트들: {available_ports}")
-            
-            # 아두이노 관련 포트들을 우선적으로 필터링
-            arduino_ports = []
-            for port in available_ports:
-                if any(keyword in port.lower() for keyword in ['usbmodem', 'usbserial', 'ttyusb', 'ttyacm', 'com']):
-                    arduino_ports.append(port)
-            
-            print(f"아두이노 관련 포트들: {arduino_ports}")
-            
-            # 아두이노 포트들 시도
-            for port in arduino_ports:
-                try:
-                    print(f"아두이노 포트 {port} 연결 시도 중...")
-                    self.arduino = serial.Serial(port, 9600, timeout=1)
-                    time.sleep(3)  # 아두이노 초기화 대기
-                    
-                    # 통신 테스트
-                    if self._test_arduino_communication():
-                        self.arduino_connected = True
-                        print(f"아두이노가 {port}에 성공적으로 연결되었습니다.")
-                        return True
-                    else:
-                        print(f"포트 {port}에서 통신 테스트 실패")
-                        self.arduino.close()
-                        self.arduino = None
-                        
-                except Exception as e:
-                    print(f"포트 {port} 연결 실패: {e}")
-                    if self.arduino:
-                        try:
-                            self.arduino.close()
-                        except:
-                            pass
-                        self.arduino = None
+            self.arduino = find_arduino(self.greenhouse_id, _claim_port, _release_port, port=self.port)
+            if self.arduino:
+                self.arduino_connected = True
+                print(f"아두이노가 {self.arduino.port}에 성공적으로 연결되었습니다.")
+                return True
             
             print("아두이노 연결 실패 - 시뮬레이션 모드로 전환")
             return False
@@ -140,145 +216,88 @@ class SensorDataManager:
             print(f"아두이노 연결 오류: {e}")
             return False
     
-    def _test_arduino_communication(self):
-        """아두이노 통신을 테스트합니다."""
-        if not self.arduino:
-            return False
-        
-        try:
-            # 버퍼 비우기
-            self.arduino.flushInput()
-            self.arduino.flushOutput()
-            
-            # STATUS 명령 전송
-            self.arduino.write(b"STATUS\n")
-            self.arduino.flush()
-            
-            # 응답 대기
-            received_data = []
-            for i in range(50):  # 5초 동안 0.1초씩 체크
-                if self.arduino.in_waiting > 0:
-                    try:
-                        line = self.arduino.readline().decode('utf-8', errors='ignore').strip()
-                        if line:
-                            received_data.append(line)
-                            if "시스템 상태" in line or "온도:" in line:
-                                return True
-                    except Exception as e:
-                        print(f"통신 테스트 읽기 오류: {e}")
-                time.sleep(0.1)
-            
-            return len(received_data) > 0
-        except Exception as e:
-            print(f"통신 테스트 오류: {e}")
-            return False
-    
     def _start_arduino_reader(self):
-        """아두이노 데이터 읽기 스레드를 시작합니다."""
+        """아두이노 시리얼 전송(읽기 스레드 + 자동 재연결)을 시작합니다."""
         if not self.arduino_connected:
             return
         
-        def read_arduino_data():
-            while self.arduino_connected and self.arduino:
-                try:
-                    if self.arduino.in_waiting > 0:
-                        line = self.arduino.readline().decode('utf-8', errors='ignore').strip()
-                        if line:
-                            self._parse_arduino_data(line)
-                except Exception as e:
-                    print(f"아두이노 데이터 읽기 오류: {e}")
-                    # 연결 문제 시 재연결 시도
-                    if "device reports readiness to read but returned no data" in str(e).lower():
-                        print("아두이노 연결 끊김 감지 - 시뮬레이션 모드로 전환")
-                        self.arduino_connected = False
-                        break
-                time.sleep(0.1)
-        
-        # 데이터 읽기 스레드 시작
-        reader_thread = threading.Thread(target=read_arduino_data, daemon=True)
-        reader_thread.start()
+        port = self.arduino.port
+        # 블로킹 read가 짧게 깨어나 종료 요청을 확인할 수 있도록 타임아웃을 줄임
+        self.arduino.timeout = SERIAL_READ_TIMEOUT
+        self.transport = SerialTransport(
+            lambda: self._open_serial(port),
+            serial_port=self.arduino,
+            name=f"arduino-{self.greenhouse_id}",
+            on_state=self._on_link_state
+        )
+        self.transport.subscribe(self._on_arduino_line)
+        self.transport.subscribe(self._on_arduino_frame, frames=True)
+        self.transport.start()
+    
+    def _open_serial(self, port):
+        """재연결 시 같은 포트를 다시 엽니다. (SerialTransport가 백오프 간격으로 호출)"""
+        self.arduino = serial.Serial(port, ARDUINO_BAUDRATE, timeout=SERIAL_READ_TIMEOUT)
+        return self.arduino
+    
+    def _on_link_state(self, connected):
+        """시리얼 연결이 끊기거나 복구되었을 때 호출됩니다."""
+        with self.data_lock:
+            # 끊기기 전 값이 하드웨어 값으로 계속 기록되지 않도록 비움
+            self.arduino_sensor_data = {}
+        # 다시 연결되면 펌웨어가 재시작되므로 프로토콜도 다시 협상
+        self.transport.binary = False
+        self._protocol_requested = False
+        self.arduino_connected = connected
+        print(f"[{self.greenhouse_id}] 아두이노 연결 {'복구 - 하드웨어 모드' if connected else '끊김 - 재연결할 때까지 시뮬레이션 값 사용'}")
+    
+    def _on_arduino_line(self, line):
+        """텍스트 줄 수신 - 프로토콜 협상 응답을 처리하고 나머지는 텍스트 텔레메트리로 파싱합니다."""
+        if line == PROTOCOL_ACK:
+            self.transport.binary = True
+            print(f"[{self.greenhouse_id}] 아두이노 바이너리 프레임 프로토콜 사용")
+            return
+        # 펌웨어가 부팅을 마치고 첫 줄을 보낸 뒤 한 번만 요청 (구버전 펌웨어는 무시하고 텍스트 유지)
+        if ARDUINO_PROTOCOL == "auto" and not self._protocol_requested:
+            self._protocol_requested = True
+            self.transport.write(f"{PROTOCOL_REQUEST}\n".encode())
+        self._parse_arduino_data(line)
+    
+    def _on_arduino_frame(self, frame):
+        """바이너리 텔레메트리 프레임 수신 - 정규식 없이 값만 반영합니다."""
+        _, temperature, humidity, co2, light, soil_raw, device_bits = frame
+        values = {
+            'temperature': temperature,
+            'humidity': humidity,
+            'co2': co2,
+            'light': light,
+            'soil': soil_raw_to_percent(soil_raw),
+        }
+        with self.data_lock:
+            self.arduino_sensor_data = values
+        self.hardware_devices = {device: bool(device_bits >> bit & 1) for bit, device in enumerate(DEVICE_BITS)}
     
     def _parse_arduino_data(self, data_line):
-        """아두이노에서 받은 데이터를 파싱합니다."""
-        try:
-            # 원시 데이터 로깅 추가
-            print(f"[DEBUG] 아두이노 원시 데이터: {data_line}")
-            
-            # "온도: 25.0 °C, 습도: 60.5 %, CO2: 350, 조도: 15, 토양 수분: 650" 형태의 데이터 파싱
-            with self.data_lock:
-                temp_match = re.search(r'온도:\s*([\d.]+)', data_line)
-                humidity_match = re.search(r'습도:\s*([\d.]+)', data_line)
-                co2_match = re.search(r'CO2:\s*(\d+)', data_line)
-                light_match = re.search(r'조도:\s*(\d+)', data_line)
-                soil_match = re.search(r'토양\s*수분:\s*(\d+)', data_line)
-                
-                if temp_match:
-                    self.arduino_sensor_data['temperature'] = float(temp_match.group(1))
-                    print(f"[DEBUG] 온도 파싱: {temp_match.group(1)}")
-                if humidity_match:
-                    self.arduino_sensor_data['humidity'] = float(humidity_match.group(1))
-                    print(f"[DEBUG] 습도 파싱: {humidity_match.group(1)}")
-                if co2_match:
-                    self.arduino_sensor_data['co2'] = int(co2_match.group(1))
-                    print(f"[DEBUG] CO2 파싱: {co2_match.group(1)}")
-                if light_match:
-                    self.arduino_sensor_data['light'] = int(light_match.group(1))
-                    print(f"[DEBUG] 조도 파싱: {light_match.group(1)}")
-                if soil_match:
-                    # 아두이노의 토양수분 값을 퍼센트로 변환 (0-1023 → 0-100)
-                    soil_raw = int(soil_match.group(1))
-                    self.arduino_sensor_data['soil'] = round(max(0, 100 - (soil_raw / 1023 * 100)), 1)
-                    print(f"[DEBUG] 토양수분 파싱: {soil_raw} -> {self.arduino_sensor_data['soil']}%")
-                
-        except Exception as e:
-            print(f"아두이노 데이터 파싱 오류: {e}")
+        """아두이노에서 받은 텍스트 데이터를 파싱합니다. (파싱은 락 밖에서, 락 안에서는 딕셔너리 교체만)"""
+        values = parse_text_telemetry(data_line)
+        if ARDUINO_DEBUG:
+            print(f"[DEBUG] 아두이노 원시 데이터: {data_line} -> {values}")
+        if not values:
+            return
+        
+        # 읽기 스레드만 쓰므로 병합은 락 밖에서 하고 참조만 교체
+        merged = {**self.arduino_sensor_data, **values}
+        with self.data_lock:
+            self.arduino_sensor_data = merged
     
     def _send_arduino_command(self, command):
         """아두이노에 명령을 전송합니다."""
-        if not self.arduino_connected or not self.arduino:
+        if not self.arduino_connected or not self.transport:
             return False
         
-        try:
-            self.arduino.write(f"{command}\n".encode())
-            self.arduino.flush()
+        sent = self.transport.write(f"{command}\n".encode())
+        if sent:
             print(f"아두이노 명령 전송: {command}")
-            return True
-        except Exception as e:
-            print(f"아두이노 명령 전송 오류: {e}")
-            return False
-    
-    def _generate_initial_history(self):
-        """24시간의 초기 히스토리 데이터를 생성합니다."""
-        now = datetime.now()
-        for i in range(24):
-            time_point = now - timedelta(hours=24-i)
-            timestamp = time_point.strftime("%Y-%m-%d %H:00:00")
-            
-            # 각 센서마다 약간의 변동을 주어 데이터 생성
-            self.history["temperature"].append({
-                "timestamp": timestamp, 
-                "value": round(self.current_values["temperature"] + np.random.uniform(-2, 2), 1)
-            })
-            self.history["humidity"].append({
-                "timestamp": timestamp, 
-                "value": round(self.current_values["humidity"] + np.random.uniform(-5, 5), 1)
-            })
-            self.history["power"].append({
-                "timestamp": timestamp, 
-                "value": round(self.current_values["power"] + np.random.uniform(-10, 10), 1)
-            })
-            self.history["soil"].append({
-                "timestamp": timestamp, 
-                "value": round(self.current_values["soil"] + np.random.uniform(-3, 3), 1)
-            })
-            self.history["co2"].append({
-                "timestamp": timestamp, 
-                "value": round(self.current_values["co2"] + np.random.uniform(-20, 20), 1)
-            })
-            self.history["light"].append({
-                "timestamp": timestamp, 
-                "value": round(self.current_values["light"] + np.random.uniform(-10, 10), 1)
-            })
+        return sent
     
     def _calculate_power_consumption(self):
         """장치 상태를 기반으로 전력 소모량을 계산합니다."""
@@ -318,7 +337,37 @@ class SensorDataManager:
         return round(max(20, min(100, base_humidity)), 1)
     
     def update_sensor_values(self):
-        """센서 값을 업데이트하고 현재 값을 반환합니다."""
+        """센서 값을 한 번 샘플링하고 새 스냅샷을 게시한 뒤 현재 값을 반환합니다.
+        
+        샘플러 스레드가 주기적으로 호출합니다. 요청 핸들러는 get_snapshot()을 사용하세요.
+        """
+        with self.state_lock:
+            self._sample_sensor_values()
+            self._publish_snapshot()
+            snapshot = self._snapshot
+        self.history.append(time.time(), snapshot)
+        self._notify_listeners(snapshot, sampled=True)
+        
+        # InfluxDB에 센서 데이터 저장 (틱당 한 번)
+        if INFLUXDB_AVAILABLE:
+            try:
+                # 장치 상태도 함께 저장
+                data_to_save = {metric: snapshot[metric] for metric in self.current_values}
+                data_to_save.update({
+                    f"device_{device}": 1 if status else 0 
+                    for device, status in snapshot["devices"].items()
+                })
+                data_to_save["mode"] = snapshot["mode"]
+                data_to_save["greenhouse"] = self.greenhouse_id
+                
+                save_sensor_data(data_to_save)
+            except Exception as e:
+                print(f"InfluxDB 센서 데이터 저장 오류: {e}")
+        
+        return self.current_values
+    
+    def _sample_sensor_values(self):
+        """하드웨어 값 반영 또는 시뮬레이션으로 current_values를 갱신합니다."""
         if self.arduino_connected:
             # 아두이노 연결 시 실제 센서 데이터 사용
             with self.data_lock:
@@ -336,51 +385,14 @@ class SensorDataManager:
                 
                 if 'light' in self.arduino_sensor_data:
                     self.current_values["light"] = self.arduino_sensor_data['light']
-                    print(f"[DEBUG] 조도센서 값 업데이트: {self.arduino_sensor_data['light']}")
                 
                 # 전력은 항상 계산값 사용 (센서 없음)
                 self.current_values["power"] = self._calculate_power_consumption()
         else:
-            # 시뮬레이션 모드
-            self.current_values["temperature"] = round(self.current_values["temperature"] + np.random.uniform(-0.5, 0.5), 1)
-            self.current_values["humidity"] = round(self.current_values["humidity"] + np.random.uniform(-1, 1), 1)
-            self.current_values["power"] = round(self.current_values["power"] + np.random.uniform(-2, 2), 1)
-            self.current_values["soil"] = round(self.current_values["soil"] + np.random.uniform(-0.5, 0.5), 1)
-            self.current_values["co2"] = round(self.current_values["co2"] + np.random.uniform(-10, 10), 1)
-            self.current_values["light"] = round(self.current_values["light"] + np.random.uniform(-6, 6), 1)
-            
-            # 장치 상태에 따른 값 변화 시뮬레이션
-            if self.device_status["fan"]:
-                self.current_values["temperature"] -= 0.2
-                self.current_values["co2"] -= 5  # 팬 동작시 CO2 감소
-                self.current_values["power"] += 5.0  # 팬 동작시 전력 증가
-            
-            if self.device_status["water"]:
-                self.current_values["soil"] += 0.5
-                self.current_values["humidity"] += 1.0  # 급수시 습도 증가
-                self.current_values["power"] += 3.0  # 펌프 동작시 전력 증가
-            
-            if self.device_status["light"]:
-                self.current_values["temperature"] += 0.1
-                self.current_values["co2"] -= 2  # 광합성으로 CO2 소모
-                self.current_values["power"] += 10.0  # LED 동작시 전력 증가
-                # LED가 켜지면 조도 상승
-                self.current_values["light"] += 10
-            
-            if self.device_status["window"]:
-                external_humidity = 50 + np.random.uniform(-10, 10)
-                self.current_values["humidity"] = round(
-                    0.9 * self.current_values["humidity"] + 0.1 * external_humidity, 1
-                )
-                # 창문 열림시 외부 공기로 CO2 조절
-                self.current_values["co2"] = round(
-                    0.8 * self.current_values["co2"] + 0.2 * 400, 1
-                )
-                # 창문 열림시 외부 빛 유입
-                external_light = 50 + np.random.uniform(-15, 15)  # 외부 조도
-                self.current_values["light"] = round(
-                    0.7 * self.current_values["light"] + 0.3 * external_light, 1
-                )
+            # 시뮬레이션 모드 (벡터 시뮬레이터의 온실 한 개로 진행)
+            self.simulation.set_house(0, self.current_values, self.device_status)
+            self.simulation.step()
+            self.current_values.update(self.simulation.get_house(0))
         
         # 값 범위 제한
         self.current_values["temperature"] = max(min(self.current_values["temperature"], 40), 10)
@@ -389,31 +401,73 @@ class SensorDataManager:
         self.current_values["soil"] = max(min(self.current_values["soil"], 100), 0)
         self.current_values["co2"] = max(min(self.current_values["co2"], 2000), 200)  # CO2 최소값을 200ppm으로 수정
         self.current_values["light"] = max(min(self.current_values["light"], 1000), 1)  # 실제 센서 범위 1-1000으로 조정
+    
+    def _publish_snapshot(self):
+        """현재 값과 장치 상태로 읽기 전용 스냅샷을 만들어 교체합니다."""
+        self._snapshot_seq += 1
+        snapshot = dict(self.current_values)
+        snapshot["devices"] = dict(self.device_status)
+        snapshot["greenhouse"] = self.greenhouse_id
+        snapshot["mode"] = "hardware" if self.arduino_connected else "simulation"
+        snapshot["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        snapshot["seq"] = self._snapshot_seq
+        # 참조 교체는 원자적이므로 읽는 쪽은 락 없이 최신 스냅샷을 얻습니다
+        self._snapshot = MappingProxyType(snapshot)
+    
+    def get_snapshot(self):
+        """가장 최근 샘플링된 읽기 전용 스냅샷을 반환합니다."""
+        return self._snapshot
+    
+    def start_sampler(self, interval=None):
+        """설정된 주기로 센서를 샘플링하는 백그라운드 스레드를 시작합니다.
         
-        # InfluxDB에 센서 데이터 저장
-        if INFLUXDB_AVAILABLE:
+        Args:
+            interval (float, optional): 샘플링 주기(초). 기본값은 SENSOR_SAMPLE_INTERVAL.
+        """
+        if interval is not None:
+            self.sample_interval = interval
+        if self._sampler_thread and self._sampler_thread.is_alive():
+            return
+        
+        self._sampler_stop.clear()
+        self._sampler_thread = threading.Thread(target=self._sampler_loop, name=f"sensor-sampler-{self.greenhouse_id}", daemon=True)
+        self._sampler_thread.start()
+        print(f"[{self.greenhouse_id}] 센서 샘플러 시작 - 주기: {self.sample_interval}초")
+    
+    def stop_sampler(self):
+        """샘플러 스레드를 중지합니다."""
+        self._sampler_stop.set()
+        if self._sampler_thread:
+            self._sampler_thread.join(timeout=self.sample_interval + 1)
+            self._sampler_thread = None
+    
+    def _sampler_loop(self):
+        next_tick = time.monotonic()
+        while not self._sampler_stop.is_set():
             try:
-                # 장치 상태도 함께 저장
-                data_to_save = self.current_values.copy()
-                data_to_save.update({
-                    f"device_{device}": 1 if status else 0 
-                    for device, status in self.device_status.items()
-                })
-                data_to_save["mode"] = "hardware" if self.arduino_connected else "simulation"
-                
-                save_sensor_data(data_to_save)
+                self.update_sensor_values()
             except Exception as e:
-                print(f"InfluxDB 센서 데이터 저장 오류: {e}")
-        
-        return self.current_values
+                print(f"센서 샘플링 오류: {e}")
+            
+            # 처리 시간과 무관하게 일정한 주기를 유지 (밀린 틱은 건너뜀)
+            next_tick += self.sample_interval
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now
+            self._sampler_stop.wait(next_tick - now)
     
     def update_device(self, device, status):
         """장치 상태를 업데이트합니다."""
         if device not in self.device_status:
             return False
         
-        old_status = self.device_status[device]
-        self.device_status[device] = status
+        with self.state_lock:
+            old_status = self.device_status[device]
+            self.device_status[device] = status
+            # 장치 변경은 다음 틱을 기다리지 않고 바로 스냅샷에 반영
+            self._publish_snapshot()
+            snapshot = self._snapshot
+        self._notify_listeners(snapshot)
         
         # 아두이노 연결 시 실제 제어 명령 전송
         if self.arduino_connected and old_status != status:
@@ -432,41 +486,28 @@ class SensorDataManager:
         
         return True
     
-    def get_history(self, metric):
-        """특정 항목의 기록 데이터를 반환합니다."""
-        if metric in self.history:
-            return self.history[metric]
-        return []
-    
-    def add_history_data_point(self):
-        """현재 센서 값을 기록 데이터에 추가합니다. 매 시간마다 호출합니다."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:00:00")
-        
-        for metric in self.current_values:
-            self.history[metric].append({
-                "timestamp": timestamp,
-                "value": self.current_values[metric]
-            })
-            
-            # 기록을 24시간으로 제한
-            if len(self.history[metric]) > 24:
-                self.history[metric].pop(0)
-    
     def get_arduino_status(self):
         """아두이노 연결 상태를 반환합니다."""
         return {
+            "greenhouse": self.greenhouse_id,
             "connected": self.arduino_connected,
             "port": self.arduino.port if self.arduino else None,
-            "mode": "하드웨어" if self.arduino_connected else "시뮬레이션"
+            "mode": "하드웨어" if self.arduino_connected else "시뮬레이션",
+            "link": self.transport.get_stats() if self.transport else None,
+            "hardware_devices": self.hardware_devices
         }
     
     def reconnect_arduino(self):
-        """아두이노 재연결을 시도합니다."""
+        """아두이노 재연결을 시도합니다. (포트를 처음부터 다시 탐색)"""
+        if self.transport:
+            self.transport.close()
+            self.transport = None
         if self.arduino:
             try:
                 self.arduino.close()
             except:
                 pass
+            _release_port(self.arduino.port)
             self.arduino = None
         
         self.arduino_connected = False
@@ -478,8 +519,252 @@ class SensorDataManager:
         
         return self.arduino_connected
 
+class SharedSensorView(_SensorSource):
+    """수집 데몬이 공유 메모리에 게시한 온실 하나를 SensorDataManager와 같은 인터페이스로 제공합니다.
+    
+    센서 값과 장치 상태는 읽기만 하고, 장치 제어와 아두이노 재연결은 제어 소켓으로 데몬에 요청합니다.
+    """
+    
+    def __init__(self, reader, index, control):
+        """
+        Args:
+            reader (SnapshotBlockReader): 연결한 공유 메모리 블록
+            index (int): 이 온실의 슬롯 번호
+            control (ControlClient): 데몬 제어 소켓 클라이언트
+        """
+        self.reader = reader
+        self.index = index
+        self.control = control
+        self.greenhouse_id = reader.ids[index]
+        self.sample_interval = SENSOR_SAMPLE_INTERVAL
+        self._state = None
+        self._snapshot = None
+        self._snapshot_listeners = []
+        self._watcher_thread = None
+        self._watcher_stop = threading.Event()
+        
+        # 데몬의 이력은 공유하지 않으므로 이 프로세스가 본 샘플만 기록 (InfluxDB를 쓸 수 없을 때의 대체 이력)
+        self.history = SensorHistory(
+            METRICS,
+            capacity=max(1, int(SENSOR_HISTORY_HOURS * 3600 / self.sample_interval))
+        )
+        self._refresh()
+    
+    def _refresh(self):
+        """슬롯을 읽어 바뀌었으면 스냅샷을 교체합니다. (seqlock 읽기라 락 없음)"""
+        state = self.reader.read(self.index)
+        if state is None:
+            return None
+        previous = self._state
+        if previous is None or previous[1] != state[1] or previous[0] != state[0]:
+            self._snapshot = self.reader.to_snapshot(self.index, state)
+            self._state = state
+        return state
+    
+    def get_snapshot(self):
+        """데몬이 가장 최근 게시한 읽기 전용 스냅샷을 반환합니다."""
+        self._refresh()
+        return self._snapshot
+    
+    @property
+    def current_values(self):
+        snapshot = self.get_snapshot()
+        return {metric: snapshot[metric] for metric in METRICS}
+    
+    @property
+    def device_status(self):
+        return dict(self.get_snapshot()["devices"])
+    
+    def start_sampler(self, interval=None):
+        """공유 메모리 변경을 구독자에게 전달하는 감시 스레드를 시작합니다. (샘플링은 데몬이 담당)"""
+        if interval is not None:
+            self.sample_interval = interval
+        if self._watcher_thread and self._watcher_thread.is_alive():
+            return
+        
+        self._watcher_stop.clear()
+        self._watcher_thread = threading.Thread(target=self._watch_loop, name=f"sensor-shm-{self.greenhouse_id}", daemon=True)
+        self._watcher_thread.start()
+    
+    def stop_sampler(self):
+        self._watcher_stop.set()
+        if self._watcher_thread:
+            self._watcher_thread.join(timeout=1)
+            self._watcher_thread = None
+    
+    def _watch_loop(self):
+        state = self._refresh()
+        last_key = (self.reader.generation, state[1]) if state else None
+        last_sample = (self.reader.generation, state[2]) if state else None
+        last_change = time.monotonic()
+        
+        while not self._watcher_stop.wait(SHARED_POLL_INTERVAL):
+            try:
+                state = self._refresh()
+                now = time.monotonic()
+                key = (self.reader.generation, state[1]) if state else last_key
+                if key == last_key:
+                    # 게시가 멈추면 데몬이 재시작되어 새 블록을 만들었는지 확인
+                    if now - last_change > max(5.0, self.sample_interval * 5):
+                        last_change = now
+                        self._reattach()
+                    continue
+                
+                last_change = now
+                last_key = key
+                sample = (self.reader.generation, state[2])
+                sampled = sample != last_sample
+                last_sample = sample
+                snapshot = self._snapshot
+                if sampled:
+                    self.history.append(time.time(), snapshot)
+                    if INFLUXDB_AVAILABLE:
+                        # 데몬이 기록한 샘플로 이 프로세스의 이력 캐시 꼬리를 무효화
+                        note_sensor_write(METRICS, snapshot["mode"], self.greenhouse_id)
+                self._notify_listeners(snapshot, sampled=sampled)
+            except Exception as e:
+                print(f"[{self.greenhouse_id}] 공유 메모리 감시 오류: {e}")
+    
+    def _reattach(self):
+        """데몬이 새로 만든 블록이 있으면 다시 연결합니다."""
+        reader = SnapshotBlockReader.attach()
+        if reader is None:
+            return False
+        if reader.generation == self.reader.generation or self.greenhouse_id not in reader.ids:
+            reader.close()
+            return False
+        # 이전 블록은 다른 온실 뷰가 아직 읽고 있을 수 있으므로 닫지 않고 참조가 사라질 때 정리
+        self.index = reader.ids.index(self.greenhouse_id)
+        self.reader = reader
+        self._state = None
+        self._refresh()
+        print(f"[{self.greenhouse_id}] 수집 데몬 재시작 감지 - 공유 메모리 다시 연결 (PID {reader.pid})")
+        return True
+    
+    def _request(self, command, **params):
+        """
+        제어 소켓으로 데몬에 요청합니다.
+        
+        Raises:
+            ConnectionError: 데몬에 연결할 수 없는 경우
+        """
+        try:
+            return self.control.request({"cmd": command, "greenhouse": self.greenhouse_id, **params})
+        except OSError as e:
+            raise ConnectionError(f"수집 데몬에 연결할 수 없습니다: {e}") from e
+    
+    def update_device(self, device, status):
+        """장치 상태 변경을 데몬에 요청합니다. (데몬이 스냅샷을 게시한 뒤 응답)"""
+        if device not in DEVICES:
+            return False
+        success = bool(self._request("update_device", device=device, status=bool(status)).get("success"))
+        self._refresh()
+        return success
+    
+    def get_arduino_status(self):
+        """데몬에 아두이노 상태를 묻고, 응답이 없으면 공유 메모리의 정보로 대신합니다."""
+        try:
+            return self._request("arduino_status")["status"]
+        except (ConnectionError, KeyError):
+            state = self._refresh() or self._state
+            hardware = bool(state and state[5])
+            return {
+                "greenhouse": self.greenhouse_id,
+                "connected": hardware,
+                "port": state[6] if state else None,
+                "mode": "하드웨어" if hardware else "시뮬레이션",
+                "link": None,
+                "hardware_devices": None,
+                "daemon": "응답 없음"
+            }
+    
+    def reconnect_arduino(self):
+        """데몬에 아두이노 재연결을 요청합니다."""
+        return bool(self._request("reconnect").get("success"))
+
+def _claim_port(port):
+    """포트를 이 온실이 사용하도록 표시합니다. 이미 다른 온실이 사용 중이면 False."""
+    with _claimed_ports_lock:
+        if port in _claimed_ports:
+            return False
+        _claimed_ports.add(port)
+        return True
+
+def _release_port(port):
+    with _claimed_ports_lock:
+        _claimed_ports.discard(port)
+
+def _create_manager(greenhouse_id, port):
+    """GREENHOUSES 설정 항목 하나로 센서 매니저를 만듭니다."""
+    if port == SIMULATION_PORT:
+        return SensorDataManager(use_arduino=False, greenhouse_id=greenhouse_id)
+    return SensorDataManager(use_arduino=True, greenhouse_id=greenhouse_id, port=port)
+
 # 하위 호환성을 위한 별칭 (기존 코드가 동작하도록)
 SensorDataSimulator = SensorDataManager
 
-# 싱글톤 인스턴스 (아두이노 연결 시도)
-simulator = SensorDataManager(use_arduino=True) 
\ No newline at end of file
+def _attach_acquisition_daemon():
+    """
+    SENSOR_SOURCE 설정에 따라 수집 데몬의 공유 메모리 블록에 연결합니다.
+    
+    Returns:
+        SnapshotBlockReader: 연결한 블록 또는 직접 수집해야 하면 None
+    
+    Raises:
+        RuntimeError: shared 모드인데 데몬이 없는 경우
+    """
+    if SENSOR_SOURCE == "local":
+        return None
+    reader = SnapshotBlockReader.attach(wait=SENSOR_SHM_WAIT if SENSOR_SOURCE == "shared" else 0)
+    if reader is not None and not reader.is_alive():
+        # 비정상 종료한 데몬이 남긴 블록
+        reader.close()
+        reader = None
+    if reader is None and SENSOR_SOURCE == "shared":
+        raise RuntimeError("수집 데몬(acquisition_daemon.py)의 공유 메모리를 찾을 수 없습니다.")
+    return reader
+
+# init_sensors()가 채우는 전역 상태 (임포트만으로는 공유 메모리 연결, 포트 탐색, 레지스트리 구성을 하지 않음)
+_shared_block = None
+_init_lock = threading.Lock()
+
+# 다른 프로세스의 수집 데몬이 시리얼 포트와 샘플러를 소유하는지 여부 (이 프로세스는 읽기/제어 요청만)
+USING_ACQUISITION_DAEMON = False
+
+# 온실별 센서 매니저 레지스트리와 기본 온실 인스턴스 (기존 /api/* 경로와 채팅 컨텍스트에서 사용)
+greenhouses = None
+simulator = None
+
+def init_sensors():
+    """
+    SENSOR_SOURCE 설정에 따라 수집 데몬의 공유 메모리에 연결하거나 온실별 센서 매니저를 만듭니다.
+    (아두이노 포트 탐색 포함, 여러 번 호출해도 한 번만 만들며 앱 시작 작업이나 스크립트가 호출)
+    
+    Returns:
+        GreenhouseRegistry: 온실 ID별 센서 매니저 레지스트리
+    
+    Raises:
+        RuntimeError: shared 모드인데 데몬이 없는 경우
+    """
+    global _shared_block, USING_ACQUISITION_DAEMON, greenhouses, simulator
+    with _init_lock:
+        if greenhouses is not None:
+            return greenhouses
+        
+        block = _attach_acquisition_daemon()
+        if block is not None:
+            # 데몬이 게시하는 온실들을 읽기 전용 뷰로 등록 (포트 탐색/시뮬레이션 없음)
+            registry = GreenhouseRegistry(default_id=block.ids[0])
+            control_client = ControlClient()
+            for index, greenhouse_id in enumerate(block.ids):
+                registry.register(greenhouse_id, SharedSensorView(block, index, control_client))
+            print(f"수집 데몬 공유 메모리 사용 (PID {block.pid}) - 온실: {block.ids}")
+        else:
+            # 온실별 센서 매니저 레지스트리 (GREENHOUSES 설정, 아두이노 연결 확인은 온실별로 병렬)
+            registry = GreenhouseRegistry().build(GREENHOUSES, _create_manager)
+        
+        _shared_block = block
+        USING_ACQUISITION_DAEMON = block is not None
+        simulator = registry.default
+        greenhouses = registry
+    return registry
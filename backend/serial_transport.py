@@ -0,0 +1,264 @@
+"""
+아두이노 시리얼 전송 모듈
+읽기 스레드가 타임아웃이 있는 블로킹 read로 도착한 바이트를 바로 받아 재사용하는 bytearray에서
+줄 단위로 나누고 구독자에게 전달합니다. (in_waiting 폴링 + 0.1초 sleep 없이 줄 도착 즉시 처리)
+바이너리 프레임(arduino_protocol)은 줄 경계에서 동기 바이트로 구분해 텍스트 줄과 같은 스트림에서 함께 처리합니다.
+연결이 끊기면 시뮬레이션으로 조용히 넘어가지 않고 지수 백오프로 같은 포트를 다시 엽니다.
+"""
+import random
+import threading
+
+from arduino_protocol import SYNC, FRAME_SIZE, decode_frame
+
+# 블로킹 read 타임아웃 (초) - 종료 요청을 확인하는 주기이기도 함
+SERIAL_READ_TIMEOUT = 0.5
+
+# 줄바꿈 없이 이 크기를 넘는 데이터는 잡음으로 보고 버림
+MAX_LINE_BYTES = 4096
+
+# 순번이 이보다 크게 건너뛰면 유실이 아니라 펌웨어 재시작으로 봄
+MAX_SEQ_GAP = 1000
+
+
+class SerialTransport:
+    """시리얼 포트 하나의 읽기 스레드, 줄 분리, 쓰기, 자동 재연결을 담당합니다."""
+
+    def __init__(self, open_fn, serial_port=None, name="serial", on_state=None,
+                 reconnect_base=1.0, reconnect_max=30.0):
+        """
+        Args:
+            open_fn (callable): 포트를 다시 열어 시리얼 객체를 반환하는 함수. 실패 시 예외 발생.
+                반환한 객체의 timeout은 SERIAL_READ_TIMEOUT 정도의 짧은 값이어야 합니다.
+            serial_port (serial.Serial, optional): 이미 열려 있는 시리얼 객체 (없으면 open_fn으로 엶)
+            name (str): 스레드/로그 이름
+            on_state (callable, optional): 연결 상태가 바뀔 때 on_state(connected) 호출
+            reconnect_base (float): 재연결 백오프 기본 간격 (초)
+            reconnect_max (float): 재연결 백오프 최대 간격 (초)
+        """
+        self.open_fn = open_fn
+        self.name = name
+        self.on_state = on_state
+        self.reconnect_base = reconnect_base
+        self.reconnect_max = reconnect_max
+
+        self._serial = serial_port
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._buffer = bytearray()
+        self._subscribers = []
+        self._frame_subscribers = []
+        self._last_seq = None
+        # 바이너리 프로토콜 협상 후에는 프레임 앞의 잡음을 동기 바이트까지 건너뛰어 재동기
+        self.binary = False
+        self._resync = False
+
+        self.stats = {
+            "bytes": 0,
+            "lines": 0,
+            "frames": 0,
+            "crc_errors": 0,
+            "frames_lost": 0,
+            "discarded_bytes": 0,
+            "disconnects": 0,
+            "reconnects": 0,
+            "reconnect_failures": 0,
+            "last_error": None,
+        }
+
+    @property
+    def connected(self):
+        return self._serial is not None
+
+    @property
+    def port(self):
+        return getattr(self._serial, "port", None)
+
+    def subscribe(self, callback, frames=False):
+        """
+        수신한 줄마다 callback(line)을 호출하도록 등록합니다. (읽기 스레드에서 호출)
+
+        Args:
+            frames (bool): True면 텍스트 줄 대신 바이너리 프레임마다 callback(frame) 호출
+                (frame은 arduino_protocol.decode_frame()의 튜플)
+        """
+        (self._frame_subscribers if frames else self._subscribers).append(callback)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"serial-{self.name}", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """읽기 스레드를 멈추고 포트를 닫습니다."""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=SERIAL_READ_TIMEOUT + 1)
+        self._thread = None
+        self._close_port()
+
+    def write(self, data):
+        """
+        포트에 데이터를 씁니다.
+
+        Returns:
+            bool: 전송 성공 여부 (연결이 끊겨 있으면 False)
+        """
+        with self._write_lock:
+            ser = self._serial
+            if ser is None:
+                return False
+            try:
+                ser.write(data)
+                ser.flush()
+                return True
+            except Exception as e:
+                print(f"[{self.name}] 시리얼 쓰기 오류: {e}")
+                return False
+
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            ser = self._serial
+            if ser is None:
+                # 지수 백오프 + 지터로 같은 포트를 다시 엶
+                delay = min(self.reconnect_max, self.reconnect_base * (2 ** attempt))
+                if self._stop.wait(random.uniform(delay / 2, delay)):
+                    break
+                try:
+                    ser = self.open_fn()
+                except Exception as e:
+                    attempt += 1
+                    self.stats["reconnect_failures"] += 1
+                    self.stats["last_error"] = str(e)
+                    print(f"[{self.name}] 시리얼 재연결 실패 ({attempt}회): {e}")
+                    continue
+                attempt = 0
+                self._buffer.clear()
+                self._last_seq = None
+                self._resync = False
+                self._serial = ser
+                self.stats["reconnects"] += 1
+                print(f"[{self.name}] 시리얼 재연결 성공: {self.port}")
+                self._set_state(True)
+
+            try:
+                # 데이터가 오면 즉시 반환, 없으면 타임아웃까지 대기 (폴링 sleep 없음)
+                chunk = ser.read(ser.in_waiting or 1)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.stats["disconnects"] += 1
+                self.stats["last_error"] = str(e)
+                print(f"[{self.name}] 시리얼 연결 끊김 - 재연결 시도: {e}")
+                self._close_port()
+                self._set_state(False)
+                continue
+
+            if chunk:
+                self._feed(chunk)
+
+    def _feed(self, chunk):
+        """받은 바이트를 버퍼에 이어 붙이고 완성된 프레임/줄을 구독자에게 전달합니다."""
+        buffer = self._buffer
+        self.stats["bytes"] += len(chunk)
+        buffer += chunk
+        size = len(buffer)
+
+        start = 0
+        with memoryview(buffer) as view:
+            while start < size:
+                if buffer.startswith(SYNC, start):
+                    if size - start < FRAME_SIZE:
+                        break  # 프레임 나머지를 기다림
+                    frame = decode_frame(view, start)
+                    if frame is None:
+                        # 깨진 프레임 - 동기 바이트 다음부터 다시 찾음
+                        self.stats["crc_errors"] += 1
+                        self._resync = self.binary
+                        start += 1
+                        continue
+                    self._resync = False
+                    start += FRAME_SIZE
+                    self._publish_frame(frame)
+                    continue
+
+                if self._resync:
+                    # 깨진 프레임의 나머지는 줄바꿈과 상관없이 다음 동기 바이트까지 버림
+                    sync_at = buffer.find(SYNC, start)
+                    skip_to = sync_at if sync_at >= 0 else size - 1
+                    self.stats["discarded_bytes"] += skip_to - start
+                    start = skip_to
+                    if sync_at < 0:
+                        break
+                    continue
+
+                end = buffer.find(b"\n", start)
+                if self.binary:
+                    sync_at = buffer.find(SYNC, start, size if end < 0 else end)
+                    if sync_at >= 0:
+                        self.stats["discarded_bytes"] += sync_at - start
+                        start = sync_at
+                        continue
+                if end < 0:
+                    break  # 줄 나머지를 기다림
+
+                # 버퍼를 복사하지 않고 바로 디코딩
+                line = str(view[start:end], "utf-8", "ignore").strip()
+                start = end + 1
+                if line:
+                    self.stats["lines"] += 1
+                    self._publish(line)
+
+        if size - start > MAX_LINE_BYTES:
+            self.stats["discarded_bytes"] += size - start
+            start = size
+        # 처리한 앞부분은 읽기 한 번에 한 번만 잘라냄
+        if start:
+            del buffer[:start]
+
+    def _publish(self, line):
+        for callback in self._subscribers:
+            try:
+                callback(line)
+            except Exception as e:
+                print(f"[{self.name}] 시리얼 줄 처리 오류: {e}")
+
+    def _publish_frame(self, frame):
+        seq = frame[0]
+        if self._last_seq is not None:
+            gap = (seq - self._last_seq - 1) & 0xFFFF
+            if gap <= MAX_SEQ_GAP:
+                self.stats["frames_lost"] += gap
+        self._last_seq = seq
+        self.stats["frames"] += 1
+        for callback in self._frame_subscribers:
+            try:
+                callback(frame)
+            except Exception as e:
+                print(f"[{self.name}] 시리얼 프레임 처리 오류: {e}")
+
+    def _set_state(self, connected):
+        if self.on_state:
+            try:
+                self.on_state(connected)
+            except Exception as e:
+                print(f"[{self.name}] 연결 상태 처리 오류: {e}")
+
+    def _close_port(self):
+        with self._write_lock:
+            ser, self._serial = self._serial, None
+        if ser is not None:
+            try:
+                ser.close()
+            except Exception:
+                pass
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["connected"] = self.connected
+        stats["port"] = self.port
+        stats["protocol"] = "binary" if self.binary else "text"
+        return stats
@@ -12,7 +12,9 @@ from dotenv import load_dotenv
 
 # 프롬프트 매니저 import
 from prompt_manager import prompt_manager
-from sensors import simulator
+from sensors import init_sensors
+
+simulator = init_sensors().default
 
 # 환경 변수 로드
 load_dotenv()
@@ -0,0 +1,94 @@
+"""
+백그라운드 초기화 모듈
+하드웨어 탐색(아두이노 포트 확인), InfluxDB 클라이언트, 유지보수 스케줄러 같은 무거운 초기화를
+앱 생성과 분리해 백그라운드 스레드에서 실행하고, 구성 요소별 준비 상태를 /api/ready로 보고합니다.
+워커는 바로 요청을 받기 시작하고, 아직 준비되지 않은 구성 요소가 필요한 경로만 503으로 응답합니다.
+"""
+import threading
+import time
+
+
+class StartupTasks:
+    """등록 순서대로 실행하는 초기화 작업 목록과 작업별 준비 상태"""
+
+    def __init__(self):
+        self._tasks = []    # (이름, 함수, 선행 작업 이름들)
+        self._status = {}   # 이름 -> {"status": pending|running|ready|failed, "elapsed": 초, "error": 문자열}
+        self._events = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._started_at = None
+
+    def add(self, name, fn, after=()):
+        """
+        초기화 작업을 등록합니다.
+
+        Args:
+            name (str): 구성 요소 이름 (준비 상태 키)
+            fn (callable): 초기화 함수. 실패 시 예외 발생.
+            after (tuple): 먼저 준비되어야 하는 작업 이름 (실패하면 이 작업도 실패로 표시)
+        """
+        self._tasks.append((name, fn, tuple(after)))
+        self._status[name] = {"status": "pending", "elapsed": None, "error": None}
+        self._events[name] = threading.Event()
+
+    def start(self):
+        """초기화 스레드를 시작합니다. (여러 번 호출해도 한 번만 실행)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name="app-startup", daemon=True)
+        self._thread.start()
+
+    def run_sync(self):
+        """초기화 작업을 현재 스레드에서 모두 실행합니다. (스크립트/테스트용)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._started_at = time.monotonic()
+            self._thread = threading.current_thread()
+        self._run()
+
+    def _run(self):
+        for name, fn, after in self._tasks:
+            failed = [dependency for dependency in after if self._status[dependency]["status"] != "ready"]
+            if failed:
+                self._finish(name, "failed", 0.0, f"선행 작업 실패: {', '.join(failed)}")
+                continue
+
+            self._status[name]["status"] = "running"
+            started = time.monotonic()
+            try:
+                fn()
+            except Exception as e:
+                print(f"초기화 실패 [{name}]: {e}")
+                self._finish(name, "failed", time.monotonic() - started, str(e))
+                continue
+            self._finish(name, "ready", time.monotonic() - started, None)
+            print(f"초기화 완료 [{name}] ({self._status[name]['elapsed']:.2f}초)")
+
+    def _finish(self, name, status, elapsed, error):
+        self._status[name].update({"status": status, "elapsed": round(elapsed, 3), "error": error})
+        self._events[name].set()
+
+    def is_ready(self, name):
+        return self._status[name]["status"] == "ready"
+
+    def wait(self, name, timeout=None):
+        """
+        작업이 끝날 때까지 기다립니다.
+
+        Returns:
+            bool: 준비 완료 여부 (실패하거나 시간 초과면 False)
+        """
+        self._events[name].wait(timeout)
+        return self.is_ready(name)
+
+    def get_status(self):
+        components = {name: dict(status) for name, status in self._status.items()}
+        return {
+            "ready": all(status["status"] == "ready" for status in components.values()),
+            "uptime": round(time.monotonic() - self._started_at, 3) if self._started_at else None,
+            "components": components,
+        }
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+자동화 규칙 평가 테스트 스크립트
+같은 장치에 "on" 규칙과 "off" 규칙을 섞었을 때 RuleTable이 결정하는 장치 상태를 확인합니다.
+"""
+import numpy as np
+
+from automation import METRICS, RuleTable, parse_rules
+
+
+def sample(**values):
+    """METRICS 순서의 센서 값 배열 (지정하지 않은 항목은 평범한 값)"""
+    base = {"temperature": 20, "humidity": 60, "power": 100, "soil": 50, "co2": 400, "light": 500}
+    base.update(values)
+    return np.array([base[metric] for metric in METRICS], dtype=np.float64)
+
+
+def decide(rules, values):
+    """새 표로 한 번 평가해 {장치: 원하는 상태} 반환 (결정하지 않은 장치는 빠짐)"""
+    table = RuleTable([("default", parse_rules(rules))])
+    return {device: wanted for device, wanted, _, _ in table.evaluate("default", values)}
+
+
+def check(name, actual, expected):
+    result = "성공" if actual == expected else "실패"
+    print(f"[{result}] {name}: {actual} (기대값 {expected})")
+    return actual == expected
+
+
+def test_automation():
+    """on/off 규칙 혼합 평가 테스트 함수"""
+    print("자동화 규칙 평가 테스트 시작...")
+    mixed = [
+        {"id": "co2_fan", "device": "fan", "metric": "co2", "condition": "above", "threshold": 450, "action": "on"},
+        {"id": "hot_fan_off", "device": "fan", "metric": "temperature", "condition": "above", "threshold": 30,
+         "action": "off", "priority": 1},
+    ]
+    window_off = [
+        {"id": "cold_window", "device": "window", "metric": "temperature", "condition": "below", "threshold": 15,
+         "action": "off"},
+    ]
+
+    results = [
+        check("평온한 값 - on 규칙 해제로 환풍기 끔", decide(mixed, sample()), {"fan": False}),
+        check("CO2 높음 - 환풍기 켬", decide(mixed, sample(co2=500)), {"fan": True}),
+        check("CO2 높고 고온 - 우선순위 높은 off 규칙", decide(mixed, sample(co2=500, temperature=32)), {"fan": False}),
+        check("off 규칙만 있는 장치 - 발동 안 하면 그대로", decide(window_off, sample(temperature=20)), {}),
+        check("off 규칙만 있는 장치 - 발동하면 끔", decide(window_off, sample(temperature=10)), {"window": False}),
+    ]
+    print(f"\n{sum(results)}/{len(results)} 통과")
+
+
+if __name__ == "__main__":
+    test_automation()
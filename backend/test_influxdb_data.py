@@ -3,8 +3,11 @@
 InfluxDB 데이터 저장 및 조회 테스트 스크립트
 """
 import time
-from sensors import simulator
-from influx_storage import influx_manager
+from sensors import init_sensors
+from influx_storage import init_storage
+
+influx_manager = init_storage()
+simulator = init_sensors().default
 
 def test_data_collection():
     """데이터 수집 및 저장 테스트"""
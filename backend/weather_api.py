@@ -10,6 +10,9 @@ from urllib.parse import urlencode
 from dotenv import load_dotenv
 from typing import Dict, Any, List, Optional
 
+from http_client import http_client
+from weather_cache import WeatherCache
+
 # 환경 변수 로드
 load_dotenv()
 
@@ -18,6 +21,13 @@ WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
 WEATHER_API_BASE_URL = "http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getVilageFcst"
 WEATHER_API_ULTRA_URL = "http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getUltraSrtNcst"
 
+# 발표 슬롯 단위 응답 캐시 (WEATHER_CACHE_PATH를 지정하면 재시작 후에도 유지)
+weather_cache = WeatherCache(persist_path=os.getenv("WEATHER_CACHE_PATH") or None)
+
+
+class WeatherAPIError(Exception):
+    """기상청 API가 오류 결과 코드를 반환한 경우"""
+
 # 날씨 아이콘 매핑
 WEATHER_ICON_MAP = {
     # 맑음
@@ -76,15 +86,22 @@ def check_api_key() -> bool:
         return False
     return True
 
-def get_forecast_date() -> tuple:
+def get_cache_stats() -> Dict[str, Any]:
+    """날씨 응답 캐시의 적중률과 갱신 통계를 반환합니다."""
+    return weather_cache.get_stats()
+
+def get_forecast_date(now: Optional[datetime.datetime] = None) -> tuple:
     """
     예보 날짜와 시간을 계산합니다.
     기상청 API는 매시 45분에 업데이트되므로, 현재 시간이 45분 이전이면 1시간 전 데이터를 요청합니다.
     
+    Args:
+        now: 기준 시각 (기본값은 현재 시각)
+    
     Returns:
         tuple: (날짜, 시간) 형식의 튜플
     """
-    now = datetime.datetime.now()
+    now = now or datetime.datetime.now()
     
     # 현재 시간이 45분 이전이면 1시간 전 데이터 사용
     if now.minute < 45:
@@ -104,6 +121,82 @@ def get_forecast_date() -> tuple:
     
     return (base_date, base_time)
 
+def get_current_base_time(now: Optional[datetime.datetime] = None) -> tuple:
+    """
+    초단기실황 API의 기준 날짜와 시간을 계산합니다.
+    현재 분이 45분 이전이면 1시간 전 데이터를 요청합니다.
+    
+    Args:
+        now: 기준 시각 (기본값은 현재 시각)
+    
+    Returns:
+        tuple: (날짜, 시간) 형식의 튜플
+    """
+    now = now or datetime.datetime.now()
+    
+    if now.minute < 45:
+        now = now - datetime.timedelta(hours=1)
+    
+    return (now.strftime("%Y%m%d"), f"{now.hour:02d}00")
+
+def get_next_slot_time(slot_fn, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+    """
+    slot_fn이 반환하는 발표 슬롯이 바뀌는 다음 시각을 계산합니다.
+    발표 슬롯은 매시 45분에만 바뀌므로 이후의 45분 시점들을 차례로 확인합니다.
+    
+    Args:
+        slot_fn: 기준 시각을 받아 (날짜, 시간)을 반환하는 함수 (get_forecast_date 등)
+        now: 기준 시각 (기본값은 현재 시각)
+    
+    Returns:
+        datetime: 다음 슬롯이 시작되는 시각
+    """
+    now = now or datetime.datetime.now()
+    current_slot = slot_fn(now)
+    
+    candidate = now.replace(minute=45, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += datetime.timedelta(hours=1)
+    
+    for _ in range(48):
+        if slot_fn(candidate) != current_slot:
+            return candidate
+        candidate += datetime.timedelta(hours=1)
+    return candidate
+
+def _fetch_forecast_items(nx: int, ny: int, base_date: str, base_time: str) -> List[Dict[str, Any]]:
+    """단기예보 API를 호출해 예보 항목 목록을 반환합니다. 실패 시 예외를 발생시킵니다."""
+    # API 요청 파라미터 구성
+    params = {
+        "serviceKey": WEATHER_API_KEY,
+        "numOfRows": 100,
+        "pageNo": 1,
+        "dataType": "JSON",
+        "base_date": base_date,
+        "base_time": base_time,
+        "nx": nx,
+        "ny": ny
+    }
+    
+    # API 요청
+    query_string = urlencode(params)
+    url = f"{WEATHER_API_BASE_URL}?{query_string}"
+    
+    response = http_client.get(url)
+    response.raise_for_status()  # HTTP 오류 체크
+    
+    data = response.json()
+    
+    # API 응답 확인
+    response_code = data.get("response", {}).get("header", {}).get("resultCode")
+    
+    if response_code != "00":
+        error_msg = data.get("response", {}).get("header", {}).get("resultMsg", "알 수 없는 오류")
+        raise WeatherAPIError(error_msg)
+    
+    # 예보 항목 추출
+    return data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+
 def get_weather_forecast(region_name: str = "서울") -> Dict[str, Any]:
     """
     기상청 단기예보 API를 호출하여 날씨 정보를 가져옵니다.
@@ -129,43 +222,15 @@ def get_weather_forecast(region_name: str = "서울") -> Dict[str, Any]:
         grid = REGION_GRID[region_name]
         nx, ny = grid["nx"], grid["ny"]
         
-        # 예보 날짜와 시간 계산
-        base_date, base_time = get_forecast_date()
-        
-        # API 요청 파라미터 구성
-        params = {
-            "serviceKey": WEATHER_API_KEY,
-            "numOfRows": 100,
-            "pageNo": 1,
-            "dataType": "JSON",
-            "base_date": base_date,
-            "base_time": base_time,
-            "nx": nx,
-            "ny": ny
-        }
-        
-        # API 요청
-        query_string = urlencode(params)
-        url = f"{WEATHER_API_BASE_URL}?{query_string}"
-        
-        response = requests.get(url)
-        response.raise_for_status()  # HTTP 오류 체크
-        
-        data = response.json()
-        
-        # API 응답 확인
-        response_code = data.get("response", {}).get("header", {}).get("resultCode")
-        
-        if response_code != "00":
-            error_msg = data.get("response", {}).get("header", {}).get("resultMsg", "알 수 없는 오류")
-            return {
-                "success": False,
-                "error": f"API 오류: {error_msg}",
-                "forecast": None
-            }
+        # 예보 날짜와 시간 계산 (다음 발표 슬롯까지 캐시)
+        now = datetime.datetime.now()
+        base_date, base_time = get_forecast_date(now)
+        expires_at = get_next_slot_time(get_forecast_date, now).timestamp()
         
-        # 예보 항목 추출
-        items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+        items = weather_cache.get(
+            "forecast", nx, ny, (base_date, base_time), expires_at,
+            lambda: _fetch_forecast_items(nx, ny, base_date, base_time)
+        )
         
         # 날씨 정보 정리
         forecast_data = parse_forecast_data(items, region_name)
@@ -176,6 +241,12 @@ def get_weather_forecast(region_name: str = "서울") -> Dict[str, Any]:
             "forecast": forecast_data
         }
         
+    except WeatherAPIError as e:
+        return {
+            "success": False,
+            "error": f"API 오류: {str(e)}",
+            "forecast": None
+        }
     except requests.exceptions.RequestException as e:
         return {
             "success": False,
@@ -400,6 +471,74 @@ def get_location_from_message(message: str) -> str:
     # 기본값으로 서울 반환
     return "서울"
 
+def _fetch_current_items(nx: int, ny: int, base_date: str, base_time: str) -> List[Dict[str, Any]]:
+    """초단기실황 API를 호출해 실황 항목 목록을 반환합니다. 실패 시 예외를 발생시킵니다."""
+    # API 요청 파라미터 구성
+    params = {
+        "serviceKey": WEATHER_API_KEY,
+        "numOfRows": 10,
+        "pageNo": 1,
+        "dataType": "JSON",  # JSON 형식으로 요청
+        "base_date": base_date,
+        "base_time": base_time,
+        "nx": nx,
+        "ny": ny
+    }
+    
+    # API 요청
+    response = http_client.get(WEATHER_API_ULTRA_URL, params=params)
+    response.raise_for_status()  # HTTP 오류 체크
+    
+    # 응답 형식 확인
+    content_type = response.headers.get("Content-Type", "")
+    
+    if "application/json" in content_type:
+        data = response.json()
+    else:
+        # XML 응답인 경우 파싱 시도
+        import xml.etree.ElementTree as ET
+        root = ET.fromstring(response.text)
+        
+        # XML을 JSON 형식으로 변환
+        result_code = root.find(".//resultCode").text
+        result_msg = root.find(".//resultMsg").text
+        
+        if result_code == "00":
+            items = []
+            for item in root.findall(".//item"):
+                item_dict = {}
+                for child in item:
+                    item_dict[child.tag] = child.text
+                items.append(item_dict)
+            
+            data = {
+                "response": {
+                    "header": {
+                        "resultCode": result_code,
+                        "resultMsg": result_msg
+                    },
+                    "body": {
+                        "items": {
+                            "item": items
+                        }
+                    }
+                }
+            }
+        else:
+            # 오류 응답
+            raise WeatherAPIError(result_msg)
+    
+    # API 응답 확인
+    response_code = data.get("response", {}).get("header", {}).get("resultCode")
+    
+    if response_code != "00":
+        error_msg = data.get("response", {}).get("header", {}).get("resultMsg", "알 수 없는 오류")
+        raise WeatherAPIError(error_msg)
+    
+    # 실황 항목 추출
+    return data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+    
+
 def get_current_weather(region_name: str = "서울") -> Dict[str, Any]:
     """
     기상청 초단기실황 API를 호출하여 현재 날씨 정보를 가져옵니다.
@@ -425,88 +564,15 @@ def get_current_weather(region_name: str = "서울") -> Dict[str, Any]:
         grid = REGION_GRID[region_name]
         nx, ny = grid["nx"], grid["ny"]
         
-        # 현재 시간 기준으로 API 요청 시간 설정
+        # 현재 시간 기준으로 API 요청 시간 설정 (다음 발표 슬롯까지 캐시)
         now = datetime.datetime.now()
+        base_date, base_time = get_current_base_time(now)
+        expires_at = get_next_slot_time(get_current_base_time, now).timestamp()
         
-        # 현재 분이 45분 이전이면 1시간 전 데이터 사용
-        if now.minute < 45:
-            now = now - datetime.timedelta(hours=1)
-        
-        base_date = now.strftime("%Y%m%d")
-        base_time = f"{now.hour:02d}00"
-        
-        # API 요청 파라미터 구성
-        params = {
-            "serviceKey": WEATHER_API_KEY,
-            "numOfRows": 10,
-            "pageNo": 1,
-            "dataType": "JSON",  # JSON 형식으로 요청
-            "base_date": base_date,
-            "base_time": base_time,
-            "nx": nx,
-            "ny": ny
-        }
-        
-        # API 요청
-        response = requests.get(WEATHER_API_ULTRA_URL, params=params)
-        response.raise_for_status()  # HTTP 오류 체크
-        
-        # 응답 형식 확인
-        content_type = response.headers.get("Content-Type", "")
-        
-        if "application/json" in content_type:
-            data = response.json()
-        else:
-            # XML 응답인 경우 파싱 시도
-            import xml.etree.ElementTree as ET
-            root = ET.fromstring(response.text)
-            
-            # XML을 JSON 형식으로 변환
-            result_code = root.find(".//resultCode").text
-            result_msg = root.find(".//resultMsg").text
-            
-            if result_code == "00":
-                items = []
-                for item in root.findall(".//item"):
-                    item_dict = {}
-                    for child in item:
-                        item_dict[child.tag] = child.text
-                    items.append(item_dict)
-                
-                data = {
-                    "response": {
-                        "header": {
-                            "resultCode": result_code,
-                            "resultMsg": result_msg
-                        },
-                        "body": {
-                            "items": {
-                                "item": items
-                            }
-                        }
-                    }
-                }
-            else:
-                # 오류 응답
-                return {
-                    "success": False,
-                    "error": f"API 오류: {result_msg}",
-                    "current": None
-                }
-        
-        # API 응답 확인
-        response_code = data.get("response", {}).get("header", {}).get("resultCode")
-        
-        if response_code != "00":
-            error_msg = data.get("response", {}).get("header", {}).get("resultMsg", "알 수 없는 오류")
-            return {
-                "success": False,
-                "error": f"API 오류: {error_msg}",
-                "current": None
-            }
-        
-        # 실황 항목 추출
-        items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
+        items = weather_cache.get(
+            "current", nx, ny, (base_date, base_time), expires_at,
+            lambda: _fetch_current_items(nx, ny, base_date, base_time)
+        )
         
         # 현재 날씨 정보 정리
         current_data = parse_current_data(items, region_name)
@@ -517,6 +583,12 @@ def get_current_weather(region_name: str = "서울") -> Dict[str, Any]:
             "current": current_data
         }
         
+    except WeatherAPIError as e:
+        return {
+            "success": False,
+            "error": f"API 오류: {str(e)}",
+            "current": None
+        }
     except requests.exceptions.RequestException as e:
         return {
             "success": False,
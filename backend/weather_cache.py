@@ -0,0 +1,156 @@
+"""
+기상청 API 응답 캐시 모듈
+기상청 데이터는 발표 시각에만 바뀌므로 (엔드포인트, nx, ny, base_date, base_time) 단위로 캐시하고,
+다음 발표 슬롯이 시작되면 만료시킵니다. 만료된 항목은 백그라운드 갱신 한 번이 도는 동안
+그대로 제공(stale-while-revalidate)하며, 같은 키에 대한 동시 요청은 하나의 호출로 합칩니다.
+"""
+import json
+import os
+import threading
+import time
+
+
+class WeatherCache:
+    """발표 슬롯 기반 만료, stale-while-revalidate, 동시 요청 병합을 지원하는 캐시"""
+
+    def __init__(self, persist_path=None, max_stale_seconds=3 * 3600):
+        """
+        Args:
+            persist_path (str, optional): 캐시를 저장할 JSON 파일 경로. 재시작 후 상위 API 호출 폭주 방지.
+            max_stale_seconds (int): 만료 후에도 갱신 동안 제공할 수 있는 최대 시간 (초)
+        """
+        self.persist_path = persist_path
+        self.max_stale_seconds = max_stale_seconds
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = {}      # (endpoint, nx, ny) -> {"slot": [base_date, base_time], "items": list, "expires_at": float}
+        self._inflight = {}     # (endpoint, nx, ny, base_date, base_time) -> {"event": Event, "error": 예외}
+
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+
+        self._load()
+
+    def get(self, endpoint, nx, ny, slot, expires_at, fetch_fn):
+        """
+        캐시에서 항목을 찾거나 fetch_fn으로 가져옵니다.
+
+        Args:
+            endpoint (str): API 엔드포인트 이름
+            nx, ny (int): 기상청 격자 좌표
+            slot (tuple): 현재 발표 슬롯 (base_date, base_time)
+            expires_at (float): 다음 발표 슬롯이 시작되는 시각 (epoch 초)
+            fetch_fn (callable): 캐시 미스 시 항목을 가져오는 함수. 실패 시 예외 발생.
+
+        Returns:
+            list: 기상청 응답 항목 목록
+        """
+        base_key = (endpoint, nx, ny)
+        key = base_key + tuple(slot)
+
+        with self._lock:
+            entry = self._entries.get(base_key)
+            if entry and tuple(entry["slot"]) == tuple(slot):
+                self.stats["hits"] += 1
+                return entry["items"]
+
+            # 이전 슬롯 데이터가 있으면 바로 제공하고 백그라운드에서 한 번만 갱신
+            if entry and time.time() - entry["expires_at"] < self.max_stale_seconds:
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._inflight[key] = {"event": threading.Event(), "error": None}
+                    self.stats["refreshes"] += 1
+                    threading.Thread(
+                        target=self._refresh, args=(key, base_key, slot, expires_at, fetch_fn),
+                        name="weather-cache-refresh", daemon=True
+                    ).start()
+                return entry["items"]
+
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = {"event": threading.Event(), "error": None}
+                owner = True
+                self.stats["misses"] += 1
+            else:
+                owner = False
+                self.stats["coalesced"] += 1
+
+        if owner:
+            return self._fetch_and_store(key, base_key, slot, expires_at, fetch_fn)
+
+        # 같은 키를 이미 가져오는 중이면 그 결과를 기다림
+        flight["event"].wait()
+        if flight["error"] is not None:
+            raise flight["error"]
+        with self._lock:
+            entry = self._entries.get(base_key)
+        if entry and tuple(entry["slot"]) == tuple(slot):
+            return entry["items"]
+        # 대기 중 결과가 사라졌으면 직접 호출
+        return fetch_fn()
+
+    def _fetch_and_store(self, key, base_key, slot, expires_at, fetch_fn):
+        try:
+            items = fetch_fn()
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                flight = self._inflight.pop(key)
+            flight["error"] = e
+            flight["event"].set()
+            raise
+
+        with self._lock:
+            self._entries[base_key] = {"slot": list(slot), "items": items, "expires_at": expires_at}
+            flight = self._inflight.pop(key)
+        flight["event"].set()
+        self._save()
+        return items
+
+    def _refresh(self, key, base_key, slot, expires_at, fetch_fn):
+        try:
+            self._fetch_and_store(key, base_key, slot, expires_at, fetch_fn)
+        except Exception as e:
+            print(f"날씨 캐시 갱신 실패 ({base_key}): {e}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        total = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / total, 3) if total else None
+        return stats
+
+    def _load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            for key, entry in stored.items():
+                endpoint, nx, ny = key.split("|")
+                self._entries[(endpoint, int(nx), int(ny))] = entry
+            print(f"날씨 캐시 복원: {len(self._entries)}개 항목")
+        except Exception as e:
+            print(f"날씨 캐시 파일 로드 오류: {e}")
+
+    def _save(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            stored = {f"{endpoint}|{nx}|{ny}": entry for (endpoint, nx, ny), entry in self._entries.items()}
+        try:
+            with self._save_lock:
+                tmp_path = self.persist_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(stored, f, ensure_ascii=False)
+                os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"날씨 캐시 파일 저장 오류: {e}")
@@ -15,7 +15,7 @@ import {
   ActivityIndicator,
 } from 'react-native';
 import * as ImagePicker from 'expo-image-picker';
-import { sendChatMessage, analyzeImage, controlDevice, fetchStatus, subscribeToChatSession, getGlobalChatSessionId, subscribeToChatLog, addMessageToGlobalChatLog, getGlobalChatLog, setGlobalChatLog } from '../services/api';
+import { sendChatMessage, analyzeImage, fetchStatus, subscribeToChatSession, getGlobalChatSessionId, subscribeToChatLog, addMessageToGlobalChatLog, getGlobalChatLog, setGlobalChatLog } from '../services/api';
 
 // 모든 명령어는 Gemini API를 통해 자연어 처리됩니다
 
@@ -265,46 +265,12 @@ export default function ChatbotScreen({ navigation, userLocation = '서울' }) {
             setSessionId(response.session_id);
           }
 
-          // 액션 태그 제거하고 봇 응답 추가
+          // 이전 서버가 남긴 액션 태그가 있으면 제거하고 봇 응답 추가
           const cleanedResponse = cleanResponseText(response.response);
           
-          // 명령어 실행이 감지되면 디바이스 상태 업데이트
-          if (response.response.includes('[ACTION_')) {
-            // 팬 켜기 명령 감지
-            if (response.response.includes('[ACTION_FAN_ON]')) {
-              await controlDevice('fan', true);
-            }
-            // 팬 끄기 명령 감지
-            else if (response.response.includes('[ACTION_FAN_OFF]')) {
-              await controlDevice('fan', false);
-            }
-            // 물 공급 켜기 명령 감지
-            else if (response.response.includes('[ACTION_WATER_ON]')) {
-              await controlDevice('water', true);
-            }
-            // 물 공급 끄기 명령 감지
-            else if (response.response.includes('[ACTION_WATER_OFF]')) {
-              await controlDevice('water', false);
-            }
-            // 조명 켜기 명령 감지
-            else if (response.response.includes('[ACTION_LIGHT_ON]')) {
-              await controlDevice('light', true);
-            }
-            // 조명 끄기 명령 감지
-            else if (response.response.includes('[ACTION_LIGHT_OFF]')) {
-              await controlDevice('light', false);
-            }
-            // 창문 열기 명령 감지
-            else if (response.response.includes('[ACTION_WINDOW_OPEN]')) {
-              await controlDevice('window', true);
-            }
-            // 창문 닫기 명령 감지
-            else if (response.response.includes('[ACTION_WINDOW_CLOSE]')) {
-              await controlDevice('window', false);
-            }
-            
-            // 디바이스 상태 다시 로드
-            await loadDeviceStatus();
+          // 액션 태그는 서버가 이미 실행했으므로 응답에 담긴 실행 후 장치 상태만 반영
+          if (response.devices) {
+            setDeviceStatus(response.devices);
           }
           
           // 봇 응답 추가
@@ -14,7 +14,7 @@ import {
   Image,
 } from 'react-native';
 import * as ImagePicker from 'expo-image-picker';
-import { sendChatMessage, analyzeImage, controlDevice, fetchStatus, subscribeToChatSession, getGlobalChatSessionId, subscribeToChatLog, addMessageToGlobalChatLog, getGlobalChatLog, setGlobalChatLog } from '../services/api';
+import { sendChatMessageStream, analyzeImage, controlDevice, fetchStatus, subscribeToChatSession, getGlobalChatSessionId, subscribeToChatLog, addMessageToGlobalChatLog, getGlobalChatLog, setGlobalChatLog } from '../services/api';
 
 const { width, height } = Dimensions.get('window');
 
@@ -47,6 +47,7 @@ export default function ElderlyChatScreen({ navigation, userLocation = '서울'
   const [chatLog, setChatLog] = useState([]);
   const [imageUri, setImageUri] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
+  const [streamingText, setStreamingText] = useState(''); // 스트리밍 중인 봇 응답
   const [deviceStatus, setDeviceStatus] = useState(null);
   const [sessionId, setSessionId] = useState(null);
   const [safeLocation, setSafeLocation] = useState(userLocation || '서울');
@@ -448,7 +449,11 @@ export default function ElderlyChatScreen({ navigation, userLocation = '서울'
       } else {
         // API 서버에 메시지 전송
         try {
-          const response = await sendChatMessage(userInput, sessionId, safeLocation);
+          // 응답 조각이 도착할 때마다 화면에 바로 표시
+          const response = await sendChatMessageStream(userInput, sessionId, safeLocation, (partial) => {
+            setStreamingText(convertMarkdownToText(cleanResponseText(partial)));
+          });
+          setStreamingText('');
           
           if (response && response.response) {
             // 세션 ID 저장
@@ -456,46 +461,12 @@ export default function ElderlyChatScreen({ navigation, userLocation = '서울'
               setSessionId(response.session_id);
             }
 
-            // 액션 태그 제거하고 봇 응답 추가
+            // 이전 서버가 남긴 액션 태그가 있으면 제거하고 봇 응답 추가
             const cleanedResponse = cleanResponseText(response.response);
             
-            // 명령어 실행이 감지되면 디바이스 상태 업데이트
-            if (response.response.includes('[ACTION_')) {
-              // 팬 켜기 명령 감지
-              if (response.response.includes('[ACTION_FAN_ON]')) {
-                await controlDevice('fan', true);
-              }
-              // 팬 끄기 명령 감지
-              else if (response.response.includes('[ACTION_FAN_OFF]')) {
-                await controlDevice('fan', false);
-              }
-              // 물 공급 켜기 명령 감지
-              else if (response.response.includes('[ACTION_WATER_ON]')) {
-                await controlDevice('water', true);
-              }
-              // 물 공급 끄기 명령 감지
-              else if (response.response.includes('[ACTION_WATER_OFF]')) {
-                await controlDevice('water', false);
-              }
-              // 조명 켜기 명령 감지
-              else if (response.response.includes('[ACTION_LIGHT_ON]')) {
-                await controlDevice('light', true);
-              }
-              // 조명 끄기 명령 감지
-              else if (response.response.includes('[ACTION_LIGHT_OFF]')) {
-                await controlDevice('light', false);
-              }
-              // 창문 열기 명령 감지
-              else if (response.response.includes('[ACTION_WINDOW_OPEN]')) {
-                await controlDevice('window', true);
-              }
-              // 창문 닫기 명령 감지
-              else if (response.response.includes('[ACTION_WINDOW_CLOSE]')) {
-                await controlDevice('window', false);
-              }
-              
-              // 디바이스 상태 다시 로드
-              await loadDeviceStatus();
+            // 액션 태그는 서버가 이미 실행했으므로 응답에 담긴 실행 후 장치 상태만 반영
+            if (response.devices) {
+              setDeviceStatus(response.devices);
             }
             
             // 봇 응답 추가
@@ -521,6 +492,7 @@ export default function ElderlyChatScreen({ navigation, userLocation = '서울'
       };
       await addMessageToGlobalChatLog(errorMessage);
     } finally {
+      setStreamingText('');
       setIsLoading(false);
     }
   };
@@ -611,7 +583,7 @@ export default function ElderlyChatScreen({ navigation, userLocation = '서울'
       <View style={styles.chatContainer}>
         <FlatList
           ref={listRef}
-          data={chatLog}
+          data={streamingText ? [...chatLog, { role: 'bot', text: streamingText }] : chatLog}
           renderItem={renderItem}
           keyExtractor={(_, index) => index.toString()}
           contentContainerStyle={styles.chatList}
@@ -633,7 +605,7 @@ export default function ElderlyChatScreen({ navigation, userLocation = '서울'
           showsVerticalScrollIndicator={false}
         />
 
-        {isLoading && (
+        {isLoading && !streamingText && (
           <View style={styles.loadingContainer}>
             <ActivityIndicator size="large" color="#4CAF50" />
             <Text style={styles.loadingText}>답변을 생각하고 있어요...</Text>
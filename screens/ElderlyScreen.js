@@ -8,7 +8,7 @@ import {
   Alert,
   ImageBackground,
 } from 'react-native';
-import { fetchStatus } from '../services/api';
+import { subscribeToSensorStream } from '../services/api';
 
 export default function ElderlyScreen({ navigation, route }) {
   // 실시간 센서 데이터 상태 추가
@@ -31,31 +31,20 @@ export default function ElderlyScreen({ navigation, route }) {
     light: [45, 48, 52, 50, 50],
   });
 
-  // 실시간 센서 데이터 로드 (1초마다)
+  // 실시간 센서 데이터 구독 (서버 푸시, 연결이 끊기면 폴링으로 대체)
   useEffect(() => {
-    const loadSensorData = async () => {
-      try {
-        const data = await fetchStatus();
-        setLatestValues({
-          temperature: data.temperature || 25,
-          humidity: data.humidity || 61,
-          power: data.power || 144,
-          soil: data.soil || 46,
-          co2: data.co2 || 410,
-          light: data.light || 50,
-        });
-      } catch (error) {
-        console.error('어르신 모드 센서 데이터 로드 오류:', error);
-      }
-    };
-
-    // 초기 로드
-    loadSensorData();
-
-    // 1초마다 업데이트 (거의 실시간)
-    const interval = setInterval(loadSensorData, 1000);
-
-    return () => clearInterval(interval);
+    const unsubscribe = subscribeToSensorStream((data) => {
+      setLatestValues({
+        temperature: data.temperature || 25,
+        humidity: data.humidity || 61,
+        power: data.power || 144,
+        soil: data.soil || 46,
+        co2: data.co2 || 410,
+        light: data.light || 50,
+      });
+    });
+
+    return unsubscribe;
   }, []);
 
   const metricTitles = {
@@ -2,6 +2,7 @@
  * 스마트 온실 시스템 API 서비스
  */
 
+import { io } from 'socket.io-client';
 import { initDatabase, saveChatMessage, getAllChatMessages } from './database';
 
 // 환경별 API URL 설정
@@ -389,6 +390,117 @@ export const fetchStatus = async () => {
   }
 };
 
+// 실시간 센서 스트림 (Socket.IO /stream 네임스페이스) - 모든 화면이 하나의 연결을 공유
+let sensorSocket = null;
+let sensorStreamState = null;
+let sensorStreamSubscribers = [];
+let sensorPollTimer = null;
+const SENSOR_POLL_FALLBACK_MS = 1000;
+
+const notifySensorStream = (state) => {
+  sensorStreamSubscribers.forEach((callback) => {
+    try {
+      callback(state);
+    } catch (error) {
+      console.error('[sensorStream] 구독자 호출 오류:', error);
+    }
+  });
+};
+
+// 스트림이 끊겨 있는 동안에만 폴링으로 대체
+const startSensorPolling = () => {
+  if (sensorPollTimer) return;
+  const poll = async () => {
+    const data = await fetchStatus();
+    sensorStreamState = data;
+    notifySensorStream(data);
+  };
+  poll();
+  sensorPollTimer = setInterval(poll, SENSOR_POLL_FALLBACK_MS);
+};
+
+const stopSensorPolling = () => {
+  if (sensorPollTimer) {
+    clearInterval(sensorPollTimer);
+    sensorPollTimer = null;
+  }
+};
+
+const connectSensorStream = () => {
+  sensorSocket = io(`${API_URL}/stream`, {
+    transports: ['websocket', 'polling'],
+    auth: { interval: 1 },
+    reconnectionDelayMax: 10000,
+  });
+
+  sensorSocket.on('connect', () => {
+    console.log('[sensorStream] 스트림 연결됨 - 폴링 중지');
+    stopSensorPolling();
+  });
+
+  sensorSocket.on('disconnect', () => {
+    console.warn('[sensorStream] 스트림 연결 끊김 - 폴링으로 대체');
+    startSensorPolling();
+  });
+
+  sensorSocket.on('connect_error', () => {
+    startSensorPolling();
+  });
+
+  // 첫 이벤트는 전체 스냅샷
+  sensorSocket.on('snapshot', (snapshot) => {
+    sensorStreamState = snapshot;
+    notifySensorStream(sensorStreamState);
+    notifyStatusUpdate(sensorStreamState);
+  });
+
+  // 이후에는 바뀐 값만 전달되므로 현재 상태에 병합
+  sensorSocket.on('delta', (delta) => {
+    const previous = sensorStreamState || {};
+    sensorStreamState = {
+      ...previous,
+      ...delta,
+      devices: { ...(previous.devices || {}), ...(delta.devices || {}) },
+    };
+    notifySensorStream(sensorStreamState);
+    if (delta.devices) {
+      notifyStatusUpdate(sensorStreamState);
+    }
+  });
+};
+
+/**
+ * 실시간 센서 데이터를 구독합니다. (서버 푸시, 연결이 끊기면 폴링으로 대체)
+ * @param {Function} callback - 새 센서 상태(전체)를 받을 콜백 함수
+ * @returns {Function} 구독 취소 함수
+ */
+export const subscribeToSensorStream = (callback) => {
+  if (typeof callback !== 'function') {
+    console.warn('[subscribeToSensorStream] 유효하지 않은 콜백 함수입니다.');
+    return () => {};
+  }
+
+  sensorStreamSubscribers.push(callback);
+  if (sensorStreamState) {
+    callback(sensorStreamState);
+  }
+  if (!sensorSocket) {
+    connectSensorStream();
+  }
+
+  return () => {
+    sensorStreamSubscribers = sensorStreamSubscribers.filter(cb => cb !== callback);
+    // 마지막 구독자가 떠나면 연결 정리
+    if (sensorStreamSubscribers.length === 0) {
+      stopSensorPolling();
+      if (sensorSocket) {
+        sensorSocket.disconnect();
+        sensorSocket = null;
+      }
+    }
+  };
+};
+
 /**
  * 특정 측정 항목의 기록 데이터를 가져옵니다.
  * @param {string} metric - 측정 항목 (temperature, humidity, power, soil)
@@ -578,6 +690,109 @@ export async function sendChatMessage(message, sessionId = null, location = '서
   }
 }
 
+/**
+ * 챗봇에 메시지를 보내고 응답을 조각 단위로 받습니다. (/api/chat/stream SSE)
+ * React Native fetch는 응답 본문을 스트리밍하지 않으므로 XMLHttpRequest의 onprogress로
+ * 지금까지 받은 본문을 읽어 SSE 이벤트를 파싱합니다.
+ * 첫 조각을 받기 전에 실패하면 sendChatMessage로 대체합니다.
+ * @param {string} message - 사용자 메시지
+ * @param {string} sessionId - 대화 세션 ID (선택적)
+ * @param {string} location - 사용자 위치 정보 (선택적)
+ * @param {function} onChunk - 누적된 응답 텍스트를 받는 콜백
+ */
+export async function sendChatMessageStream(message, sessionId = null, location = '서울', onChunk = () => {}) {
+  if (!message || typeof message !== 'string') {
+    throw new Error('유효하지 않은 메시지입니다');
+  }
+
+  const safeLocation = location && typeof location === 'string' ? location : '서울';
+  const currentSessionId = globalChatSessionId || sessionId;
+
+  const requestData = {
+    message,
+    location: safeLocation
+  };
+
+  if (currentSessionId && typeof currentSessionId === 'string') {
+    requestData.session_id = currentSessionId;
+  }
+
+  let receivedChunk = false;
+
+  try {
+    const data = await new Promise((resolve, reject) => {
+      const xhr = new XMLHttpRequest();
+      let parsedLength = 0;
+      let accumulatedText = '';
+      let finished = false;
+
+      // 완성된 이벤트("\n\n"으로 끝나는 블록)만 파싱하고 나머지는 다음 onprogress까지 보류
+      const parseEvents = () => {
+        const body = xhr.responseText || '';
+        const lastBoundary = body.lastIndexOf('\n\n');
+        if (lastBoundary < parsedLength) return;
+
+        const blocks = body.slice(parsedLength, lastBoundary).split('\n\n');
+        parsedLength = lastBoundary + 2;
+
+        for (const block of blocks) {
+          const eventLine = block.split('\n').find(line => line.startsWith('event:'));
+          const dataLine = block.split('\n').find(line => line.startsWith('data:'));
+          if (!eventLine || !dataLine) continue;
+
+          const eventType = eventLine.slice(6).trim();
+          let payload;
+          try {
+            payload = JSON.parse(dataLine.slice(5).trim());
+          } catch (e) {
+            continue;
+          }
+
+          if (eventType === 'chunk') {
+            receivedChunk = true;
+            accumulatedText += payload.text || '';
+            onChunk(accumulatedText);
+          } else if (eventType === 'done' || eventType === 'error') {
+            finished = true;
+            resolve(payload);
+          }
+        }
+      };
+
+      xhr.open('POST', `${API_URL}/api/chat/stream`);
+      xhr.setRequestHeader('Content-Type', 'application/json');
+      xhr.onprogress = parseEvents;
+      xhr.onload = () => {
+        if (xhr.status !== 200) {
+          reject(new Error(`API 오류: ${xhr.status}`));
+          return;
+        }
+        parseEvents();
+        if (!finished) {
+          reject(new Error('스트리밍 응답이 완료되지 않았습니다'));
+        }
+      };
+      xhr.onerror = () => reject(new Error('Network request failed'));
+      xhr.ontimeout = () => reject(new Error('스트리밍 요청 시간 초과'));
+      xhr.send(JSON.stringify(requestData));
+    });
+
+    if (data.session_id && data.session_id !== globalChatSessionId) {
+      console.log(`[sendChatMessageStream] 새로운 세션 ID 수신: ${data.session_id}`);
+      setGlobalChatSessionId(data.session_id);
+    }
+
+    return data;
+  } catch (error) {
+    console.error('API 서비스: 스트리밍 채팅 요청 예외 발생', error.message);
+    if (!receivedChunk) {
+      // 스트리밍을 지원하지 않는 서버이거나 연결 실패 - 일반 요청으로 재시도
+      return sendChatMessage(message, sessionId, location);
+    }
+    throw error;
+  }
+}
+
 /**
  * 자동모드 상태 설정
  * @param {boolean} enabled - 자동모드 활성화 여부